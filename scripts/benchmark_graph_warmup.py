@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Холодный и тёплый запрос: сколько стоит собирать графы в каждом запросе.
+
+1. Сборка: --rounds раз собираются Self-RAG и PlanningGraph в новом GraphRegistry
+   (compile, bind_tools, EventRetriever) и сравниваются с обращением к уже собранным.
+   Сети не требует (достаточно ключа LLM в окружении).
+2. Запросы (--queries N > 0): N запросов из rag_test_queries.json через новый реестр
+   без warmup — первый холодный, остальные тёплые. Нужны Weaviate и LLM;
+   кэш планов временный, чтобы повторы не попадали в него.
+
+Запуск:
+    python scripts/benchmark_graph_warmup.py --rounds 5
+    python scripts/benchmark_graph_warmup.py --queries 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.graph_registry import GraphRegistry
+from src.planner_agent.plan_cache import PlanCache
+from src.vdb.rag.self_rag_graph import run_self_rag
+
+
+def bench_build(rounds: int) -> None:
+    cold, warm = [], []
+    for _ in range(rounds):
+        registry = GraphRegistry()
+        started = time.perf_counter()
+        registry.self_rag_graph()
+        registry.planning_graph()
+        cold.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        registry.self_rag_graph()
+        registry.planning_graph()
+        warm.append(time.perf_counter() - started)
+
+    print(f"🧊 Сборка графов (cold): среднее {statistics.mean(cold) * 1000:.1f} мс, "
+          f"макс {max(cold) * 1000:.1f} мс")
+    print(f"🔥 Готовые графы (warm): среднее {statistics.mean(warm) * 1e6:.1f} мкс")
+
+
+def bench_requests(n: int, queries_path: Path) -> None:
+    with open(queries_path, "r", encoding="utf-8") as f:
+        queries = [row["query"] for row in json.load(f)][:n]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = GraphRegistry(plan_cache=PlanCache(db_path=str(Path(tmp) / "plan_cache.db")))
+        for query in queries:
+            started, cold = time.perf_counter(), not registry.is_warm
+            res = run_self_rag(query, graph=registry.self_rag_graph())
+            registry.planning_graph().run(res)
+            registry.record(time.perf_counter() - started, cold=cold)
+
+    print("\n📊 Время запросов:")
+    for kind, stats in registry.latency_report().items():
+        print(f"   {kind}: {stats['count']} шт., среднее {stats['avg']:.2f} с, "
+              f"p50 {stats['p50']:.2f} с, макс {stats['max']:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодные и тёплые запросы: стоимость сборки графов")
+    parser.add_argument("--rounds", type=int, default=5, help="Сколько раз собирать графы заново")
+    parser.add_argument("--queries", type=int, default=0, help="Сколько запросов прогнать целиком (0 — не прогонять)")
+    parser.add_argument("--queries-file", default=str(project_root / "data" / "testing_data" / "rag_test_queries.json"))
+    args = parser.parse_args()
+
+    bench_build(args.rounds)
+    if args.queries > 0:
+        bench_requests(args.queries, Path(args.queries_file))
+
+
+if __name__ == "__main__":
+    main()
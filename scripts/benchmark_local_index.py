@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк локального индекса на NumPy против Weaviate на событиях KudaGo.
+
+Для запросов из data/testing_data/rag_test_queries.csv (как в benchmark_retrieval.py)
+считает recall@K и задержки:
+- local: LocalEventRetriever.retrieve по одному запросу;
+- local batch: retrieve_many — все запросы одним умножением матриц (время на запрос);
+- weaviate: EventRetriever в векторном режиме, если Weaviate доступен.
+
+Локальный индекс строится из тех же файлов, что загружает launch_pipeline;
+время загрузки индекса (mmap) печатается отдельно — это и есть «старт» бэкенда.
+
+Запуск:
+    python scripts/benchmark_local_index.py
+    EMBEDDER=sentence-transformers python scripts/benchmark_local_index.py --no-weaviate
+"""
+
+import argparse
+import csv
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data_parsers.kudago_parser import parse_kudago_json
+from src.vdb.rag.local_retriever import LocalEventRetriever, build_local_index
+from src.vdb.rag.retriever import EventRetriever
+
+
+K_VALUES = [1, 3, 5, 10]
+
+
+def load_queries(path: Path) -> List[Dict[str, str]]:
+    """Загружает пары (запрос, целевое событие)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def _metrics(ranked: List[list], queries: List[Dict[str, str]], latencies: List[float]) -> Dict[str, float]:
+    hits = {k: 0 for k in K_VALUES}
+    for events, row in zip(ranked, queries):
+        target = _normalize(row["description"])
+        rank = next((i for i, e in enumerate(events, 1) if _normalize(e.description) == target), None)
+        for k in K_VALUES:
+            if rank is not None and rank <= k:
+                hits[k] += 1
+
+    n = len(queries) or 1
+    latencies = sorted(latencies)
+    return {
+        **{f"recall@{k}": hits[k] / n for k in K_VALUES},
+        "latency_mean_ms": statistics.mean(latencies) if latencies else 0.0,
+        "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    }
+
+
+def run_single(retriever: EventRetriever, queries: List[Dict[str, str]]) -> Dict[str, float]:
+    """Каждый запрос отдельным retrieve."""
+    max_k = max(K_VALUES)
+    retriever.retrieve(queries[0]["query"], limit=1, mode="vector")  # прогрев
+    ranked, latencies = [], []
+    for row in queries:
+        started = time.perf_counter()
+        ranked.append(retriever.retrieve(row["query"], limit=max_k, mode="vector"))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return _metrics(ranked, queries, latencies)
+
+
+def run_batch(retriever: LocalEventRetriever, queries: List[Dict[str, str]]) -> Dict[str, float]:
+    """Все запросы одной пачкой через index.search (без RRF): время делится на число запросов."""
+    max_k = max(K_VALUES)
+    texts = [row["query"] for row in queries]
+    retriever.embedder.embed_array(texts, kind="query")  # прогрев кэша эмбеддингов
+
+    started = time.perf_counter()
+    vectors = retriever.embedder.embed_array(texts, kind="query")
+    hits = retriever.index.search(vectors, max_k, retriever.index.mask())
+    ranked = [retriever.index.events_for(h) for h in hits]
+    per_query = (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+    return _metrics(ranked, queries, [per_query] * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный индекс на NumPy против Weaviate")
+    parser.add_argument("--queries", default=str(project_root / "data" / "testing_data" / "rag_test_queries.csv"))
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "raw_data" / "real_events_data"))
+    parser.add_argument("--pattern", default="events_pydantic_*.json")
+    parser.add_argument("--no-weaviate", action="store_true", help="Не сравнивать с Weaviate")
+    parser.add_argument("--output", default=None, help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    queries = load_queries(Path(args.queries))
+    events = []
+    for path in sorted(Path(args.data_dir).glob(args.pattern)):
+        events.extend(parse_kudago_json(str(path), owner="all"))
+    print(f"📋 Запросов: {len(queries)}, событий: {len(events)}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        started = time.perf_counter()
+        index = build_local_index(events, Path(index_dir))
+        print(f"🧱 Индекс построен за {time.perf_counter() - started:.2f} с ({index.embedder_name})")
+
+        started = time.perf_counter()
+        # тестовые события из прошлого — фильтр по датам не нужен
+        local = LocalEventRetriever(index_dir=Path(index_dir), upcoming_only=False)
+        print(f"📂 Загрузка индекса (mmap): {(time.perf_counter() - started) * 1000:.1f} мс")
+
+        print("🔎 local...")
+        results["local"] = run_single(local, queries)
+        print("🔎 local batch...")
+        results["local batch"] = run_batch(local, queries)
+
+    if not args.no_weaviate:
+        weaviate_retriever = EventRetriever(upcoming_only=False, use_cache=False)
+        try:
+            print("🔎 weaviate...")
+            results["weaviate"] = run_single(weaviate_retriever, queries)
+        except Exception as e:
+            print(f"⚠️  Weaviate недоступен, сравнение пропущено: {e}")
+        finally:
+            weaviate_retriever.close()
+
+    header = f"{'бэкенд':<14}" + "".join(f"{'R@' + str(k):>8}" for k in K_VALUES) + f"{'mean ms':>10}{'p95 ms':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    for name, m in results.items():
+        print(
+            f"{name:<14}"
+            + "".join(f"{m[f'recall@{k}']:>8.3f}" for k in K_VALUES)
+            + f"{m['latency_mean_ms']:>10.2f}{m['latency_p95_ms']:>10.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"num_queries": len(queries), "num_events": len(events), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк режимов поиска EventRetriever (vector / bm25 / hybrid).
+
+Для каждого запроса из data/testing_data/rag_test_queries.csv ищет события
+и проверяет, попало ли целевое событие (по description, как в
+tests/rag_evaluation.ipynb) в топ-K. Печатает recall@K и задержки.
+
+Запуск (Weaviate с загруженными событиями должен быть доступен):
+    python scripts/benchmark_retrieval.py
+    python scripts/benchmark_retrieval.py --modes hybrid --alpha 0.3 0.5 0.7
+"""
+
+import argparse
+import csv
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vdb.rag.retriever import EventRetriever
+from src.vdb.config import HYBRID_ALPHA
+
+
+K_VALUES = [1, 3, 5, 10]
+
+
+def load_queries(path: Path) -> List[Dict[str, str]]:
+    """Загружает пары (запрос, целевое событие)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def run_mode(retriever: EventRetriever, queries: List[Dict[str, str]], mode: str, alpha: float) -> Dict[str, float]:
+    """Прогоняет все запросы в одном режиме и считает метрики."""
+    max_k = max(K_VALUES)
+    hits = {k: 0 for k in K_VALUES}
+    latencies = []
+
+    for row in queries:
+        started = time.perf_counter()
+        events = retriever.retrieve(row["query"], limit=max_k, mode=mode, alpha=alpha)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        target = _normalize(row["description"])
+        rank = next((i for i, e in enumerate(events, 1) if _normalize(e.description) == target), None)
+        for k in K_VALUES:
+            if rank is not None and rank <= k:
+                hits[k] += 1
+
+    n = len(queries) or 1
+    latencies.sort()
+    return {
+        **{f"recall@{k}": hits[k] / n for k in K_VALUES},
+        "latency_mean_ms": statistics.mean(latencies) if latencies else 0.0,
+        "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк режимов поиска EventRetriever")
+    parser.add_argument("--queries", default=str(project_root / "data" / "testing_data" / "rag_test_queries.csv"))
+    parser.add_argument("--modes", nargs="+", default=["vector", "bm25", "hybrid"])
+    parser.add_argument("--alpha", nargs="+", type=float, default=[HYBRID_ALPHA], help="alpha для hybrid")
+    parser.add_argument("--output", default=None, help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    queries = load_queries(Path(args.queries))
+    print(f"📋 Запросов: {len(queries)}")
+
+    # тестовые события из прошлого — фильтр по датам не нужен
+    retriever = EventRetriever(upcoming_only=False)
+    results = {}
+    try:
+        # прогрев: соединение и кэши Weaviate не должны попадать в замер первого режима
+        retriever.retrieve(queries[0]["query"], limit=1)
+
+        for mode in args.modes:
+            for alpha in (args.alpha if mode == "hybrid" else [None]):
+                name = f"hybrid(alpha={alpha})" if mode == "hybrid" else mode
+                print(f"🔎 {name}...")
+                results[name] = run_mode(retriever, queries, mode, alpha)
+    finally:
+        retriever.close()
+
+    header = f"{'режим':<22}" + "".join(f"{'R@' + str(k):>8}" for k in K_VALUES) + f"{'mean ms':>10}{'p95 ms':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    for name, m in results.items():
+        print(
+            f"{name:<22}"
+            + "".join(f"{m[f'recall@{k}']:>8.3f}" for k in K_VALUES)
+            + f"{m['latency_mean_ms']:>10.1f}{m['latency_p95_ms']:>10.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"num_queries": len(queries), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
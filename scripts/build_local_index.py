@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Построение локального индекса событий (RETRIEVAL_BACKEND=local) из JSON KudaGo.
+
+Векторы считает EMBEDDER (по умолчанию — хэширующий эмбеддер без моделей);
+неизменённые события берутся из кэша эмбеддингов, поэтому пересборка дешёвая.
+
+Запуск:
+    python scripts/build_local_index.py
+    EMBEDDER=sentence-transformers python scripts/build_local_index.py --output data/cache/local_index
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data_parsers.kudago_parser import parse_kudago_json
+from src.vdb.rag.local_retriever import build_local_index, default_index_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Построить локальный индекс событий на NumPy")
+    parser.add_argument("--data-dir", default=str(project_root / "data" / "raw_data" / "real_events_data"))
+    parser.add_argument("--pattern", default="events_pydantic_*.json", help="Файлы KudaGo в data-dir")
+    parser.add_argument("--output", default=str(default_index_dir()))
+    args = parser.parse_args()
+
+    events = []
+    for path in sorted(Path(args.data_dir).glob(args.pattern)):
+        parsed = parse_kudago_json(str(path), owner="all")
+        print(f"📄 {path.name}: {len(parsed)} событий")
+        events.extend(parsed)
+
+    started = time.perf_counter()
+    index = build_local_index(events, Path(args.output))
+    print(
+        f"✅ Индекс: {len(index)} событий, размерность {index.vectors.shape[1] if len(index) else 0}, "
+        f"эмбеддер {index.embedder_name}, {time.perf_counter() - started:.1f} с → {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Офлайн-калибровка порогов RelevancePolicy (src/vdb/rag/relevance.py).
+
+Для каждого запроса из data/testing_data/rag_test_queries.json выполняет
+векторный поиск и запоминает дистанции выдачи. Запрос считается релевантно
+обслуженным, если целевое событие попало в топ-K. Затем перебором подбираются:
+- accept_distance и min_hits: максимум автопринятых запросов при точности
+  (доля действительно релевантных среди принятых) не ниже --min-precision;
+- reject_distance: максимум автоотклонённых при той же точности отказа.
+
+Запуск (Weaviate с загруженными событиями должен быть доступен):
+    python scripts/calibrate_relevance_thresholds.py
+    python scripts/calibrate_relevance_thresholds.py --k 5 --min-precision 0.95 --output thresholds.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vdb.config import MAX_EVENTS
+from src.vdb.rag.relevance import RelevancePolicy, event_distances
+from src.vdb.rag.retriever import EventRetriever
+
+
+MIN_HITS = [1, 2, 3, 5]
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def collect(retriever: EventRetriever, queries: List[Dict], k: int) -> List[Tuple[List[float], bool]]:
+    """(дистанции выдачи, найдено ли целевое событие в топ-K) для каждого запроса."""
+    samples = []
+    for row in queries:
+        events = retriever.retrieve(row["query"], limit=MAX_EVENTS, mode="vector")
+        target = _normalize(row["description"])
+        relevant = any(_normalize(e.description) == target for e in events[:k])
+        samples.append((event_distances(events), relevant))
+    return samples
+
+
+def _precision(decisions: List[Tuple[Optional[bool], bool]], value: bool) -> Tuple[int, float]:
+    chosen = [relevant for decision, relevant in decisions if decision is value]
+    if not chosen:
+        return 0, 1.0
+    return len(chosen), sum(r == value for r in chosen) / len(chosen)
+
+
+def calibrate(samples: List[Tuple[List[float], bool]], min_precision: float) -> Dict:
+    grid = sorted({round(d, 3) for distances, _ in samples for d in distances})
+
+    best_accept = None
+    for min_hits in MIN_HITS:
+        for x in grid:
+            policy = RelevancePolicy(accept_distance=x, accept_min_hits=min_hits, reject_distance=float("inf"))
+            decisions = [(True if policy.decide_distances(d) else None, r) for d, r in samples]
+            count, precision = _precision(decisions, True)
+            if precision >= min_precision and (best_accept is None or count > best_accept["accepted"]):
+                best_accept = {"accept_distance": x, "accept_min_hits": min_hits, "accepted": count, "precision": precision}
+
+    best_reject = None
+    for y in reversed(grid):
+        policy = RelevancePolicy(accept_distance=-1.0, accept_min_hits=1, reject_distance=y)
+        decisions = [(policy.decide_distances(d), r) for d, r in samples]
+        count, precision = _precision(decisions, False)
+        if precision >= min_precision and (best_reject is None or count > best_reject["rejected"]):
+            best_reject = {"reject_distance": y, "rejected": count, "precision": precision}
+
+    return {"accept": best_accept, "reject": best_reject}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Калибровка порогов RelevancePolicy")
+    parser.add_argument("--queries", default=str(project_root / "data" / "testing_data" / "rag_test_queries.json"))
+    parser.add_argument("--k", type=int, default=5, help="Запрос релевантен, если целевое событие в топ-K")
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    parser.add_argument("--output", default=None, help="Сохранить пороги и дистанции в JSON")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    print(f"📋 Запросов: {len(queries)}")
+
+    # тестовые события из прошлого — фильтр по датам не нужен
+    retriever = EventRetriever(upcoming_only=False)
+    try:
+        samples = collect(retriever, queries, args.k)
+    finally:
+        retriever.close()
+
+    n = len(samples) or 1
+    print(f"🎯 Целевое событие в топ-{args.k}: {sum(r for _, r in samples)}/{len(samples)}")
+
+    result = calibrate(samples, args.min_precision)
+    accept, reject = result["accept"], result["reject"]
+    decided = (accept["accepted"] if accept else 0) + (reject["rejected"] if reject else 0)
+
+    if accept:
+        print(
+            f"✅ Принять: ≥{accept['accept_min_hits']} событий с дистанцией ≤ {accept['accept_distance']} "
+            f"({accept['accepted']} запросов, точность {accept['precision']:.0%})"
+        )
+    else:
+        print("⚠️ Порог принятия с заданной точностью не найден")
+    if reject:
+        print(
+            f"❌ Отклонить: все дистанции > {reject['reject_distance']} "
+            f"({reject['rejected']} запросов, точность {reject['precision']:.0%})"
+        )
+    else:
+        print("⚠️ Порог отказа с заданной точностью не найден")
+    print(f"🤖 Без вызова LLM: {decided}/{len(samples)} ({decided / n:.0%})")
+
+    print("\nПеременные окружения:")
+    if accept:
+        print(f"RELEVANCE_ACCEPT_DISTANCE={accept['accept_distance']}")
+        print(f"RELEVANCE_ACCEPT_MIN_HITS={accept['accept_min_hits']}")
+    if reject:
+        print(f"RELEVANCE_REJECT_DISTANCE={reject['reject_distance']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {**result, "k": args.k, "min_precision": args.min_precision,
+                 "samples": [{"distances": d, "relevant": r} for d, r in samples]},
+                f, ensure_ascii=False, indent=2,
+            )
+        print(f"\n✅ Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
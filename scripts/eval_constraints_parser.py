@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Оценка локального парсера ограничений (src/utils/constraints_parser.py).
+
+Для каждого запроса из data/testing_data/system_eval_queries.csv считает,
+понадобился бы вызов LLM в extract_constraints_node (то же условие, что в узле:
+ParsedConstraints.needs_llm). С флагом --llm также
+извлекает Constraints полным LLM-промптом (как до локального парсера) и
+считает по каждому полю совпадение локального результата с LLM.
+
+Запуск:
+    python scripts/eval_constraints_parser.py
+    python scripts/eval_constraints_parser.py --llm --output constraints_eval.json
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.planner_agent.models import Constraints
+from src.utils.constraints_parser import parse_constraints
+
+
+FIELDS = ["start_time", "end_time", "max_total_time_minutes", "budget", "preferred_transport"]
+
+
+def load_queries(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [row["query"] for row in csv.DictReader(f)]
+
+
+def llm_constraints(llm, query: str) -> Optional[Constraints]:
+    """Полное извлечение через LLM — эталон для сравнения."""
+    from src.vdb.rag.self_rag_graph import CONSTRAINTS_EXTRACTION_PROMPT, CONSTRAINTS_FIELD_FORMATS
+
+    prompt = CONSTRAINTS_EXTRACTION_PROMPT.format(
+        user_query=query,
+        fields="\n".join(f"- {name}: {fmt}" for name, fmt in CONSTRAINTS_FIELD_FORMATS.items()),
+    )
+    raw = (llm.invoke(prompt).content or "").strip()
+    raw = raw.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        return Constraints.model_validate(json.loads(raw))
+    except Exception as e:
+        print(f"⚠️ Не удалось разобрать ответ LLM для '{query[:50]}': {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Оценка локального парсера ограничений")
+    parser.add_argument("--queries", default=str(project_root / "data" / "testing_data" / "system_eval_queries.csv"))
+    parser.add_argument("--llm", action="store_true", help="Сравнить с извлечением через LLM")
+    parser.add_argument("--output", default=None, help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    queries = load_queries(Path(args.queries))
+    print(f"📋 Запросов: {len(queries)}")
+
+    llm = None
+    if args.llm:
+        from langchain_openai import ChatOpenAI
+        from src.vdb.config import OPENAI_API_KEY, OPENAI_MODEL
+        llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0, api_key=OPENAI_API_KEY)
+
+    rows = []
+    llm_calls = 0
+    agree: Dict[str, int] = {name: 0 for name in FIELDS}
+    compared = 0
+
+    for query in queries:
+        parsed = parse_constraints(query)
+        llm_calls += parsed.needs_llm
+        row = {
+            "query": query,
+            "local": parsed.constraints.model_dump(mode="json", exclude={"other_constraints"}),
+            "missing": parsed.missing,
+        }
+
+        if llm is not None:
+            reference = llm_constraints(llm, query)
+            if reference is not None:
+                compared += 1
+                row["llm"] = reference.model_dump(mode="json", exclude={"other_constraints"})
+                for name in FIELDS:
+                    # поле, которое ушло бы в LLM, не считается ошибкой парсера
+                    if name in parsed.missing or getattr(parsed.constraints, name) == getattr(reference, name):
+                        agree[name] += 1
+        rows.append(row)
+
+    n = len(queries) or 1
+    print(f"\n🤖 Вызовов LLM: {llm_calls}/{len(queries)} (сэкономлено {1 - llm_calls / n:.0%})")
+    summary = {"num_queries": len(queries), "llm_calls": llm_calls, "llm_calls_saved": 1 - llm_calls / n}
+
+    if compared:
+        accuracy = {name: agree[name] / compared for name in FIELDS}
+        print(f"\n{'поле':<26}{'совпадение с LLM':>18}")
+        for name, value in accuracy.items():
+            print(f"{name:<26}{value:>18.2%}")
+        summary["field_accuracy"] = accuracy
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**summary, "rows": rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
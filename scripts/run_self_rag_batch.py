@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Пакетный прогон Self-RAG по набору запросов (data/testing_data/rag_test_queries.json).
+
+Граф компилируется один раз, запросы выполняются конкурентно (--concurrency),
+результаты и время каждого запроса пишутся в JSONL по мере готовности.
+Повторный запуск с тем же --output пропускает уже успешно обработанные id —
+упавший прогон продолжается с места падения (упавшие запросы повторяются).
+
+Запуск (Weaviate с загруженными событиями и OPENAI_API_KEY должны быть доступны):
+    python scripts/run_self_rag_batch.py --concurrency 8
+    python scripts/run_self_rag_batch.py --output self_rag_batch.jsonl --limit 20
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vdb.rag.retriever import EventRetriever
+from src.vdb.rag.self_rag_graph import run_self_rag_batch
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def summarize(output_path: Path, queries: List[Dict]) -> Dict:
+    """Сводка по JSONL: последняя запись на id; hit — целевое событие попало в InputData.events."""
+    latest: Dict[str, Dict] = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[record["id"]] = record
+
+    targets = {str(row["id"]): _normalize(row.get("description", "")) for row in queries}
+    ok = [r for r in latest.values() if r.get("ok")]
+    seconds = sorted(r["seconds"] for r in ok)
+    hits = sum(
+        any(_normalize(e.get("description", "")) == targets.get(r["id"]) for e in r.get("events", []))
+        for r in ok
+    )
+    n = len(ok) or 1
+    return {
+        "processed": len(latest),
+        "ok": len(ok),
+        "errors": len(latest) - len(ok),
+        "hit_rate": hits / n,
+        "seconds_mean": statistics.mean(seconds) if seconds else 0.0,
+        "seconds_p50": seconds[len(seconds) // 2] if seconds else 0.0,
+        "seconds_p95": seconds[int(0.95 * (len(seconds) - 1))] if seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный прогон Self-RAG")
+    parser.add_argument("--queries", default=str(project_root / "data" / "testing_data" / "rag_test_queries.json"))
+    parser.add_argument("--output", default=str(project_root / "data" / "cache" / "self_rag_batch.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=None, help="Только первые N запросов")
+    parser.add_argument("--memory", action="store_true", help="Использовать семантическую память")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)[: args.limit]
+    print(f"📋 Запросов: {len(queries)}, параллельно: {args.concurrency}")
+
+    # тестовые события из прошлого — фильтр по датам не нужен
+    retriever = EventRetriever(upcoming_only=False)
+    run_self_rag_batch(
+        [row["query"] for row in queries],
+        concurrency=args.concurrency,
+        ids=[str(row["id"]) for row in queries],
+        output_path=args.output,
+        retriever=retriever,
+        use_memory=args.memory,
+    )
+
+    summary = summarize(Path(args.output), queries)
+    print(f"\n✅ Успешно: {summary['ok']}/{summary['processed']}, ошибок: {summary['errors']}")
+    print(f"🎯 Целевое событие в InputData: {summary['hit_rate']:.0%}")
+    print(
+        f"⏱️ Время на запрос: mean {summary['seconds_mean']:.1f}s, "
+        f"p50 {summary['seconds_p50']:.1f}s, p95 {summary['seconds_p95']:.1f}s"
+    )
+    print(f"📄 Результаты: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 """Парсер для событий из KudaGo API."""
 
 import json
-from typing import List, Optional, Dict, Any
+import re
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
-from datetime import datetime
-from src.models.event import Event
+from datetime import datetime, timezone
+from src.models.event import Event, GeoCoordinates
+from src.utils.cities import normalize_city
+from src.utils.maps import flush_venue_cache, geocode_venue
+from src.utils.event_dates import from_timestamp
+
+
+_KUDAGO_URL_CITY_RE = re.compile(r"kudago\.com/([a-z\-]+)/")
 
 
 def _format_date(timestamp: Optional[int]) -> Optional[str]:
@@ -97,35 +104,105 @@ def _extract_location(event_data: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def _extract_dates(event_data: Dict[str, Any]) -> Optional[str]:
+def _extract_coords(event_data: Dict[str, Any], city: Optional[str] = None) -> Optional[GeoCoordinates]:
     """
-    Извлекает даты проведения события.
+    Извлекает координаты места проведения.
+    
+    Берутся place.coords из KudaGo; если их нет — адрес места геокодируется
+    (один раз на место, кэш в data/cache/venues.json).
     
     Args:
         event_data: Данные события
+        city: Нормализованный город (уточняет адрес для геокодера)
         
     Returns:
-        Строка с датами
+        Координаты или None
     """
-    dates = event_data.get('dates', [])
+    place = event_data.get('place')
+    if not place or not isinstance(place, dict):
+        return None
+    
+    coords = place.get('coords') or {}
+    if coords.get('lat') is not None and coords.get('lon') is not None:
+        return GeoCoordinates(latitude=coords['lat'], longitude=coords['lon'])
     
-    if not dates:
+    point = geocode_venue(place.get('address') or place.get('title'), city)
+    if point is None:
         return None
+    lon, lat = point
+    return GeoCoordinates(latitude=lat, longitude=lon)
+
+
+def _extract_city(event_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Извлекает нормализованный город события.
+    
+    Args:
+        event_data: Данные события
+        
+    Returns:
+        Каноническое название города или None
+    """
+    # Код города KudaGo ("msk", "spb") в поле location
+    if event_data.get('location'):
+        return normalize_city(event_data['location'])
+    
+    place = event_data.get('place')
+    if place and isinstance(place, dict) and place.get('city'):
+        return normalize_city(place['city'])
     
-    # Берем первую валидную дату
-    for date_info in dates:
+    # Код города в URL: https://kudago.com/spb/event/...
+    url = event_data.get('site_url') or event_data.get('url') or ''
+    match = _KUDAGO_URL_CITY_RE.search(url)
+    if match:
+        return normalize_city(match.group(1))
+    
+    return None
+
+
+def _extract_dates(
+    event_data: Dict[str, Any],
+    now: Optional[datetime] = None,
+) -> Tuple[Optional[str], Optional[datetime], Optional[datetime]]:
+    """
+    Извлекает даты проведения события.
+    
+    Из всех сеансов берется ближайший предстоящий (еще не закончившийся),
+    а если все прошли — последний.
+    
+    Args:
+        event_data: Данные события
+        now: Текущий момент (по умолчанию — сейчас)
+        
+    Returns:
+        (строка с датами, start_ts, end_ts)
+    """
+    now = now or datetime.now(timezone.utc)
+    sessions = []
+    
+    for date_info in event_data.get('dates') or []:
         start = date_info.get('start')
         end = date_info.get('end')
         
         start_str = _format_date(start)
+        start_ts = from_timestamp(start)
+        if not start_str or not start_ts:
+            continue
+        
         end_str = _format_date(end)
+        end_ts = from_timestamp(end) if end_str else None
+        if end_ts is None or end_ts < start_ts:
+            end_ts, end_str = start_ts, None
         
-        if start_str:
-            if end_str and start_str != end_str:
-                return f"{start_str} - {end_str}"
-            return start_str
+        date_str = f"{start_str} - {end_str}" if end_str and start_str != end_str else start_str
+        sessions.append((start_ts, end_ts, date_str))
     
-    return None
+    if not sessions:
+        return None, None, None
+    
+    upcoming = [s for s in sessions if s[1] >= now]
+    start_ts, end_ts, date_str = min(upcoming) if upcoming else max(sessions)
+    return date_str, start_ts, end_ts
 
 
 def parse_kudago_json(json_path: str, owner: Optional[str] = None) -> List[Event]:
@@ -165,9 +242,11 @@ def parse_kudago_json(json_path: str, owner: Optional[str] = None) -> List[Event
             
             # Извлекаем местоположение
             location = _extract_location(event_data)
+            city = _extract_city(event_data)
+            coords = _extract_coords(event_data, city)
             
-            # Извлекаем даты
-            date = _extract_dates(event_data)
+            # Извлекаем даты (ближайший предстоящий сеанс)
+            date, start_ts, end_ts = _extract_dates(event_data)
             
             # Извлекаем URL
             url = event_data.get('site_url') or event_data.get('url')
@@ -184,8 +263,12 @@ def parse_kudago_json(json_path: str, owner: Optional[str] = None) -> List[Event
                 source='kudago',
                 country=country,
                 location=location,
+                city=city,
                 date=date,
+                start_ts=start_ts,
+                end_ts=end_ts,
                 url=url,
+                coords=coords,
             )
             events.append(event)
             
@@ -194,6 +277,7 @@ def parse_kudago_json(json_path: str, owner: Optional[str] = None) -> List[Event
             print(f"Ошибка при парсинге события {event_data.get('id', 'unknown')}: {e}")
             continue
     
+    flush_venue_cache()
     return events
 
 
@@ -0,0 +1,146 @@
+"""
+Реестр графов процесса: Self-RAG и PlanningGraph собираются один раз.
+
+Сборка графа — это StateGraph.compile(), bind_tools планировщика и критика
+и создание EventRetriever. Раньше всё это повторялось в каждом запросе;
+теперь запросы только вызывают готовые runnables, а warmup() при старте
+бота собирает графы и открывает соединение с Weaviate заранее.
+
+Время запросов пишется отдельно для «холодных» (граф собирался в этом
+запросе) и «тёплых» — latency_report() показывает разницу.
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.utils.journey_llm import JourneyLLM
+from src.planner_agent.graph import PlanningGraph
+from src.planner_agent.plan_cache import PlanCache
+from src.vdb.client import open_shared_clients
+from src.vdb.rag.local_retriever import LocalEventRetriever, create_event_retriever
+from src.vdb.rag.retriever import EventRetriever
+from src.vdb.rag.self_rag_graph import create_self_rag_graph
+
+
+class GraphRegistry:
+    """Готовые графы и общие зависимости (LLM, retriever, кэш планов) одного процесса."""
+
+    def __init__(
+        self,
+        llm: Optional[JourneyLLM] = None,
+        retriever: Optional[EventRetriever] = None,
+        plan_cache: Optional[PlanCache] = None,
+    ):
+        self._llm = llm
+        self._retriever = retriever
+        self._plan_cache = plan_cache
+        self._self_rag = None
+        self._planning: Optional[PlanningGraph] = None
+        self._lock = threading.RLock()
+        self.build_seconds: Dict[str, float] = {}
+        self.latencies: Dict[str, List[float]] = {"cold": [], "warm": []}
+
+    @property
+    def llm(self) -> JourneyLLM:
+        with self._lock:
+            if self._llm is None:
+                self._llm = JourneyLLM()
+            return self._llm
+
+    @property
+    def retriever(self) -> EventRetriever:
+        with self._lock:
+            if self._retriever is None:
+                self._retriever = create_event_retriever()
+            return self._retriever
+
+    @property
+    def plan_cache(self) -> PlanCache:
+        with self._lock:
+            if self._plan_cache is None:
+                self._plan_cache = PlanCache()
+            return self._plan_cache
+
+    @property
+    def is_warm(self) -> bool:
+        """Оба графа уже собраны."""
+        return self._self_rag is not None and self._planning is not None
+
+    def self_rag_graph(self):
+        """Скомпилированный граф Self-RAG (собирается при первом обращении)."""
+        if self._self_rag is None:
+            with self._lock:
+                if self._self_rag is None:
+                    started = time.perf_counter()
+                    self._self_rag, _ = create_self_rag_graph(llm=self.llm, retriever=self.retriever)
+                    self.build_seconds["self_rag"] = time.perf_counter() - started
+        return self._self_rag
+
+    def planning_graph(self) -> PlanningGraph:
+        """PlanningGraph с привязанными инструментами (собирается при первом обращении)."""
+        if self._planning is None:
+            with self._lock:
+                if self._planning is None:
+                    started = time.perf_counter()
+                    self._planning = PlanningGraph(self.llm, plan_cache=self.plan_cache)
+                    self.build_seconds["planning"] = time.perf_counter() - started
+        return self._planning
+
+    def warmup(self, connect: bool = True) -> Dict[str, float]:
+        """
+        Собрать графы заранее (при старте бота / API).
+
+        Args:
+            connect: Заодно открыть общее соединение с Weaviate (не нужно локальному индексу)
+
+        Returns:
+            Время сборки по графам, секунды
+        """
+        self.self_rag_graph()
+        self.planning_graph()
+        if connect and not isinstance(self.retriever, LocalEventRetriever):
+            started = time.perf_counter()
+            if open_shared_clients(self.retriever.weaviate_url):
+                self.build_seconds["weaviate"] = time.perf_counter() - started
+        print("🔥 Графы собраны: " + ", ".join(f"{k} {v * 1000:.0f} мс" for k, v in self.build_seconds.items()))
+        return dict(self.build_seconds)
+
+    def record(self, seconds: float, cold: bool) -> None:
+        """Записать время запроса (cold — графы собирались в этом запросе)."""
+        kind = "cold" if cold else "warm"
+        self.latencies[kind].append(seconds)
+        print(f"⏱️ Запрос ({kind}): {seconds:.2f} с")
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """Сводка времени холодных и тёплых запросов: count, avg, p50, max (секунды)."""
+        report = {}
+        for kind, values in self.latencies.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            report[kind] = {
+                "count": len(ordered),
+                "avg": sum(ordered) / len(ordered),
+                "p50": ordered[(len(ordered) - 1) // 2],
+                "max": ordered[-1],
+            }
+        return report
+
+
+_registry: Optional[GraphRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_graph_registry() -> GraphRegistry:
+    """Общий реестр графов процесса."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = GraphRegistry()
+    return _registry
+
+
+def warmup_graphs(connect: bool = True) -> Dict[str, float]:
+    """Собрать графы общего реестра заранее (вызывается при старте бота)."""
+    return get_graph_registry().warmup(connect=connect)
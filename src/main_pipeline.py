@@ -1,23 +1,49 @@
-from src.utils.journey_llm import JourneyLLM
-from src.vdb import EventRetriever
-from src.planner_agent.graph import PlanningGraph
+import asyncio
+import time
+
+from src.graph_registry import get_graph_registry
 from src.vdb.rag.self_rag_graph import run_self_rag
 from src.utils.safety import moderate_text, SafetyLabel
 
 
-llm = JourneyLLM()
-retriever = EventRetriever()
+# Графы собираются один раз на процесс (warmup_graphs() при старте бота);
+# запрос только вызывает готовые runnables
+registry = get_graph_registry()
 
 
 def main_pipeline(query: str) -> str:
-    res = run_self_rag(query, retriever=retriever, llm=llm)
-    graph = PlanningGraph(llm)
+    started, cold = time.perf_counter(), not registry.is_warm
+    llm = registry.llm
+    res = run_self_rag(query, graph=registry.self_rag_graph())
+    graph = registry.planning_graph()
 
     output = graph.run(res)
     final_text = output.final_text
 
     # ✅ Final toxic OUTPUT safety net
     decision = moderate_text(final_text, llm=llm, context="model_output")
+    registry.record(time.perf_counter() - started, cold=cold)
+    return _apply_output_moderation(final_text, decision)
+
+
+async def amain_pipeline(query: str) -> str:
+    """Асинхронная версия main_pipeline: не блокирует event loop бота."""
+    started, cold = time.perf_counter(), not registry.is_warm
+    llm = registry.llm
+    # Self-RAG пока синхронный (клиент Weaviate) — выносим в поток
+    res = await asyncio.to_thread(run_self_rag, query, graph=registry.self_rag_graph())
+    graph = registry.planning_graph()
+
+    output = await graph.arun(res)
+    final_text = output.final_text
+
+    # ✅ Final toxic OUTPUT safety net
+    decision = await asyncio.to_thread(moderate_text, final_text, llm=llm, context="model_output")
+    registry.record(time.perf_counter() - started, cold=cold)
+    return _apply_output_moderation(final_text, decision)
+
+
+def _apply_output_moderation(final_text: str, decision) -> str:
     if decision.label == SafetyLabel.block:
         return "Не удалось сформировать безопасный ответ. Попробуй переформулировать запрос (город, даты, интересы, бюджет)."
     if decision.label == SafetyLabel.soft and decision.sanitized_text:
@@ -1,7 +1,22 @@
 """Модель данных для событий."""
 
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Метаданные поиска, которые ретривер добавляет к событию (зависят от запроса, а не от события)
+SEARCH_METADATA_FIELDS = {"distance", "score"}
+
+
+class GeoCoordinates(BaseModel):
+    """Координаты места проведения (GEO_COORDINATES в Weaviate)."""
+
+    # принимает и weaviate GeoCoordinate при чтении из коллекции
+    model_config = ConfigDict(from_attributes=True)
+
+    latitude: float = Field(description="Широта")
+    longitude: float = Field(description="Долгота")
 
 
 class Event(BaseModel):
@@ -14,8 +29,19 @@ class Event(BaseModel):
     source: Optional[str] = Field(default=None, description="Источник события")
     country: Optional[str] = Field(default=None, description="Страна события")
     location: Optional[str] = Field(default=None, description="Местоположение события")
+    city: Optional[str] = Field(default=None, description="Нормализованный город (для фильтрации в Weaviate)")
     date: Optional[str] = Field(default=None, description="Дата события")
+    start_ts: Optional[datetime] = Field(default=None, description="Начало события (DATE в Weaviate, для фильтра по датам)")
+    end_ts: Optional[datetime] = Field(default=None, description="Окончание события (DATE в Weaviate, для фильтра по датам)")
     url: Optional[str] = Field(default=None, description="URL события")
+    coords: Optional[GeoCoordinates] = Field(default=None, description="Координаты места (для поиска в радиусе)")
+
+    @property
+    def geopoint(self) -> Optional[Tuple[float, float]]:
+        """Координаты в формате src.utils.maps.GeoPoint: (lon, lat)."""
+        if self.coords is None:
+            return None
+        return self.coords.longitude, self.coords.latitude
 
     class Config:
         """Конфигурация модели."""
@@ -6,10 +6,16 @@ from .models import (
     Constraints,
     InputData,
     OutputResult,
-    GraphState
+    GraphState,
+    PlanViolation,
+    Schedule,
+    ScheduledStop,
 )
 from .graph import PlanningGraph
 from .agents import PlannerAgent, CriticAgent
+from .scheduler import RouteSolver
+from .validator import PlanValidator
+from .plan_cache import PlanCache
 
 __all__ = [
     "Event",
@@ -17,8 +23,14 @@ __all__ = [
     "InputData",
     "OutputResult",
     "GraphState",
+    "PlanViolation",
+    "Schedule",
+    "ScheduledStop",
     "PlanningGraph",
     "PlannerAgent",
-    "CriticAgent"
+    "CriticAgent",
+    "RouteSolver",
+    "PlanValidator",
+    "PlanCache",
 ]
 
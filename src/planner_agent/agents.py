@@ -1,22 +1,37 @@
 """
 Агенты для системы планирования: планировщик и критик.
 
-Фикс:
-- JourneyLLM.parse() не принимает keyword argument 'tools'
-- но инструменты можно использовать через llm.llm.bind_tools(...)
-- поэтому на время parse подменяем self.llm.llm на self.llm_with_tools
+Инструменты:
+- модель с bind_tools(...) вызывается в цикле, пока просит инструменты;
+  схема ответа (Reasoning/Plan/Critique) привязана как ещё один инструмент,
+  поэтому финальный ответ приходит тем же вызовом, что и решение «инструменты не нужны»;
+- все tool_calls одного хода выполняются параллельно (ToolExecutor),
+  одинаковые вызовы в рамках запроса — один раз (кэш в GraphState.tool_cache);
+- структурированный parse по всей истории — только запасной путь (модель ответила
+  текстом, ответ не прошёл валидацию или закончились раунды инструментов).
 """
 
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
-from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.utils.journey_llm import JourneyLLM
-from src.planner_agent.models import GraphState, Reasoning, Plan, Critique, InputData
+from src.planner_agent.models import (
+    GraphState, Reasoning, Plan, PlanItem, Critique, InputData, PlanViolation, Schedule, ScheduleNarration
+)
 from src.planner_agent.tools import get_all_tools
+from src.planner_agent.tool_executor import ToolExecutor
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import ValidationError
+
+
+T = TypeVar("T")
+
+# Сколько раз подряд модель может запросить инструменты перед финальным ответом
+MAX_TOOL_ROUNDS = 3
 
 
 # ---------------- Helpers ----------------
@@ -59,19 +74,145 @@ def _fmt_event_line(e: Any) -> str:
     return " — ".join(parts)
 
 
+def _iter_matrix_routes(maps_info: Dict[str, Any], events: List[Any]) -> Iterator[Tuple[str, Dict[str, Dict[str, float]]]]:
+    """
+    Разворачивает матрицу маршрутов из maps_info в пары событий.
+
+    Возвращает (ключ маршрута "A → B", {mode: {"duration_min", "distance_km"}})
+    только для пар, у которых известны координаты обоих адресов.
+    """
+    if not maps_info.get("success"):
+        return
+    durations = maps_info.get("durations_min") or {}
+    distances = maps_info.get("distances_km") or {}
+
+    n = len(events)
+    for i in range(n):
+        for j in range(i + 1, n):
+            modes: Dict[str, Dict[str, float]] = {}
+            for mode, matrix in durations.items():
+                duration = matrix[i][j]
+                if duration is None:
+                    continue
+                distance = distances[mode][i][j] if mode in distances else None
+                modes[mode] = {"duration_min": duration, "distance_km": distance or 0}
+            if modes:
+                route_key = f"{getattr(events[i], 'title', i)} → {getattr(events[j], 'title', j)}"
+                yield route_key, modes
+
+
+def _fmt_maps_info(maps_info: Dict[str, Any], events: List[Any]) -> str:
+    """Компактная текстовая версия матрицы маршрутов (самый быстрый транспорт на пару)."""
+    lines = []
+    for route_key, modes in _iter_matrix_routes(maps_info, events):
+        mode, info = min(modes.items(), key=lambda x: x[1]["duration_min"])
+        lines.append(f"- {route_key}: {mode}, {info['duration_min']:.0f} мин ({info['distance_km']:.2f} км)")
+    return "\n".join(lines)
+
 
-@contextmanager
-def _temp_bound_tools(journey_llm: JourneyLLM, bound_llm: Any):
+def _bind_with_answer(llm: JourneyLLM, tools: List[Any], output_models: List[type]) -> Dict[type, Any]:
     """
-    Подменяем journey_llm.llm на версию с bind_tools.
-    Это позволяет пользоваться инструментами без передачи tools= в parse().
+    Для каждой схемы ответа — модель с инструментами и этой схемой как инструментом.
+
+    tool_choice="any": модель обязана вызвать инструмент — либо настоящий,
+    либо схему ответа, так что отдельный вызов для финального ответа не нужен.
+    """
+    return {
+        model: llm.llm.bind_tools([*tools, model], tool_choice="any")
+        for model in output_models
+    }
+
+
+def _answer_from(ai_message: Any, output_model: Type[T]) -> Tuple[bool, Optional[T]]:
     """
-    old = journey_llm.llm
-    journey_llm.llm = bound_llm
-    try:
-        yield
-    finally:
-        journey_llm.llm = old
+    Ищет в ответе модели вызов схемы ответа.
+
+    Returns:
+        (вызван ли инструмент-ответ, распарсенный ответ или None, если аргументы невалидны)
+    """
+    for call in getattr(ai_message, "tool_calls", None) or []:
+        if call.get("name") != output_model.__name__:
+            continue
+        try:
+            return True, output_model.model_validate(call.get("args") or {})
+        except ValidationError:
+            return True, None
+    return False, None
+
+
+def _parse_with_tools(
+    llm: JourneyLLM,
+    llm_with_tools: Any,
+    executor: ToolExecutor,
+    output_model: Type[T],
+    user_prompt: str,
+    system_prompt: str,
+    state: Any,
+) -> T:
+    """
+    Цикл вызова инструментов + структурированный ответ.
+
+    llm_with_tools — модель из _bind_with_answer: вызывается до MAX_TOOL_ROUNDS раз;
+    запрошенные инструменты выполняются параллельно, результаты добавляются в историю.
+    Как только модель вызывает схему ответа, её аргументы и есть результат.
+    Если этого не случилось — parse в output_model по всей истории (ещё один вызов).
+    """
+    messages: List[BaseMessage] = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt),
+    ]
+
+    cache = _sget(state, "tool_cache")
+    if cache is None:
+        cache = {}
+
+    for _ in range(MAX_TOOL_ROUNDS):
+        ai_message = llm_with_tools.invoke(messages)
+        answered, answer = _answer_from(ai_message, output_model)
+        if answer is not None:
+            return answer
+        tool_calls = getattr(ai_message, "tool_calls", None) or []
+        if answered or not tool_calls:
+            break
+        messages.append(ai_message)
+        messages.extend(executor.run(tool_calls, cache=cache))
+
+    print(f"⚠️  {output_model.__name__} не пришёл вызовом инструмента — отдельный parse")
+    return llm.parse_messages(output_model, messages)
+
+
+async def _aparse_with_tools(
+    llm: JourneyLLM,
+    llm_with_tools: Any,
+    executor: ToolExecutor,
+    output_model: Type[T],
+    user_prompt: str,
+    system_prompt: str,
+    state: Any,
+) -> T:
+    """Асинхронная версия _parse_with_tools (инструменты — через ainvoke)."""
+    messages: List[BaseMessage] = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt),
+    ]
+
+    cache = _sget(state, "tool_cache")
+    if cache is None:
+        cache = {}
+
+    for _ in range(MAX_TOOL_ROUNDS):
+        ai_message = await llm_with_tools.ainvoke(messages)
+        answered, answer = _answer_from(ai_message, output_model)
+        if answer is not None:
+            return answer
+        tool_calls = getattr(ai_message, "tool_calls", None) or []
+        if answered or not tool_calls:
+            break
+        messages.append(ai_message)
+        messages.extend(await executor.arun(tool_calls, cache=cache))
+
+    print(f"⚠️  {output_model.__name__} не пришёл вызовом инструмента — отдельный parse")
+    return await llm.aparse_messages(output_model, messages)
 
 
 # ---------------- Planner ----------------
@@ -79,13 +220,44 @@ def _temp_bound_tools(journey_llm: JourneyLLM, bound_llm: Any):
 class PlannerAgent:
     """Агент планировщик."""
 
-    def __init__(self, llm: JourneyLLM):
+    def __init__(self, llm: JourneyLLM, tool_executor: Optional[ToolExecutor] = None):
         self.llm = llm
         self.tools = get_all_tools()
-        self.llm_with_tools = llm.llm.bind_tools(self.tools)
+        self.llm_with_tools = _bind_with_answer(llm, self.tools, [Reasoning, Plan])
+        self.tool_executor = tool_executor or ToolExecutor(self.tools)
 
     def create_reasoning(self, state: GraphState) -> Reasoning:
         """Создать рассуждения перед планированием."""
+        system_prompt, user_prompt = self._reasoning_prompts(state)
+        reasoning = _parse_with_tools(
+            self.llm,
+            self.llm_with_tools[Reasoning],
+            self.tool_executor,
+            Reasoning,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        self._log_reasoning(reasoning)
+        return reasoning
+
+    async def acreate_reasoning(self, state: GraphState) -> Reasoning:
+        """Асинхронная версия create_reasoning."""
+        system_prompt, user_prompt = self._reasoning_prompts(state)
+        reasoning = await _aparse_with_tools(
+            self.llm,
+            self.llm_with_tools[Reasoning],
+            self.tool_executor,
+            Reasoning,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        self._log_reasoning(reasoning)
+        return reasoning
+
+    def _reasoning_prompts(self, state: GraphState) -> Tuple[str, str]:
+        """Системный и пользовательский промпты для рассуждений."""
         print("\n" + "=" * 60)
         print("🤔 ПЛАНИРОВЩИК: Начинаю анализ и рассуждения...")
         print("=" * 60)
@@ -137,14 +309,10 @@ class PlannerAgent:
         print("Отправляю запрос к LLM для анализа...")
         print("💡 LLM может использовать инструменты для получения дополнительной информации")
 
-        # ВАЖНО: tools= НЕ передаём, потому что JourneyLLM.parse не поддерживает
-        with _temp_bound_tools(self.llm, self.llm_with_tools):
-            reasoning = self.llm.parse(
-                Reasoning,
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-            )
+        return system_prompt, user_prompt
 
+    @staticmethod
+    def _log_reasoning(reasoning: Reasoning) -> None:
         print("✅ Рассуждения получены:")
         print(f"   - Соображений: {len(reasoning.considerations)}")
         print(f"   - Проблем выявлено: {len(reasoning.challenges)}")
@@ -154,10 +322,38 @@ class PlannerAgent:
             else f"   - Стратегия: {reasoning.strategy}"
         )
 
-        return reasoning
-
     def create_plan(self, state: GraphState) -> Plan:
         """Создать план на основе событий и ограничений."""
+        system_prompt, user_prompt = self._plan_prompts(state)
+        plan = _parse_with_tools(
+            self.llm,
+            self.llm_with_tools[Plan],
+            self.tool_executor,
+            Plan,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        self._log_plan(plan)
+        return plan
+
+    async def acreate_plan(self, state: GraphState) -> Plan:
+        """Асинхронная версия create_plan."""
+        system_prompt, user_prompt = self._plan_prompts(state)
+        plan = await _aparse_with_tools(
+            self.llm,
+            self.llm_with_tools[Plan],
+            self.tool_executor,
+            Plan,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        self._log_plan(plan)
+        return plan
+
+    def _plan_prompts(self, state: GraphState) -> Tuple[str, str]:
+        """Системный и пользовательский промпты для создания плана."""
         print("\n" + "=" * 60)
         print("📋 ПЛАНИРОВЩИК: Создаю план похода...")
         print("=" * 60)
@@ -226,10 +422,7 @@ class PlannerAgent:
             maps_info_str = "\n📍 ВАЖНО: Информация о времени в пути между событиями:\n"
             maps_info_str += "СРАВНИВАЙ время для разных видов транспорта и выбирай оптимальный!\n"
             maps_info_str += "Рекомендация: если walking > 10 минут, используй bus или car (выбирай самый быстрый).\n\n"
-            for route_key, route_data in maps_info.items():
-                if not isinstance(route_data, dict) or not route_data.get("success"):
-                    continue
-                modes = route_data.get("modes", {}) or {}
+            for route_key, modes in _iter_matrix_routes(maps_info, events):
                 maps_info_str += f"Маршрут: {route_key}\n"
 
                 sorted_modes = sorted(
@@ -331,14 +524,10 @@ class PlannerAgent:
         print("Отправляю запрос к LLM для создания плана...")
         print("💡 LLM может использовать инструменты для получения информации о маршрутах и погоде")
 
-        # ВАЖНО: tools= НЕ передаём
-        with _temp_bound_tools(self.llm, self.llm_with_tools):
-            plan = self.llm.parse(
-                Plan,
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-            )
+        return system_prompt, user_prompt
 
+    @staticmethod
+    def _log_plan(plan: Plan) -> None:
         print("✅ План создан:")
         print(f"   - Событий в плане: {len(plan.items)}")
         print(f"   - Общая продолжительность: {plan.total_duration_minutes} минут")
@@ -347,10 +536,109 @@ class PlannerAgent:
         if plan.excluded_events:
             print(f"   - Исключено событий: {len(plan.excluded_events)}")
 
+    def narrate_schedule(self, state: GraphState) -> Plan:
+        """
+        Превратить расписание от оптимизатора в Plan.
+
+        Порядок, время и транспорт берутся из Schedule как есть —
+        LLM пишет только краткое описание и заметки к остановкам.
+        """
+        system_prompt, user_prompt = self._narration_prompts(state)
+        narration = self.llm.parse(
+            ScheduleNarration,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+        )
+        return self._plan_from_narration(state, narration)
+
+    async def anarrate_schedule(self, state: GraphState) -> Plan:
+        """Асинхронная версия narrate_schedule."""
+        system_prompt, user_prompt = self._narration_prompts(state)
+        narration = await self.llm.aparse(
+            ScheduleNarration,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+        )
+        return self._plan_from_narration(state, narration)
+
+    def _narration_prompts(self, state: GraphState) -> Tuple[str, str]:
+        """Системный и пользовательский промпты для описания расписания."""
+        print("\n" + "=" * 60)
+        print("📋 ПЛАНИРОВЩИК: Описываю готовое расписание...")
+        print("=" * 60)
+
+        input_data = _ensure_input_data(_sget(state, "input_data"))
+        schedule: Schedule = _sget(state, "schedule")
+
+        stops_str = "\n".join(
+            f"{i}. {s.start_time.strftime('%H:%M')}–{s.end_time.strftime('%H:%M')} {s.event_name} ({s.event_address})"
+            + (f", добираться: {s.transport_mode}, {s.travel_time_minutes} мин" if s.travel_time_minutes else "")
+            for i, s in enumerate(schedule.stops, 1)
+        )
+
+        system_prompt = """Ты помощник, который описывает уже готовый маршрут.
+Порядок, время и транспорт менять НЕЛЬЗЯ — они рассчитаны заранее.
+Напиши краткое описание плана и по одной короткой полезной заметке к каждой остановке."""
+
+        user_prompt = f"""Промпт пользователя: {input_data.user_prompt}
+
+Готовое расписание{f" на {schedule.day}" if schedule.day else ""}:
+{stops_str}
+
+Не поместились: {', '.join(schedule.excluded_events) or 'нет'}"""
+
+        print("Отправляю запрос к LLM для описания расписания...")
+
+        return system_prompt, user_prompt
+
+    @staticmethod
+    def _plan_from_narration(state: GraphState, narration: ScheduleNarration) -> Plan:
+        """Собрать Plan из расписания и текста от LLM."""
+        schedule: Schedule = _sget(state, "schedule")
+
+        items = []
+        for i, stop in enumerate(schedule.stops):
+            items.append(
+                PlanItem(
+                    event_name=stop.event_name,
+                    event_address=stop.event_address,
+                    start_time=stop.start_time,
+                    end_time=stop.end_time,
+                    duration_minutes=stop.duration_minutes,
+                    transport_mode=stop.transport_mode,
+                    travel_time_minutes=stop.travel_time_minutes,
+                    notes=narration.notes[i] if i < len(narration.notes) else "",
+                )
+            )
+
+        plan = Plan(
+            items=items,
+            total_duration_minutes=schedule.total_duration_minutes,
+            total_travel_time_minutes=schedule.total_travel_time_minutes,
+            summary=narration.summary,
+            included_events=[s.event_name for s in schedule.stops],
+            excluded_events=schedule.excluded_events,
+        )
+
+        print("✅ План собран из расписания:")
+        print(f"   - Событий в плане: {len(plan.items)}")
+        print(f"   - Общая продолжительность: {plan.total_duration_minutes} минут")
+        print(f"   - Время в пути: {plan.total_travel_time_minutes} минут")
+
         return plan
 
     def revise_plan(self, state: GraphState):
         """Пересмотреть план на основе критики."""
+        self._log_revision(state)
+        return self.create_plan(state)
+
+    async def arevise_plan(self, state: GraphState):
+        """Асинхронная версия revise_plan."""
+        self._log_revision(state)
+        return await self.acreate_plan(state)
+
+    @staticmethod
+    def _log_revision(state: GraphState) -> None:
         print("\n" + "=" * 60)
         print("🔄 ПЛАНИРОВЩИК: Пересматриваю план на основе критики...")
         print("=" * 60)
@@ -359,7 +647,6 @@ class PlannerAgent:
         if critique:
             print(f"Учитываю критику: {len(critique.suggestions)} предложений, {len(critique.critical_issues)} критических проблем")
 
-        return self.create_plan(state)
     def render_telegram_message(self, state: GraphState) -> str:
         """Красивый форматированный текст маршрута для Telegram."""
         plan = _sget(state, "final_plan") or _sget(state, "plan")
@@ -477,13 +764,52 @@ class PlannerAgent:
 class CriticAgent:
     """Агент критик."""
 
-    def __init__(self, llm: JourneyLLM):
+    def __init__(self, llm: JourneyLLM, tool_executor: Optional[ToolExecutor] = None):
         self.llm = llm
         self.tools = get_all_tools()
-        self.llm_with_tools = llm.llm.bind_tools(self.tools)
+        self.llm_with_tools = _bind_with_answer(llm, self.tools, [Critique])
+        self.tool_executor = tool_executor or ToolExecutor(self.tools)
 
     def critique_plan(self, state: GraphState) -> Critique:
         """Проанализировать план и дать критику."""
+        system_prompt, user_prompt = self._critique_prompts(state)
+        critique = _parse_with_tools(
+            self.llm,
+            self.llm_with_tools[Critique],
+            self.tool_executor,
+            Critique,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        critique = self._with_violations(critique, _sget(state, "violations"))
+        self._log_critique(critique)
+        return critique
+
+    async def acritique_plan(self, state: GraphState) -> Critique:
+        """Асинхронная версия critique_plan."""
+        system_prompt, user_prompt = self._critique_prompts(state)
+        critique = await _aparse_with_tools(
+            self.llm,
+            self.llm_with_tools[Critique],
+            self.tool_executor,
+            Critique,
+            user_prompt=user_prompt,
+            system_prompt=system_prompt,
+            state=state,
+        )
+        critique = self._with_violations(critique, _sget(state, "violations"))
+        self._log_critique(critique)
+        return critique
+
+    def _critique_prompts(self, state: GraphState) -> Tuple[str, str]:
+        """
+        Системный и пользовательский промпты для критики.
+
+        Критик разбирает только нарушения PlanValidator: в графе он вызывается лишь
+        при их наличии (PlanningGraph._needs_critique), поэтому свободной оценки
+        качества плана без нарушений больше нет.
+        """
         print("\n" + "=" * 60)
         print("🔍 КРИТИК: Анализирую план...")
         print("=" * 60)
@@ -491,10 +817,11 @@ class CriticAgent:
         plan: Optional[Plan] = _sget(state, "final_plan") or _sget(state, "plan")
         if not plan:
             raise ValueError("Нет плана для критики")
+        violations: Optional[List[PlanViolation]] = _sget(state, "violations")
+        if not violations:
+            raise ValueError("Нет нарушений для критики: сначала нужна проверка PlanValidator")
 
-        input_data = _ensure_input_data(_sget(state, "input_data"))
-        events = input_data.events or []
-        constraints = input_data.constraints
+        constraints = _ensure_input_data(_sget(state, "input_data")).constraints
 
         print(f"Анализирую план с {len(plan.items)} событиями")
         print(f"Общая продолжительность: {plan.total_duration_minutes} минут")
@@ -519,8 +846,6 @@ class CriticAgent:
   Заметки: {item.notes}
 """.rstrip()
 
-        events_str = "\n".join([_fmt_event_line(e) for e in events])
-
         constraints_str = f"""
 Ограничения:
 - Время начала: {constraints.start_time or 'не указано'}
@@ -531,60 +856,42 @@ class CriticAgent:
 - Другие ограничения: {', '.join(constraints.other_constraints) or 'нет'}
 """.strip()
 
-        weather_info = _sget(state, "weather_info")
-        maps_info = _sget(state, "maps_info")
+        return self._violations_prompts(plan_str, constraints_str, violations)
 
-        weather_info_str = f"\nИнформация о погоде: {weather_info}\n" if weather_info else ""
-        maps_info_str = f"\nИнформация о маршрутах: {maps_info}\n" if maps_info else ""
+    @staticmethod
+    def _violations_prompts(plan_str: str, constraints_str: str, violations: List[PlanViolation]) -> Tuple[str, str]:
+        """Короткий промпт: критику отправляются только нарушения, найденные валидатором."""
+        violations_str = "\n".join(f"- [{v.code}] {v.message}" for v in violations)
 
         system_prompt = """Ты опытный критик планов маршрутов и походов.
-Твоя задача - тщательно проанализировать предложенный план, выявить его сильные и слабые стороны,
-найти возможные проблемы и предложить конкретные улучшения.
-
-Будь конструктивным, но честным. Укажи как на сильные стороны, так и на проблемы.
-Если нужно проверить информацию (например, погоду или маршруты), используй доступные инструменты."""
-
-        user_prompt = f"""Проанализируй следующий план похода:
-
-{plan_str}
+Автоматическая проверка уже нашла в плане конкретные нарушения.
+Твоя задача - для каждого нарушения объяснить, как его исправить, не ломая остальной план."""
 
-Исходные события:
-{events_str}
+        user_prompt = f"""{plan_str}
 
 {constraints_str}
 
-{weather_info_str}
+Нарушения, найденные при проверке:
+{violations_str}
 
-{maps_info_str}
+Перечисли эти нарушения в critical_issues и дай по каждому конкретное предложение по исправлению."""
 
-Промпт пользователя: {input_data.user_prompt}
+        print(f"Отправляю LLM только нарушения валидатора: {len(violations)}")
+        return system_prompt, user_prompt
 
-Оцени план по следующим критериям:
-1. Соответствие ограничениям (время, транспорт, бюджет)
-2. Реалистичность временных интервалов
-3. Логичность последовательности событий
-4. Учет всех обязательных событий
-5. Оптимальность использования времени
-6. Учет погодных условий и других факторов
-
-Дай конструктивную критику с конкретными предложениями по улучшению."""
-
-        print("Отправляю запрос к LLM для анализа плана...")
-        print("💡 LLM может использовать инструменты для проверки информации")
-
-        # ВАЖНО: tools= НЕ передаём
-        with _temp_bound_tools(self.llm, self.llm_with_tools):
-            critique = self.llm.parse(
-                Critique,
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-            )
+    @staticmethod
+    def _with_violations(critique: Critique, violations: Optional[List[PlanViolation]]) -> Critique:
+        """Нарушения валидатора — всегда критические и всегда требуют пересмотра."""
+        if not violations:
+            return critique
+        issues = critique.critical_issues or [v.message for v in violations]
+        return critique.model_copy(update={"critical_issues": issues, "needs_revision": True})
 
+    @staticmethod
+    def _log_critique(critique: Critique) -> None:
         print("✅ Критика получена:")
         print(f"   - Сильных сторон: {len(critique.strengths)}")
         print(f"   - Слабых сторон: {len(critique.weaknesses)}")
         print(f"   - Предложений: {len(critique.suggestions)}")
         print(f"   - Критических проблем: {len(critique.critical_issues)}")
         print(f"   - Требуется пересмотр: {'Да' if critique.needs_revision else 'Нет'}")
-
-        return critique
@@ -6,38 +6,78 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from typing import Literal
+from typing import Literal, Optional
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from src.utils.journey_llm import JourneyLLM
 from src.planner_agent.models import GraphState, OutputResult
 from src.planner_agent.agents import PlannerAgent, CriticAgent
+from src.planner_agent.scheduler import RouteSolver
+from src.planner_agent.validator import PlanValidator
+from src.planner_agent.plan_cache import PlanCache
+from src.planner_agent.tools import get_all_tools, get_route_matrix, aget_route_matrix
+from src.planner_agent.tool_executor import ToolExecutor
 
 
 class PlanningGraph:
     """Граф планирования с агентами планировщиком и критиком."""
     
-    def __init__(self, llm: JourneyLLM):
+    def __init__(self, llm: JourneyLLM, plan_cache: Optional[PlanCache] = None):
         self.llm = llm or JourneyLLM()
-        self.planner = PlannerAgent(self.llm)
-        self.critic = CriticAgent(self.llm)
+        self.plan_cache = plan_cache
+        self.tool_executor = ToolExecutor(get_all_tools())
+        self.planner = PlannerAgent(self.llm, tool_executor=self.tool_executor)
+        self.critic = CriticAgent(self.llm, tool_executor=self.tool_executor)
+        self.solver = RouteSolver()
+        self.validator = PlanValidator()
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
         """Построить граф."""
         workflow = StateGraph(GraphState)
         
-        # Добавляем узлы
-        workflow.add_node("planner_reasoning", self._planner_reasoning_node)
-        workflow.add_node("planner_create", self._planner_create_node)
-        workflow.add_node("critic", self._critic_node)
-        workflow.add_node("planner_revise", self._planner_revise_node)
+        # Добавляем узлы: у узлов с LLM/HTTP есть синхронная (run) и асинхронная (arun) версии
+        workflow.add_node("route_matrix", RunnableLambda(self._route_matrix_node, afunc=self._aroute_matrix_node))
+        workflow.add_node("schedule", self._schedule_node)
+        workflow.add_node("planner_reasoning", RunnableLambda(self._planner_reasoning_node, afunc=self._aplanner_reasoning_node))
+        workflow.add_node("planner_create", RunnableLambda(self._planner_create_node, afunc=self._aplanner_create_node))
+        workflow.add_node("validate", self._validate_node)
+        workflow.add_node("critic", RunnableLambda(self._critic_node, afunc=self._acritic_node))
+        workflow.add_node("planner_revise", RunnableLambda(self._planner_revise_node, afunc=self._aplanner_revise_node))
         
         # Определяем входную точку
-        workflow.set_entry_point("planner_reasoning")
+        workflow.set_entry_point("route_matrix")
         
         # Добавляем переходы
+        workflow.add_edge("route_matrix", "schedule")
+        # Если оптимизатор построил расписание — LLM только описывает его,
+        # рассуждения не нужны; проверка — только если часть переходов оценочная
+        workflow.add_conditional_edges(
+            "schedule",
+            self._has_schedule,
+            {
+                "scheduled": "planner_create",
+                "llm": "planner_reasoning"
+            }
+        )
         workflow.add_edge("planner_reasoning", "planner_create")
-        workflow.add_edge("planner_create", "critic")
+        workflow.add_conditional_edges(
+            "planner_create",
+            self._needs_validation,
+            {
+                "validate": "validate",
+                "finish": END
+            }
+        )
+        # Механические ошибки проверяются без LLM; критик вызывается только при нарушениях
+        workflow.add_conditional_edges(
+            "validate",
+            self._needs_critique,
+            {
+                "critic": "critic",
+                "finish": END
+            }
+        )
         workflow.add_conditional_edges(
             "critic",
             self._should_revise,
@@ -46,10 +86,111 @@ class PlanningGraph:
                 "finish": END
             }
         )
-        workflow.add_edge("planner_revise", "critic")
+        workflow.add_edge("planner_revise", "validate")
         
         return workflow.compile()
     
+    def _route_matrix_node(self, state) -> GraphState:
+        """Узел расчёта матрицы времени в пути между всеми событиями."""
+        print("\n" + "▶"*30)
+        print("УЗЕЛ: route_matrix")
+        print("▶"*30)
+        if isinstance(state, dict):
+            state = GraphState(**state)
+
+        events = state.input_data.events or []
+        if len(events) < 2 or state.maps_info:
+            return state
+
+        matrix = get_route_matrix([e.location for e in events], points=[e.geopoint for e in events])
+        return self._with_route_matrix(state, matrix)
+
+    async def _aroute_matrix_node(self, state) -> GraphState:
+        """Асинхронный узел расчёта матрицы маршрутов (адреса геокодируются параллельно)."""
+        state = self._enter("route_matrix", state)
+
+        events = state.input_data.events or []
+        if len(events) < 2 or state.maps_info:
+            return state
+
+        matrix = await aget_route_matrix([e.location for e in events], points=[e.geopoint for e in events])
+        return self._with_route_matrix(state, matrix)
+
+    @staticmethod
+    def _with_route_matrix(state: GraphState, matrix) -> GraphState:
+        if not matrix.get("success"):
+            print(f"⚠️  Не удалось посчитать матрицу маршрутов: {matrix.get('error')}")
+            return state
+
+        n = len(state.input_data.events)
+        found = sum(1 for p in matrix["points"] if p is not None)
+        print(f"✅ Матрица маршрутов: {n}×{n}, геокодировано адресов: {found}/{n}")
+        return state.model_copy(update={"maps_info": matrix})
+
+    @staticmethod
+    def _enter(node: str, state) -> GraphState:
+        """Печатает заголовок узла и приводит состояние к GraphState."""
+        print("\n" + "▶"*30)
+        print(f"УЗЕЛ: {node}")
+        print("▶"*30)
+        if isinstance(state, dict):
+            state = GraphState(**state)
+        return state
+
+    def _schedule_node(self, state) -> GraphState:
+        """Узел детерминированной оптимизации маршрута."""
+        print("\n" + "▶"*30)
+        print("УЗЕЛ: schedule")
+        print("▶"*30)
+        if isinstance(state, dict):
+            state = GraphState(**state)
+
+        maps_info = state.maps_info or {}
+        travel_matrix = maps_info.get("durations_min")
+        if not travel_matrix or not state.input_data.events:
+            print("ℹ️  Нет матрицы времени в пути — план строит LLM")
+            return state
+
+        # геокодер мог не найти адреса: матрица «успешна», но из одних None —
+        # оптимизатор считал бы каждый переход по unknown_travel_minutes
+        geocoded = sum(1 for p in maps_info.get("points") or [] if p is not None)
+        if geocoded < 2:
+            print(f"ℹ️  Геокодировано адресов: {geocoded} — маршрут не посчитать, план строит LLM")
+            return state
+
+        schedule = self.solver.solve(
+            state.input_data.events,
+            state.input_data.constraints,
+            travel_matrix,
+        )
+        if not schedule.stops:
+            print("⚠️  Оптимизатор не нашёл выполнимого расписания — план строит LLM")
+            return state
+
+        print(
+            f"✅ Расписание ({'точное' if schedule.is_exact else 'эвристика'}): "
+            f"{len(schedule.stops)} событий, в пути {schedule.total_travel_time_minutes} мин"
+            + (f", оценочных переходов: {schedule.estimated_legs}" if schedule.estimated_legs else "")
+        )
+        return state.model_copy(update={"schedule": schedule})
+
+    def _has_schedule(self, state) -> Literal["scheduled", "llm"]:
+        """Есть ли расписание от оптимизатора."""
+        if isinstance(state, dict):
+            state = GraphState(**state)
+        return "scheduled" if state.schedule else "llm"
+
+    def _needs_validation(self, state) -> Literal["validate", "finish"]:
+        """
+        Расписание оптимизатора выполнимо по построению, если все переходы взяты из матрицы;
+        план от LLM или расписание с оценочными переходами проверяются валидатором.
+        """
+        if isinstance(state, dict):
+            state = GraphState(**state)
+        if state.schedule and not state.schedule.estimated_legs:
+            return "finish"
+        return "validate"
+
     def _planner_reasoning_node(self, state) -> GraphState:
         """Узел рассуждений планировщика."""
         print("\n" + "▶"*30)
@@ -61,6 +202,12 @@ class PlanningGraph:
         reasoning = self.planner.create_reasoning(state)
         # Создаем новое состояние с обновленными данными
         return state.model_copy(update={"reasoning": reasoning})
+
+    async def _aplanner_reasoning_node(self, state) -> GraphState:
+        """Асинхронный узел рассуждений планировщика."""
+        state = self._enter("planner_reasoning", state)
+        reasoning = await self.planner.acreate_reasoning(state)
+        return state.model_copy(update={"reasoning": reasoning})
     
     def _planner_create_node(self, state) -> GraphState:
         """Узел создания плана."""
@@ -71,10 +218,52 @@ class PlanningGraph:
         if isinstance(state, dict):
             state = GraphState(**state)
         
-        # Планировщик использует LLM с инструментами для создания плана
-        plan = self.planner.create_plan(state)
+        if state.schedule:
+            # Готовое расписание — LLM только описывает его
+            plan = self.planner.narrate_schedule(state)
+        else:
+            # Планировщик использует LLM с инструментами для создания плана
+            plan = self.planner.create_plan(state)
+        return state.model_copy(update={"plan": plan})
+
+    async def _aplanner_create_node(self, state) -> GraphState:
+        """Асинхронный узел создания плана."""
+        state = self._enter("planner_create", state)
+        if state.schedule:
+            plan = await self.planner.anarrate_schedule(state)
+        else:
+            plan = await self.planner.acreate_plan(state)
         return state.model_copy(update={"plan": plan})
     
+    def _validate_node(self, state) -> GraphState:
+        """Узел детерминированной проверки плана (без LLM)."""
+        state = self._enter("validate", state)
+        violations = self.validator.validate(
+            state.plan,
+            state.input_data.constraints,
+            events=state.input_data.events or [],
+            maps_info=state.maps_info,
+        )
+        if violations:
+            print(f"⚠️  Валидатор нашёл нарушений: {len(violations)}")
+            for v in violations:
+                print(f"   - [{v.code}] {v.message}")
+        else:
+            print("✅ Валидатор: нарушений нет")
+        return state.model_copy(update={"violations": violations})
+
+    def _needs_critique(self, state) -> Literal["critic", "finish"]:
+        """Нужен ли LLM-критик: только если валидатор нашёл нарушения и есть итерации в запасе."""
+        if isinstance(state, dict):
+            state = GraphState(**state)
+        if not state.violations:
+            print("\n✅ План прошёл проверку, критик не нужен")
+            return "finish"
+        if state.iteration >= state.max_iterations:
+            print(f"\n⏹️  Достигнуто максимальное количество итераций ({state.max_iterations}), завершаю")
+            return "finish"
+        return "critic"
+
     def _critic_node(self, state) -> GraphState:
         """Узел критики."""
         print("\n" + "▶"*30)
@@ -90,6 +279,16 @@ class PlanningGraph:
             "critique": critique,
             "iteration": state.iteration + 1
         })
+
+    async def _acritic_node(self, state) -> GraphState:
+        """Асинхронный узел критики."""
+        state = self._enter("critic", state)
+        print(f"Итерация: {state.iteration + 1}/{state.max_iterations}")
+        critique = await self.critic.acritique_plan(state)
+        return state.model_copy(update={
+            "critique": critique,
+            "iteration": state.iteration + 1
+        })
     
     def _planner_revise_node(self, state) -> GraphState:
         """Узел пересмотра плана."""
@@ -102,6 +301,12 @@ class PlanningGraph:
         
         plan = self.planner.revise_plan(state)
         return state.model_copy(update={"plan": plan})
+
+    async def _aplanner_revise_node(self, state) -> GraphState:
+        """Асинхронный узел пересмотра плана."""
+        state = self._enter("planner_revise", state)
+        plan = await self.planner.arevise_plan(state)
+        return state.model_copy(update={"plan": plan})
     
     def _should_revise(self, state) -> Literal["revise", "finish"]:
         """Определить, нужно ли пересматривать план."""
@@ -133,7 +338,27 @@ class PlanningGraph:
     
     def run(self, input_data) -> OutputResult:
         """
-        Запустить граф.
+        Запустить граф (синхронно).
+        
+        Args:
+            input_data: InputData объект с событиями, промптом и ограничениями
+        
+        Returns:
+            OutputResult с финальным планом
+        """
+        cached = self._cached(input_data)
+        if cached is not None:
+            return cached
+
+        initial_state = self._initial_state(input_data)
+        with self.tool_executor.track_run() as tool_latency:
+            final_state_dict = self.graph.invoke(initial_state)
+        return self._store(input_data, self._build_output(final_state_dict, tool_latency))
+
+    async def arun(self, input_data) -> OutputResult:
+        """
+        Запустить граф асинхронно (LLM через ainvoke, инструменты через общую aiohttp-сессию).
+        Не блокирует event loop — несколько запросов могут выполняться одновременно.
         
         Args:
             input_data: InputData объект с событиями, промптом и ограничениями
@@ -141,6 +366,32 @@ class PlanningGraph:
         Returns:
             OutputResult с финальным планом
         """
+        cached = self._cached(input_data)
+        if cached is not None:
+            return cached
+
+        initial_state = self._initial_state(input_data)
+        with self.tool_executor.track_run() as tool_latency:
+            final_state_dict = await self.graph.ainvoke(initial_state)
+        return self._store(input_data, self._build_output(final_state_dict, tool_latency))
+
+    def _cached(self, input_data) -> Optional[OutputResult]:
+        if self.plan_cache is None:
+            return None
+        result = self.plan_cache.get(input_data)
+        stats = self.plan_cache.stats()
+        if result is not None:
+            print(f"♻️  План взят из кэша (попаданий: {stats['hits']}, промахов: {stats['misses']})")
+        else:
+            print(f"🗄️  Плана нет в кэше (попаданий: {stats['hits']}, промахов: {stats['misses']})")
+        return result
+
+    def _store(self, input_data, result: OutputResult) -> OutputResult:
+        if self.plan_cache is not None:
+            self.plan_cache.put(input_data, result)
+        return result
+
+    def _initial_state(self, input_data) -> GraphState:
         initial_state = GraphState(
             input_data=input_data,
             iteration=0,
@@ -152,10 +403,9 @@ class PlanningGraph:
         print("🚀"*30)
         print(f"Событий для планирования: {len(input_data.events)}")
         print(f"Максимальное количество итераций: {initial_state.max_iterations}")
-        
-        # Запускаем граф
-        final_state_dict = self.graph.invoke(initial_state)
-        
+        return initial_state
+
+    def _build_output(self, final_state_dict, tool_latency=None) -> OutputResult:
         # Преобразуем словарь обратно в GraphState
         if isinstance(final_state_dict, dict):
             final_state = GraphState(**final_state_dict)
@@ -167,6 +417,9 @@ class PlanningGraph:
         print("ЗАВЕРШЕНИЕ РАБОТЫ ГРАФА")
         print("🏁"*30)
         print(f"Итоговое количество итераций: {final_state.iteration}")
+        # исполнитель общий для процесса — печатаем только вызовы этого запроса
+        for name, stats in self.tool_executor.latency_report(tool_latency or {}).items():
+            print(f"🔧 {name}: вызовов {stats['calls']}, среднее {stats['avg_ms']:.0f} мс, макс {stats['max_ms']:.0f} мс")
         result_text = self.planner.render_telegram_message(final_state)
         
         result = OutputResult(
@@ -180,4 +433,3 @@ class PlanningGraph:
             final_text=result_text
         )
         return result
-
@@ -66,19 +66,58 @@ class Critique(BaseModel):
     needs_revision: bool = Field(description="Требуется ли пересмотр плана")
 
 
+class PlanViolation(BaseModel):
+    """Нарушение, найденное детерминированным валидатором плана."""
+    code: str = Field(description="Тип нарушения (overlap, total_duration, travel_time, end_time, ...)")
+    message: str = Field(description="Описание нарушения")
+    item_index: Optional[int] = Field(description="Индекс элемента плана (если относится к элементу)", default=None)
+
+
+class ScheduledStop(BaseModel):
+    """Остановка в расписании, построенном оптимизатором."""
+    event_index: int = Field(description="Индекс события в InputData.events")
+    event_name: str = Field(description="Название события")
+    event_address: str = Field(description="Адрес события")
+    start_time: time = Field(description="Время начала")
+    end_time: time = Field(description="Время окончания")
+    duration_minutes: int = Field(description="Продолжительность в минутах")
+    transport_mode: str = Field(description="Режим транспорта до события")
+    travel_time_minutes: Optional[int] = Field(description="Время в пути до события в минутах", default=None)
+
+
+class Schedule(BaseModel):
+    """Расписание, посчитанное детерминированным оптимизатором (без LLM)."""
+    stops: List[ScheduledStop] = Field(description="Остановки в хронологическом порядке")
+    total_duration_minutes: int = Field(description="Общая продолжительность в минутах")
+    total_travel_time_minutes: int = Field(description="Общее время в пути в минутах")
+    excluded_events: List[str] = Field(description="События, не поместившиеся в расписание")
+    is_exact: bool = Field(description="Решение точное (DP) или эвристическое")
+    day: Optional[str] = Field(description="День плана (YYYY-MM-DD), None — события без фиксированной даты", default=None)
+    estimated_legs: int = Field(description="Переходов, время которых не из матрицы маршрутов, а оценочное", default=0)
+
+
+class ScheduleNarration(BaseModel):
+    """Текстовое описание готового расписания от LLM."""
+    summary: str = Field(description="Краткое описание плана")
+    notes: List[str] = Field(description="Заметка к каждой остановке, в том же порядке")
+
+
 class GraphState(BaseModel):
     """Состояние графа LangGraph."""
     model_config = {"extra": "forbid", "frozen": False}
-    
+
     input_data: InputData = Field(description="Входные данные")
+    schedule: Optional[Schedule] = Field(description="Расписание от оптимизатора маршрута", default=None)
     reasoning: Optional[Reasoning] = Field(description="Рассуждения планировщика", default=None)
     plan: Optional[Plan] = Field(description="Текущий план", default=None)
     critique: Optional[Critique] = Field(description="Критика плана", default=None)
+    violations: Optional[List[PlanViolation]] = Field(description="Нарушения от валидатора (None — план ещё не проверялся)", default=None)
     iteration: int = Field(description="Номер итерации", default=0)
     max_iterations: int = Field(description="Максимальное количество итераций", default=3)
     weather_info: Dict[str, Any] = Field(description="Информация о погоде", default_factory=dict)
     maps_info: Dict[str, Any] = Field(description="Информация о маршрутах", default_factory=dict)
     web_info: Dict[str, Any] = Field(description="Информация из интернета", default_factory=dict)
+    tool_cache: Dict[str, Any] = Field(description="Результаты вызовов инструментов в рамках запроса", default_factory=dict)
 
 
 class OutputResult(BaseModel):
@@ -0,0 +1,203 @@
+"""
+Кэш готовых планов перед PlanningGraph.run.
+
+Ключ: нормализованный промпт + хэш UUID найденных событий + сериализованные Constraints.
+Хранилище — SQLite (общий файл для бота и sync worker), TTL + вытеснение LRU.
+
+Инвалидация:
+- удалённое событие не попадёт в выдачу ретривера, а другой набор UUID — другой ключ;
+- при каждом попадании сверяется отпечаток содержимого событий — если событие
+  изменилось в Weaviate (тот же UUID, другие свойства), запись удаляется;
+- clear() — при пересоздании коллекции; остальное вытесняют TTL и LRU.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.models.event import SEARCH_METADATA_FIELDS, Event
+from src.planner_agent.models import InputData, OutputResult
+from src.utils.paths import project_root
+
+
+PLAN_CACHE_TTL_SECONDS: int = int(os.getenv("PLAN_CACHE_TTL_SECONDS", str(6 * 3600)))
+PLAN_CACHE_MAX_ENTRIES: int = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "500"))
+
+_SPACES_RE = re.compile(r"\s+")
+_EDGE_PUNCT_RE = re.compile(r"^[\s\.,!?;:«»\"']+|[\s\.,!?;:«»\"']+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Нормализует промпт: регистр, ё→е, пробелы и пунктуация по краям."""
+    text = (prompt or "").lower().replace("ё", "е")
+    text = _SPACES_RE.sub(" ", text)
+    return _EDGE_PUNCT_RE.sub("", text)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def event_uuid(event: Event) -> str:
+    """UUID объекта в Weaviate (ретривер кладёт его в event.uuid); без него — хэш содержимого."""
+    uuid = getattr(event, "uuid", None)
+    return str(uuid) if uuid else _sha256(event.model_dump_json(exclude=SEARCH_METADATA_FIELDS))
+
+
+def events_fingerprint(events: Iterable[Event]) -> str:
+    """Отпечаток содержимого событий — меняется, если событие изменилось в Weaviate."""
+    return _sha256("\n".join(e.model_dump_json(exclude=SEARCH_METADATA_FIELDS) for e in events))
+
+
+class PlanCache:
+    """SQLite-кэш результатов PlanningGraph с TTL и LRU."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: int = PLAN_CACHE_TTL_SECONDS,
+        max_entries: int = PLAN_CACHE_MAX_ENTRIES,
+    ):
+        if db_path is None:
+            db_path = str(project_root() / "data" / "cache" / "plan_cache.db")
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Получить соединение с БД"""
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def init_db(self) -> None:
+        """Создать таблицы кэша."""
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_plan_cache_last_access ON plan_cache(last_access)")
+
+    @staticmethod
+    def make_key(input_data: InputData) -> str:
+        """Ключ кэша: промпт + UUID событий (в порядке выдачи) + ограничения."""
+        uuids = [event_uuid(e) for e in input_data.events]
+        parts = [
+            normalize_prompt(input_data.user_prompt),
+            _sha256(",".join(uuids)),
+            input_data.constraints.model_dump_json(),
+        ]
+        return _sha256("\x1f".join(parts))
+
+    def get(self, input_data: InputData) -> Optional[OutputResult]:
+        """Вернуть план из кэша или None (промах, устаревшая или изменившаяся запись)."""
+        key = self.make_key(input_data)
+        now = time.time()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT fingerprint, result, created_at FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None:
+                fingerprint, result, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    self._delete_keys(conn, [key])
+                    row = None
+                elif fingerprint != events_fingerprint(input_data.events):
+                    self._delete_keys(conn, [key])
+                    self._count(invalidations=1)
+                    row = None
+
+            if row is None:
+                self._count(misses=1)
+                return None
+
+            conn.execute("UPDATE plan_cache SET last_access = ? WHERE key = ?", (now, key))
+
+        self._count(hits=1)
+        return OutputResult.model_validate_json(row[1])
+
+    def put(self, input_data: InputData, result: OutputResult) -> None:
+        """Сохранить план и вытеснить устаревшие/самые давно использованные записи."""
+        key = self.make_key(input_data)
+        now = time.time()
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, fingerprint, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, events_fingerprint(input_data.events), result.model_dump_json(), now, now),
+            )
+            self._evict(conn, now)
+
+    def clear(self) -> None:
+        """Очистить кэш целиком (например, при пересоздании коллекции)."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM plan_cache")
+
+    def stats(self) -> Dict[str, float]:
+        """Счётчики попаданий/промахов текущего процесса и размер кэша."""
+        with self._transaction() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": size,
+            }
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = [
+            r[0] for r in conn.execute("SELECT key FROM plan_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        ]
+        overflow = [
+            r[0] for r in conn.execute(
+                "SELECT key FROM plan_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+            )
+        ]
+        self._delete_keys(conn, expired + overflow)
+
+    @staticmethod
+    def _delete_keys(conn: sqlite3.Connection, keys: List[str]) -> None:
+        if not keys:
+            return
+        conn.executemany("DELETE FROM plan_cache WHERE key = ?", [(k,) for k in keys])
+
+    def _count(self, hits: int = 0, misses: int = 0, invalidations: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.invalidations += invalidations
@@ -0,0 +1,423 @@
+"""
+Детерминированный оптимизатор маршрута с временными окнами.
+
+Порядок событий, выбор транспорта и время в пути считаются здесь, а не LLM:
+- для небольшого числа событий (<= exact_max_events, по умолчанию EXACT_MAX_EVENTS) —
+  точное решение задачи orienteering с временными окнами (DP по подмножествам);
+- для большего числа — эвристика жадной вставки.
+
+План строится на один день: события с датой другого дня в него не попадают.
+LLM после этого только описывает готовое расписание.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models.event import Event
+from src.planner_agent.models import Constraints, Schedule, ScheduledStop
+from src.utils.event_dates import to_minutes
+
+
+# DP по подмножествам — O(2^n · n²): 15 событий (столько отдаёт ретривер) считаются
+# за доли секунды, дальше — жадная вставка
+EXACT_MAX_EVENTS = 15
+
+
+# mode -> матрица n×n времени в пути (минуты); None/NaN — время неизвестно
+TravelMatrix = Dict[str, Sequence[Sequence[Optional[float]]]]
+
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\s+(\d{1,2}):(\d{2})")
+
+_TRANSPORT_ALIASES: Dict[str, str] = {
+    "walking": "walking",
+    "walk": "walking",
+    "пешком": "walking",
+    "пешая": "walking",
+    "car": "car",
+    "машина": "car",
+    "авто": "car",
+    "автомобиль": "car",
+    "такси": "car",
+    "taxi": "car",
+    "bus": "bus",
+    "автобус": "bus",
+    "метро": "bus",
+    "metro": "bus",
+    "общественный транспорт": "bus",
+    "public transport": "bus",
+}
+
+
+def normalize_transport(value: Optional[str]) -> Optional[str]:
+    """Приводит свободную формулировку транспорта к walking/car/bus (или None)."""
+    if not value:
+        return None
+    text = value.strip().lower()
+    if text in _TRANSPORT_ALIASES:
+        return _TRANSPORT_ALIASES[text]
+    for alias, mode in _TRANSPORT_ALIASES.items():
+        if alias in text:
+            return mode
+    return None
+
+
+def _to_time(minutes: float) -> time:
+    minutes = int(round(min(max(minutes, 0), 23 * 60 + 59)))
+    return time(minutes // 60, minutes % 60)
+
+
+def _event_window(date: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[int], Optional[int]]:
+    """
+    Достаёт из текстовой даты события дни проведения, фиксированное время начала и длительность.
+
+    "2025-12-27 19:00 - 2025-12-27 21:00" -> ("2025-12-27", "2025-12-27", 1140, 120) — событие в один день;
+    "2025-12-27 19:00"                    -> ("2025-12-27", "2025-12-27", 1140, None);
+    многодневные события (выставки и т.п.) гибкие по времени ->
+    "2025-12-20 10:00 - 2025-12-30 18:00" -> ("2025-12-20", "2025-12-30", None, None).
+    Без даты -> (None, None, None, None): событие подходит к любому дню.
+    """
+    if not date:
+        return None, None, None, None
+
+    matches = _DATE_RE.findall(date)
+    if not matches:
+        return None, None, None, None
+
+    start_day, sh, sm = matches[0]
+    start = int(sh) * 60 + int(sm)
+
+    if len(matches) == 1:
+        return start_day, start_day, start, None
+
+    end_day, eh, em = matches[1]
+    if end_day != start_day:
+        return start_day, end_day, None, None
+
+    end = int(eh) * 60 + int(em)
+    if end <= start:
+        return start_day, end_day, start, None
+    return start_day, end_day, start, end - start
+
+
+def _plan_day(days: Sequence[Tuple[Optional[str], Optional[str]]], weights: Sequence[float]) -> Optional[str]:
+    """
+    День плана: среди дней однодневных событий — тот, где суммарный приоритет
+    доступных событий (включая многодневные) максимален; при равенстве — более ранний.
+    None — однодневных событий нет, подходит любой день.
+    """
+    candidates = sorted({first for first, last in days if first is not None and first == last})
+    if not candidates:
+        return None
+
+    def score(day: str) -> float:
+        return sum(w for (first, last), w in zip(days, weights) if _on_day((first, last), day))
+
+    return max(candidates, key=score)  # max берёт первый из равных — более ранний день
+
+
+def _on_day(span: Tuple[Optional[str], Optional[str]], day: Optional[str]) -> bool:
+    first, last = span
+    if day is None or first is None:
+        return True
+    return first <= day <= (last or first)
+
+
+@dataclass
+class _Leg:
+    mode: str
+    minutes: int
+    estimated: bool = False  # времени в матрице нет — взято unknown_travel_minutes
+
+
+@dataclass
+class RouteSolver:
+    """
+    Строит оптимальное (или близкое к нему) расписание посещения событий.
+
+    Целевая функция (лексикографически):
+    1. максимум событий в плане;
+    2. максимум суммарного приоритета (по умолчанию — порядок выдачи ретривера);
+    3. минимум времени окончания и времени в пути.
+    """
+
+    default_visit_minutes: int = 90
+    default_day_start: time = time(10, 0)
+    default_day_end: time = time(22, 0)
+    walking_threshold_minutes: int = 10
+    unknown_travel_minutes: int = 30
+    exact_max_events: int = EXACT_MAX_EVENTS
+
+    def solve(
+        self,
+        events: Sequence[Event],
+        constraints: Constraints,
+        travel_matrix: TravelMatrix,
+        weights: Optional[Sequence[float]] = None,
+    ) -> Schedule:
+        """
+        Args:
+            events: События в порядке релевантности
+            constraints: Ограничения пользователя
+            travel_matrix: Время в пути между событиями по режимам транспорта
+            weights: Приоритеты событий (по умолчанию убывают по порядку)
+
+        Returns:
+            Schedule с упорядоченными остановками
+        """
+        n = len(events)
+        if n == 0:
+            return Schedule(stops=[], total_duration_minutes=0, total_travel_time_minutes=0,
+                            excluded_events=[], is_exact=True)
+
+        if weights is None:
+            weights = [(n - i) / n for i in range(n)]
+
+        day_start, day_end = self._horizon(constraints)
+        days: List[Tuple[Optional[str], Optional[str]]] = []
+        fixed_starts: List[Optional[int]] = []
+        durations: List[int] = []
+        for e in events:
+            first, last, fixed, duration = _event_window(getattr(e, "date", None))
+            days.append((first, last))
+            fixed_starts.append(fixed)
+            durations.append(duration or self.default_visit_minutes)
+
+        # события других дней в план не попадают (окажутся в excluded_events)
+        day = _plan_day(days, weights)
+        available = [_on_day(span, day) for span in days]
+
+        legs = self._legs(n, travel_matrix, normalize_transport(constraints.preferred_transport))
+
+        problem = _Problem(day_start, day_end, fixed_starts, durations, legs, list(weights), available)
+        if sum(available) <= self.exact_max_events:
+            route = problem.solve_exact()
+            is_exact = True
+        else:
+            route = problem.solve_insertion()
+            is_exact = False
+
+        return self._build_schedule(events, route, problem, is_exact, day)
+
+    # ---------------- internals ----------------
+
+    def _horizon(self, constraints: Constraints) -> Tuple[int, int]:
+        day_start = to_minutes(constraints.start_time or self.default_day_start)
+        day_end = to_minutes(constraints.end_time or self.default_day_end)
+        if day_end <= day_start:
+            day_end = 24 * 60 - 1
+        if constraints.max_total_time_minutes:
+            day_end = min(day_end, day_start + constraints.max_total_time_minutes)
+        return day_start, day_end
+
+    def _legs(self, n: int, travel_matrix: TravelMatrix, preferred: Optional[str]) -> List[List[_Leg]]:
+        """Для каждой пары (i, j) выбирает транспорт и время в пути."""
+        legs: List[List[_Leg]] = []
+        for i in range(n):
+            row: List[_Leg] = []
+            for j in range(n):
+                options: Dict[str, float] = {}
+                for mode, matrix in travel_matrix.items():
+                    value = matrix[i][j]
+                    if value is not None and not math.isnan(value):
+                        options[mode] = float(value)
+                row.append(self._choose_leg(i == j, options, preferred))
+            legs.append(row)
+        return legs
+
+    def _choose_leg(self, same: bool, options: Dict[str, float], preferred: Optional[str]) -> _Leg:
+        if same:
+            return _Leg(mode=preferred or "walking", minutes=0)
+        if not options:
+            return _Leg(mode=preferred or "walking", minutes=self.unknown_travel_minutes, estimated=True)
+        if preferred and preferred in options:
+            return _Leg(mode=preferred, minutes=math.ceil(options[preferred]))
+
+        walking = options.get("walking")
+        if walking is not None and walking <= self.walking_threshold_minutes:
+            return _Leg(mode="walking", minutes=math.ceil(walking))
+
+        motorized = {m: v for m, v in options.items() if m != "walking"} or options
+        mode = min(motorized, key=motorized.get)
+        return _Leg(mode=mode, minutes=math.ceil(motorized[mode]))
+
+    def _build_schedule(
+        self,
+        events: Sequence[Event],
+        route: List[int],
+        problem: "_Problem",
+        is_exact: bool,
+        day: Optional[str],
+    ) -> Schedule:
+        timings = problem.simulate(route) or []
+        stops: List[ScheduledStop] = []
+        travel_total = 0
+        estimated = 0
+        prev: Optional[int] = None
+        for idx, (begin, finish) in zip(route, timings):
+            event = events[idx]
+            leg = problem.legs[prev][idx] if prev is not None else None
+            if leg is not None:
+                travel_total += leg.minutes
+                estimated += leg.estimated
+            stops.append(
+                ScheduledStop(
+                    event_index=idx,
+                    event_name=event.title,
+                    event_address=event.location or "адрес не указан",
+                    start_time=_to_time(begin),
+                    end_time=_to_time(finish),
+                    duration_minutes=int(finish - begin),
+                    transport_mode=leg.mode if leg else "walking",
+                    travel_time_minutes=leg.minutes if leg else None,
+                )
+            )
+            prev = idx
+
+        included = set(route)
+        total = int(timings[-1][1] - timings[0][0]) if timings else 0
+        return Schedule(
+            stops=stops,
+            total_duration_minutes=total,
+            total_travel_time_minutes=travel_total,
+            excluded_events=[e.title for i, e in enumerate(events) if i not in included],
+            is_exact=is_exact,
+            day=day,
+            estimated_legs=estimated,
+        )
+
+
+@dataclass
+class _Problem:
+    """Внутреннее представление задачи orienteering с временными окнами."""
+
+    day_start: int
+    day_end: int
+    fixed_starts: List[Optional[int]]
+    durations: List[int]
+    legs: List[List[_Leg]]
+    weights: List[float]
+    available: List[bool]
+
+    def _visit(self, arrival: float, idx: int) -> Optional[Tuple[float, float]]:
+        """Начало и конец посещения при прибытии в arrival, либо None, если не успеваем."""
+        if not self.available[idx]:
+            return None
+        fixed = self.fixed_starts[idx]
+        begin = max(arrival, self.day_start)
+        if fixed is not None:
+            if begin > fixed:
+                return None
+            begin = fixed
+        finish = begin + self.durations[idx]
+        if finish > self.day_end:
+            return None
+        return begin, finish
+
+    def simulate(self, route: Sequence[int]) -> Optional[List[Tuple[float, float]]]:
+        """Расписание для заданного порядка или None, если порядок невыполним."""
+        timings: List[Tuple[float, float]] = []
+        clock = float(self.day_start)
+        prev: Optional[int] = None
+        for idx in route:
+            arrival = clock + (self.legs[prev][idx].minutes if prev is not None else 0)
+            visit = self._visit(arrival, idx)
+            if visit is None:
+                return None
+            timings.append(visit)
+            clock = visit[1]
+            prev = idx
+        return timings
+
+    def solve_exact(self) -> List[int]:
+        """
+        DP по подмножествам: для (mask, last) храним самое раннее время окончания.
+        Ожидание разрешено, поэтому раннее окончание доминирует — решение точное.
+        """
+        n = len(self.durations)
+        # layer: mask -> {last: (finish, travel, prev_last)}
+        layer: Dict[int, Dict[int, Tuple[float, float, int]]] = {}
+        for i in range(n):
+            visit = self._visit(self.day_start, i)
+            if visit is not None:
+                layer.setdefault(1 << i, {})[i] = (visit[1], 0.0, -1)
+
+        history: List[Dict[int, Dict[int, Tuple[float, float, int]]]] = []
+        best: Optional[Tuple[Tuple[int, float, float, float], int, int]] = None
+
+        mask_weight: Dict[int, float] = {1 << i: self.weights[i] for i in range(n)}
+        count = 0
+
+        while layer:
+            history.append(layer)
+            count += 1
+            next_layer: Dict[int, Dict[int, Tuple[float, float, int]]] = {}
+            for mask, lasts in layer.items():
+                weight = mask_weight[mask]
+                for last, (finish, travel, _) in lasts.items():
+                    key = (count, weight, -finish, -travel)
+                    if best is None or key > best[0]:
+                        best = (key, mask, last)
+
+                    for j in range(n):
+                        if mask >> j & 1:
+                            continue
+                        leg = self.legs[last][j]
+                        visit = self._visit(finish + leg.minutes, j)
+                        if visit is None:
+                            continue
+                        new_mask = mask | (1 << j)
+                        mask_weight[new_mask] = weight + self.weights[j]
+                        candidate = (visit[1], travel + leg.minutes, last)
+                        slot = next_layer.setdefault(new_mask, {})
+                        current = slot.get(j)
+                        if current is None or candidate[:2] < current[:2]:
+                            slot[j] = candidate
+            layer = next_layer
+
+        if best is None:
+            return []
+
+        # восстановление маршрута по указателям на предыдущую вершину
+        _, mask, last = best
+        route: List[int] = []
+        depth = bin(mask).count("1") - 1
+        while last != -1:
+            route.append(last)
+            prev = history[depth][mask][last][2]
+            mask ^= 1 << last
+            last = prev
+            depth -= 1
+        route.reverse()
+        return route
+
+    def solve_insertion(self) -> List[int]:
+        """Жадная вставка: добавляем событие с лучшим отношением приоритета к приросту времени."""
+        n = len(self.durations)
+        route: List[int] = []
+        remaining = set(range(n))
+        current_end = float(self.day_start)
+
+        while remaining:
+            best_choice: Optional[Tuple[float, int, int, float]] = None
+            for idx in remaining:
+                for pos in range(len(route) + 1):
+                    candidate = route[:pos] + [idx] + route[pos:]
+                    timings = self.simulate(candidate)
+                    if timings is None:
+                        continue
+                    added = max(timings[-1][1] - current_end, 1.0)
+                    score = self.weights[idx] / added
+                    if best_choice is None or score > best_choice[0]:
+                        best_choice = (score, idx, pos, timings[-1][1])
+            if best_choice is None:
+                break
+            _, idx, pos, end = best_choice
+            route.insert(pos, idx)
+            remaining.discard(idx)
+            current_end = end
+
+        return route
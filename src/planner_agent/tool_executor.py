@@ -0,0 +1,190 @@
+"""
+Исполнение вызовов инструментов, которые LLM запросила за один ход.
+
+- все tool_calls хода выполняются параллельно в ограниченном пуле потоков
+  (инструменты — блокирующие HTTP-запросы через requests);
+- одинаковые вызовы (имя + аргументы) в рамках одного запроса выполняются один раз;
+- для каждого инструмента копится статистика задержек: за всё время жизни
+  исполнителя (он общий для процесса) и отдельно за запрос — внутри track_run().
+
+Есть синхронный (run, пул потоков) и асинхронный (arun, tool.ainvoke) варианты.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+
+MAX_TOOL_WORKERS = 8
+
+# Статистика текущего запроса (см. ToolExecutor.track_run); контекст копируется
+# в задачи asyncio и узлы LangGraph, словарь при этом общий
+_run_latency: ContextVar[Optional[Dict[str, "ToolLatency"]]] = ContextVar("tool_run_latency", default=None)
+
+
+def _call_key(name: str, args: Dict[str, Any]) -> str:
+    """Ключ для дедупликации: имя инструмента + аргументы в каноничном виде."""
+    return f"{name}:{json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+@dataclass
+class ToolLatency:
+    """Накопленная статистика задержек одного инструмента."""
+    calls: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    @property
+    def avg_s(self) -> float:
+        return self.total_s / self.calls if self.calls else 0.0
+
+
+@dataclass
+class ToolExecutor:
+    """Параллельно выполняет tool_calls одного хода LLM и возвращает ToolMessage."""
+
+    tools: Sequence[BaseTool]
+    max_workers: int = MAX_TOOL_WORKERS
+    latency: Dict[str, ToolLatency] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._tools_by_name = {t.name: t for t in self.tools}
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="planner-tool")
+        self._lock = threading.Lock()
+
+    def _invoke(self, name: str, args: Dict[str, Any], run_stats: Optional[Dict[str, ToolLatency]] = None) -> Any:
+        tool = self._tools_by_name.get(name)
+        if tool is None:
+            return {"success": False, "error": f"Неизвестный инструмент: {name}"}
+
+        started = time.perf_counter()
+        try:
+            return tool.invoke(args)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            self._record(name, time.perf_counter() - started, run_stats)
+
+    async def _ainvoke(self, name: str, args: Dict[str, Any], semaphore: asyncio.Semaphore) -> Any:
+        tool = self._tools_by_name.get(name)
+        if tool is None:
+            return {"success": False, "error": f"Неизвестный инструмент: {name}"}
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await tool.ainvoke(args)
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+            finally:
+                self._record(name, time.perf_counter() - started, _run_latency.get())
+
+    def _record(self, name: str, elapsed: float, run_stats: Optional[Dict[str, ToolLatency]] = None) -> None:
+        with self._lock:
+            for latency in (self.latency, run_stats):
+                if latency is None:
+                    continue
+                stats = latency.setdefault(name, ToolLatency())
+                stats.calls += 1
+                stats.total_s += elapsed
+                stats.max_s = max(stats.max_s, elapsed)
+        print(f"   🔧 {name}: {elapsed * 1000:.0f} мс")
+
+    @contextmanager
+    def track_run(self) -> Iterator[Dict[str, ToolLatency]]:
+        """
+        Отдельная статистика задержек для одного запроса.
+
+        Вызовы инструментов внутри блока (в том числе из потоков пула и задач asyncio)
+        попадают и в общую статистику, и в возвращаемый словарь.
+        """
+        stats: Dict[str, ToolLatency] = {}
+        token = _run_latency.set(stats)
+        try:
+            yield stats
+        finally:
+            _run_latency.reset(token)
+
+    def run(self, tool_calls: Sequence[Dict[str, Any]], cache: Optional[Dict[str, Any]] = None) -> List[ToolMessage]:
+        """
+        Выполнить вызовы инструментов одного хода.
+
+        Args:
+            tool_calls: AIMessage.tool_calls (dict с name/args/id)
+            cache: Результаты уже выполненных вызовов в рамках запроса (дополняется)
+
+        Returns:
+            ToolMessage для каждого tool_call в исходном порядке
+        """
+        if cache is None:
+            cache = {}
+
+        keys = [_call_key(c["name"], c.get("args") or {}) for c in tool_calls]
+
+        # пул не наследует контекст вызывающего потока — статистику запроса передаём явно
+        run_stats = _run_latency.get()
+        pending = {}
+        for call, key in zip(tool_calls, keys):
+            if key not in cache and key not in pending:
+                pending[key] = self._pool.submit(self._invoke, call["name"], call.get("args") or {}, run_stats)
+
+        if pending:
+            print(f"🔧 Выполняю инструменты параллельно: {len(pending)} (дубликатов: {len(tool_calls) - len(pending)})")
+        for key, future in pending.items():
+            cache[key] = future.result()
+
+        return self._tool_messages(tool_calls, keys, cache)
+
+    async def arun(self, tool_calls: Sequence[Dict[str, Any]], cache: Optional[Dict[str, Any]] = None) -> List[ToolMessage]:
+        """Асинхронная версия run: вызовы идут через tool.ainvoke, не больше max_workers одновременно."""
+        if cache is None:
+            cache = {}
+
+        keys = [_call_key(c["name"], c.get("args") or {}) for c in tool_calls]
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+        pending = {}
+        for call, key in zip(tool_calls, keys):
+            if key not in cache and key not in pending:
+                pending[key] = self._ainvoke(call["name"], call.get("args") or {}, semaphore)
+
+        if pending:
+            print(f"🔧 Выполняю инструменты параллельно: {len(pending)} (дубликатов: {len(tool_calls) - len(pending)})")
+            results = await asyncio.gather(*pending.values())
+            cache.update(zip(pending.keys(), results))
+
+        return self._tool_messages(tool_calls, keys, cache)
+
+    @staticmethod
+    def _tool_messages(tool_calls: Sequence[Dict[str, Any]], keys: List[str], cache: Dict[str, Any]) -> List[ToolMessage]:
+        return [
+            ToolMessage(
+                content=json.dumps(cache[key], ensure_ascii=False, default=str),
+                tool_call_id=call["id"],
+                name=call["name"],
+            )
+            for call, key in zip(tool_calls, keys)
+        ]
+
+    def latency_report(self, stats: Optional[Dict[str, ToolLatency]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Статистика задержек по инструментам.
+
+        Args:
+            stats: Статистика одного запроса из track_run() (по умолчанию — за всё время)
+        """
+        with self._lock:
+            return {
+                name: {"calls": s.calls, "avg_ms": s.avg_s * 1000, "max_ms": s.max_s * 1000}
+                for name, s in (self.latency if stats is None else stats).items()
+            }
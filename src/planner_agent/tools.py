@@ -10,7 +10,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.utils.openweather import OpenWeatherClient  
 from src.utils.maps import YandexGeocoder, YandexRouteService
 from src.utils.websearch import TavilyHtmlFetcher
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from langchain_core.tools import tool
 from bs4 import BeautifulSoup
 
@@ -57,6 +57,10 @@ def _get_web_fetcher() -> TavilyHtmlFetcher:
 def _get_weather_impl(lat: float, lon: float) -> Dict[str, Any]:
     """Внутренняя реализация получения погоды по координатам."""
     weather = _get_weather_client().get_weather(lat, lon)
+    return _weather_dict(weather)
+
+
+def _weather_dict(weather) -> Dict[str, Any]:
     return {
         "description": weather.description,
         "temperature": weather.temperature,
@@ -85,6 +89,15 @@ def get_weather(lat: float, lon: float) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def _aget_weather(lat: float, lon: float) -> Dict[str, Any]:
+    """Асинхронная версия get_weather."""
+    try:
+        weather = await _get_weather_client().aget_weather(lat, lon)
+        return _weather_dict(weather)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 def _get_weather_by_address_impl(address: str) -> Dict[str, Any]:
     """Внутренняя реализация получения погоды по адресу."""
     geocoder = _get_geocoder()
@@ -93,16 +106,17 @@ def _get_weather_by_address_impl(address: str) -> Dict[str, Any]:
         raise ValueError(f"Не удалось найти координаты для адреса: {address}")
     lon, lat = point
     weather = _get_weather_client().get_weather(lat, lon)
-    return {
-        "address": address,
-        "coordinates": {"lat": lat, "lon": lon},
-        "description": weather.description,
-        "temperature": weather.temperature,
-        "feels_like": weather.feels_like,
-        "humidity": weather.humidity,
-        "wind_speed": weather.wind_speed,
-        "success": True
-    }
+    return {"address": address, "coordinates": {"lat": lat, "lon": lon}, **_weather_dict(weather)}
+
+
+async def _aget_weather_by_address_impl(address: str) -> Dict[str, Any]:
+    """Асинхронная реализация получения погоды по адресу."""
+    point = await _get_geocoder().aadress_to_geopoint(address)
+    if point is None:
+        raise ValueError(f"Не удалось найти координаты для адреса: {address}")
+    lon, lat = point
+    weather = await _get_weather_client().aget_weather(lat, lon)
+    return {"address": address, "coordinates": {"lat": lat, "lon": lon}, **_weather_dict(weather)}
 
 
 @tool
@@ -122,11 +136,30 @@ def get_weather_by_address(address: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def _aget_weather_by_address(address: str) -> Dict[str, Any]:
+    """Асинхронная версия get_weather_by_address."""
+    try:
+        return await _aget_weather_by_address_impl(address)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 def _get_route_info_impl(from_address: str, to_address: str, modes: Optional[List[str]] = None) -> Dict[str, Any]:
     """Внутренняя реализация получения маршрута."""
     route_service = _get_route_service()
     modes_tuple = tuple(modes) if modes else ("walking", "car", "bus")
     route_info = route_service.route_by_addresses(from_address, to_address, modes=modes_tuple)
+    return _route_dict(route_info)
+
+
+async def _aget_route_info_impl(from_address: str, to_address: str, modes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Асинхронная реализация получения маршрута."""
+    modes_tuple = tuple(modes) if modes else ("walking", "car", "bus")
+    route_info = await _get_route_service().aroute_by_addresses(from_address, to_address, modes=modes_tuple)
+    return _route_dict(route_info)
+
+
+def _route_dict(route_info: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "success": True,
         "from_address": route_info.get("from_address"),
@@ -155,11 +188,59 @@ def get_route_info(from_address: str, to_address: str, modes: Optional[List[str]
         return {"success": False, "error": str(e)}
 
 
+async def _aget_route_info(from_address: str, to_address: str, modes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Асинхронная версия get_route_info."""
+    try:
+        return await _aget_route_info_impl(from_address, to_address, modes)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_route_matrix(
+    addresses: List[Optional[str]],
+    modes: Optional[List[str]] = None,
+    points: Optional[List[Optional[Tuple[float, float]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Матрица времени в пути между всеми адресами (не инструмент LLM — считается заранее).
+
+    Каждый уникальный адрес геокодируется один раз, расстояния считаются векторно.
+    points — координаты (lon, lat), сохранённые при загрузке событий: их не геокодируем.
+    """
+    try:
+        modes_tuple = tuple(modes) if modes else ("walking", "car", "bus")
+        return _get_route_service().matrix_by_addresses(addresses, modes=modes_tuple, points=points)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+async def aget_route_matrix(
+    addresses: List[Optional[str]],
+    modes: Optional[List[str]] = None,
+    points: Optional[List[Optional[Tuple[float, float]]]] = None,
+) -> Dict[str, Any]:
+    """Асинхронная версия get_route_matrix (адреса геокодируются параллельно)."""
+    try:
+        modes_tuple = tuple(modes) if modes else ("walking", "car", "bus")
+        return await _get_route_service().amatrix_by_addresses(addresses, modes=modes_tuple, points=points)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 def _search_web_impl(query: str, max_results: int = 5) -> Dict[str, Any]:
     """Внутренняя реализация веб-поиска."""
-    from bs4 import BeautifulSoup
     fetcher = _get_web_fetcher()
     pages = fetcher.search(query, max_results=max_results)
+    return _search_dict(query, pages)
+
+
+async def _asearch_web_impl(query: str, max_results: int = 5) -> Dict[str, Any]:
+    """Асинхронная реализация веб-поиска."""
+    pages = await _get_web_fetcher().asearch(query, max_results=max_results)
+    return _search_dict(query, pages)
+
+
+def _search_dict(query: str, pages) -> Dict[str, Any]:
     results = [{"url": p.url, "title": p.title, "text_preview": BeautifulSoup(p.html, 'html.parser').get_text()[:1000]} for p in pages]
     return {"success": True, "query": query, "results": results, "count": len(results)}
 
@@ -182,6 +263,21 @@ def search_web(query: str, max_results: int = 5) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def _asearch_web(query: str, max_results: int = 5) -> Dict[str, Any]:
+    """Асинхронная версия search_web."""
+    try:
+        return await _asearch_web_impl(query, max_results)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+# Асинхронные версии инструментов: tool.ainvoke(...) не блокирует event loop
+get_weather.coroutine = _aget_weather
+get_weather_by_address.coroutine = _aget_weather_by_address
+get_route_info.coroutine = _aget_route_info
+search_web.coroutine = _asearch_web
+
+
 def get_all_tools():
     """Получить все инструменты для агентов."""
     return [
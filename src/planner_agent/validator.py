@@ -0,0 +1,202 @@
+"""
+Детерминированная проверка плана перед критиком.
+
+Большая часть замечаний критика механическая: пересекающиеся интервалы,
+итоговые суммы, не совпадающие с элементами, время в пути, расходящееся
+с матрицей маршрутов, выход за Constraints.end_time, элементы плана,
+не попавшие в included_events. Всё это проверяется здесь без LLM;
+критику отправляются только найденные нарушения.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.models.event import Event
+from src.planner_agent.models import Constraints, Plan, PlanViolation
+from src.planner_agent.scheduler import normalize_transport
+from src.utils.event_dates import to_minutes
+
+
+def _norm(name: str) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def _same_name(a: str, b: str) -> bool:
+    a, b = _norm(a), _norm(b)
+    return bool(a and b) and (a == b or a in b or b in a)
+
+
+@dataclass
+class PlanValidator:
+    """
+    Набор правил для проверки плана.
+
+    Допуски нужны, чтобы не отправлять план на пересмотр из-за округлений LLM.
+    """
+
+    tolerance_minutes: int = 5
+    travel_relative_tolerance: float = 0.25
+
+    def validate(
+        self,
+        plan: Plan,
+        constraints: Constraints,
+        events: Sequence[Event] = (),
+        maps_info: Optional[Dict[str, Any]] = None,
+    ) -> List[PlanViolation]:
+        """
+        Args:
+            plan: Проверяемый план
+            constraints: Ограничения пользователя
+            events: Исходные события (для сопоставления с матрицей маршрутов)
+            maps_info: Матрица маршрутов из узла route_matrix
+
+        Returns:
+            Список нарушений (пустой — план корректен)
+        """
+        violations: List[PlanViolation] = []
+        items = plan.items
+
+        if not items:
+            if events:
+                violations.append(PlanViolation(code="empty_plan", message="В плане нет ни одного события"))
+            return violations
+
+        violations += self._check_items(plan)
+        violations += self._check_totals(plan)
+        violations += self._check_constraints(plan, constraints)
+        violations += self._check_included(plan)
+        if maps_info and maps_info.get("success"):
+            violations += self._check_travel(plan, events, maps_info)
+        return violations
+
+    def _check_items(self, plan: Plan) -> List[PlanViolation]:
+        violations = []
+        prev = None
+        for i, item in enumerate(plan.items):
+            start, end = to_minutes(item.start_time), to_minutes(item.end_time)
+            if end <= start:
+                violations.append(PlanViolation(
+                    code="interval",
+                    message=f"«{item.event_name}»: время окончания {item.end_time:%H:%M} не позже начала {item.start_time:%H:%M}",
+                    item_index=i,
+                ))
+            elif abs((end - start) - item.duration_minutes) > self.tolerance_minutes:
+                violations.append(PlanViolation(
+                    code="item_duration",
+                    message=(f"«{item.event_name}»: продолжительность {item.duration_minutes} мин "
+                             f"не совпадает с интервалом {item.start_time:%H:%M}–{item.end_time:%H:%M} ({end - start} мин)"),
+                    item_index=i,
+                ))
+
+            if prev is not None:
+                prev_end = to_minutes(prev.end_time)
+                if start < prev_end:
+                    violations.append(PlanViolation(
+                        code="overlap",
+                        message=(f"«{item.event_name}» начинается в {item.start_time:%H:%M}, "
+                                 f"до окончания «{prev.event_name}» ({prev.end_time:%H:%M})"),
+                        item_index=i,
+                    ))
+                elif item.travel_time_minutes and start - prev_end + self.tolerance_minutes < item.travel_time_minutes:
+                    violations.append(PlanViolation(
+                        code="travel_gap",
+                        message=(f"Между «{prev.event_name}» и «{item.event_name}» {start - prev_end} мин, "
+                                 f"а дорога занимает {item.travel_time_minutes} мин"),
+                        item_index=i,
+                    ))
+            prev = item
+        return violations
+
+    def _check_totals(self, plan: Plan) -> List[PlanViolation]:
+        violations = []
+        span = to_minutes(plan.items[-1].end_time) - to_minutes(plan.items[0].start_time)
+        if span > 0 and abs(plan.total_duration_minutes - span) > self.tolerance_minutes:
+            violations.append(PlanViolation(
+                code="total_duration",
+                message=(f"Общая продолжительность {plan.total_duration_minutes} мин "
+                         f"не совпадает с планом ({plan.items[0].start_time:%H:%M}–{plan.items[-1].end_time:%H:%M}, {span} мин)"),
+            ))
+
+        travel = sum(item.travel_time_minutes or 0 for item in plan.items)
+        if abs(plan.total_travel_time_minutes - travel) > self.tolerance_minutes:
+            violations.append(PlanViolation(
+                code="total_travel",
+                message=(f"Общее время в пути {plan.total_travel_time_minutes} мин "
+                         f"не совпадает с суммой по элементам ({travel} мин)"),
+            ))
+        return violations
+
+    def _check_constraints(self, plan: Plan, constraints: Constraints) -> List[PlanViolation]:
+        violations = []
+        first, last = plan.items[0], plan.items[-1]
+        if constraints.start_time and to_minutes(first.start_time) < to_minutes(constraints.start_time):
+            violations.append(PlanViolation(
+                code="start_time",
+                message=f"План начинается в {first.start_time:%H:%M}, раньше ограничения {constraints.start_time:%H:%M}",
+                item_index=0,
+            ))
+        if constraints.end_time and to_minutes(last.end_time) > to_minutes(constraints.end_time):
+            violations.append(PlanViolation(
+                code="end_time",
+                message=f"План заканчивается в {last.end_time:%H:%M}, позже ограничения {constraints.end_time:%H:%M}",
+                item_index=len(plan.items) - 1,
+            ))
+        span = to_minutes(last.end_time) - to_minutes(first.start_time)
+        if constraints.max_total_time_minutes and span > constraints.max_total_time_minutes + self.tolerance_minutes:
+            violations.append(PlanViolation(
+                code="max_total_time",
+                message=f"План занимает {span} мин при ограничении {constraints.max_total_time_minutes} мин",
+            ))
+        return violations
+
+    def _check_included(self, plan: Plan) -> List[PlanViolation]:
+        violations = []
+        for i, item in enumerate(plan.items):
+            if not any(_same_name(item.event_name, name) for name in plan.included_events):
+                violations.append(PlanViolation(
+                    code="included_events",
+                    message=f"«{item.event_name}» есть в плане, но отсутствует в included_events",
+                    item_index=i,
+                ))
+        for name in plan.included_events:
+            if not any(_same_name(item.event_name, name) for item in plan.items):
+                violations.append(PlanViolation(
+                    code="included_events",
+                    message=f"«{name}» указано в included_events, но отсутствует в элементах плана",
+                ))
+        return violations
+
+    def _check_travel(self, plan: Plan, events: Sequence[Event], maps_info: Dict[str, Any]) -> List[PlanViolation]:
+        """Сверяет время в пути между соседними элементами с матрицей маршрутов."""
+        violations = []
+        durations = maps_info.get("durations_min") or {}
+
+        indices = [self._event_index(item.event_name, events) for item in plan.items]
+        for i in range(1, len(plan.items)):
+            item = plan.items[i]
+            a, b = indices[i - 1], indices[i]
+            mode = normalize_transport(item.transport_mode)
+            if a is None or b is None or mode not in durations or item.travel_time_minutes is None:
+                continue
+
+            expected = durations[mode][a][b]
+            if expected is None:
+                continue
+            allowed = max(self.tolerance_minutes, expected * self.travel_relative_tolerance)
+            if abs(item.travel_time_minutes - expected) > allowed:
+                violations.append(PlanViolation(
+                    code="travel_time",
+                    message=(f"Дорога до «{item.event_name}» ({mode}): в плане {item.travel_time_minutes} мин, "
+                             f"по маршрутам ≈{expected:.0f} мин"),
+                    item_index=i,
+                ))
+        return violations
+
+    @staticmethod
+    def _event_index(name: str, events: Sequence[Event]) -> Optional[int]:
+        for i, event in enumerate(events):
+            if _same_name(name, event.title):
+                return i
+        return None
@@ -35,7 +35,8 @@ from src.sync_worker.db_channels import (
 from src.sync_worker.sync_service import ChannelSyncServiceAsync
 from src.sync_worker.tg_parser import TelegramParser
 from src.sync_worker.event_miner_agent import EventMinerAgent
-from src.vdb import get_weaviate_client, create_collection_if_not_exists, COLLECTION_NAME
+from src.vdb import create_collection_if_not_exists, COLLECTION_NAME
+from src.vdb.client import close_shared_clients, get_shared_client, open_shared_clients
 from utils.journey_llm import JourneyLLM
 
 
@@ -85,6 +86,15 @@ async def startup_event():
     """Инициализация при старте приложения."""
     init_db(settings.db_path, seed_test_channels=settings.seed_test_channels)
     print(f"✅ База данных инициализирована: {settings.db_path}")
+    # соединение с Weaviate — один раз на процесс, а не в каждом запросе
+    if await asyncio.to_thread(open_shared_clients):
+        print("✅ Подключение к Weaviate установлено")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Закрытие общих соединений при остановке приложения."""
+    close_shared_clients()
 
 
 @app.get("/", tags=["Health"])
@@ -353,7 +363,7 @@ async def get_weaviate_stats() -> Dict[str, Any]:
     Показывает количество объектов в коллекции и последние добавленные события.
     """
     try:
-        weaviate_client = get_weaviate_client()
+        weaviate_client = get_shared_client()
         collection = weaviate_client.collections.get(COLLECTION_NAME)
         
         # Получаем общее количество объектов
@@ -402,7 +412,7 @@ async def _run_sync_task():
         
         # Подключаемся к Weaviate
         logger.info(f"🔧 [SYNC] Подключение к Weaviate: {settings.weaviate_url}")
-        weaviate_client = get_weaviate_client()
+        weaviate_client = get_shared_client()
         create_collection_if_not_exists()
         collection = weaviate_client.collections.get(COLLECTION_NAME)
         logger.info(f"✅ [SYNC] Подключено к коллекции: {COLLECTION_NAME}")
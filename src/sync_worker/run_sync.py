@@ -28,6 +28,7 @@ from src.sync_worker.db_channels import init_db
 from src.sync_worker.tg_parser import TelegramParser
 from src.sync_worker.event_miner_agent import EventMinerAgent
 from src.sync_worker.weaviate_integration import get_weaviate_client_and_collection
+from src.vdb.client import close_shared_clients
 from src.sync_worker.sync_service import ChannelSyncServiceAsync
 
 from src.utils.journey_llm import JourneyLLM
@@ -74,7 +75,7 @@ async def main_async() -> None:
         import traceback
         traceback.print_exc()
     finally:
-        client.close()
+        close_shared_clients()
         logger.info("👋 [SYNC-WORKER] Соединение с Weaviate закрыто")
 
 
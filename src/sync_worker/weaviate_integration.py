@@ -6,10 +6,18 @@ from typing import List, Optional
 import weaviate
 from weaviate.collections import Collection
 
-from src.vdb import get_weaviate_client, create_collection_if_not_exists
+from src.vdb import create_collection_if_not_exists
+from src.vdb.utils.add_events import event_properties
+from src.vdb.client import get_shared_client
 from src.vdb import COLLECTION_NAME
-from src.models.event import Event as VectorEvent
+from src.models.event import Event as VectorEvent, GeoCoordinates
 from src.sync_worker.event_miner_agent import Event as ExtractedEvent
+from src.utils.cities import city_from_text, normalize_city
+from src.utils.event_dates import parse_event_dates
+from src.utils.maps import flush_venue_cache, geocode_venue
+from src.vdb.rag.memory import get_query_memory
+from src.vdb.rag.retriever import bump_retrieval_generation
+from src.vdb.embeddings import CachedEmbeddings, as_cached, embed_events, get_embedder
 
 # Настройка логирования
 logger = logging.getLogger("sync-weaviate")
@@ -19,9 +27,9 @@ def get_weaviate_client_and_collection(
     force_recreate: bool = False,
 ) -> tuple[weaviate.WeaviateClient, Collection]:
     """
-    Обёртка: получаем клиент и коллекцию Weaviate
+    Обёртка: получаем общий клиент процесса и коллекцию Weaviate
     """
-    client = get_weaviate_client()
+    client = get_shared_client()
     create_collection_if_not_exists()
     collection = client.collections.get(COLLECTION_NAME)
     return client, collection
@@ -71,12 +79,23 @@ class EventVectorMapper:
         # 5. location
         location = extracted.location
 
+        # 5.1 нормализованный город (для фильтра в Weaviate)
+        city = normalize_city(getattr(extracted, "city", None)) or city_from_text(location)
+
+        # 5.2 координаты места (геокодируется один раз, кэш в data/cache/venues.json)
+        is_offline_place = bool(location) and extracted.is_online is not True and "://" not in location
+        point = geocode_venue(location, city) if is_offline_place else None
+        coords = GeoCoordinates(latitude=point[1], longitude=point[0]) if point else None
+
         # 6. date/time → одна строка
         if extracted.date and extracted.time:
             date_str = f"{extracted.date} {extracted.time}"
         else:
             date_str = extracted.date or None
 
+        # 6.1 числовые метки для фильтра по датам (DATE в Weaviate)
+        start_ts, end_ts = parse_event_dates(date_str)
+
         # 7. url (если знаем канал и message_id)
         url: Optional[str] = None
         if channel_username and extracted.source_message_id:
@@ -97,8 +116,12 @@ class EventVectorMapper:
             source=vector_source,
             country=vector_country,
             location=location,
+            city=city,
             date=date_str,
+            start_ts=start_ts,
+            end_ts=end_ts,
             url=url,
+            coords=coords,
         )
 
     @classmethod
@@ -114,7 +137,7 @@ class EventVectorMapper:
         Преобразует список ExtractedEvent → список VectorEvent.
         Поддерживает параметр channel_username (нужен для формирования URL).
         """
-        return [
+        events = [
             cls.to_vector_event(
                 e,
                 owner_username=owner_username,
@@ -124,15 +147,21 @@ class EventVectorMapper:
             )
             for e in extracted_events
         ]
+        flush_venue_cache()
+        return events
 
 
 def upload_events_to_collection(
     collection: Collection,
     events: List[VectorEvent],
     username: str,
+    embedder: Optional[CachedEmbeddings] = None,
 ) -> None:
     """
     Загружает события в Weaviate-коллекцию с тегом юзернэйма.
+
+    С эмбеддером (по умолчанию get_embedder()) векторы считает клиент;
+    неизменённые события берутся из кэша эмбеддингов.
     """
     if not events:
         logger.info(f"📭 [WEAVIATE] Нет событий для загрузки (username={username})")
@@ -140,16 +169,19 @@ def upload_events_to_collection(
 
     logger.info(f"📤 [WEAVIATE] Начинаем загрузку {len(events)} событий в коллекцию (username={username})")
     
+    embedder = as_cached(embedder) or get_embedder()
+    vectors = embed_events(events, embedder) if embedder is not None else None
+
     uploaded_count = 0
     with collection.batch.dynamic() as batch:
-        for ev in events:
-            data = ev.model_dump()
+        for i, ev in enumerate(events):
+            data = event_properties(ev)
             tags = list(data.get("tags") or [])
             if username not in tags:
                 tags.append(username)
             data["tags"] = tags
 
-            batch.add_object(properties=data)
+            batch.add_object(properties=data, vector=vectors[i].tolist() if vectors is not None else None)
             uploaded_count += 1
             
             # Логируем каждое событие
@@ -157,4 +189,11 @@ def upload_events_to_collection(
             logger.debug(f"  📝 [WEAVIATE] Добавлено: {title}...")
     
     logger.info(f"✅ [WEAVIATE] Успешно загружено {uploaded_count} событий в базу данных")
+    # закэшированные результаты поиска больше не актуальны
+    bump_retrieval_generation()
+
+    # Новые события делают устаревшими сохранённые ответы Self-RAG по этим городам и этому пользователю
+    memory = get_query_memory()
+    if memory is not None:
+        memory.invalidate(cities=[ev.city for ev in events], owners=[username])
     logger.info(f"📊 [WEAVIATE] Теги событий: {username}, source=telegram")
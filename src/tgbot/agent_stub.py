@@ -3,7 +3,7 @@
 """
 from typing import Dict, Any
 
-from src.main_pipeline import main_pipeline
+from src.main_pipeline import main_pipeline, amain_pipeline
 
 
 def process_route_request(prompt: str, username: str, conversation_history: list = None) -> Dict[str, Any]:
@@ -36,3 +36,35 @@ def process_route_request(prompt: str, username: str, conversation_history: list
             "response": f"Произошла ошибка при обработке вашего запроса: {str(e)}",
             "status": "error"
         }
+
+
+async def aprocess_route_request(prompt: str, username: str, conversation_history: list = None) -> Dict[str, Any]:
+    """
+    Асинхронная версия process_route_request (для обработчиков бота).
+    
+    Args:
+        prompt: Промпт от пользователя
+        username: Имя пользователя (используется как user_id для фильтрации событий)
+        conversation_history: История диалога (опционально, пока не используется)
+    
+    Returns:
+        Словарь с результатом обработки
+    """
+    try:
+        response = await amain_pipeline(prompt)
+
+        return {
+            "response": response,
+            "status": "success"
+        }
+    
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"❌ Ошибка при обработке запроса: {e}")
+        print(error_trace)
+        
+        return {
+            "response": f"Произошла ошибка при обработке вашего запроса: {str(e)}",
+            "status": "error"
+        }
@@ -1,5 +1,6 @@
 import os
 import sys
+import asyncio
 import logging
 from pathlib import Path
 
@@ -19,9 +20,12 @@ from aiogram.fsm.storage.memory import MemoryStorage
 
 # Импорты модулей бота
 from src.tgbot.database import Database
-from src.tgbot.agent_stub import process_route_request
+from src.tgbot.agent_stub import aprocess_route_request
 from src.utils.safety import moderate_text, SafetyLabel
 from src.utils.paths import project_root
+from src.utils.http_session import close_http_session
+from src.vdb.client import close_shared_clients
+from src.graph_registry import get_graph_registry, warmup_graphs
 
 # URL для sync API (в Docker - имя сервиса, локально - localhost)
 SYNC_API_URL = os.getenv("SYNC_API_URL", "http://api:8000")
@@ -262,7 +266,7 @@ async def handle_route_creation(message: Message, state: FSMContext):
     message_text = message.text
 
     # Toxic INPUT guardrail
-    decision = moderate_text(message_text, context="user_input")
+    decision = await asyncio.to_thread(moderate_text, message_text, context="user_input")
     if decision.label == SafetyLabel.block:
         await message.answer(
             "Я не могу помочь с запросом, содержащим токсичный/опасный контент. "
@@ -288,7 +292,7 @@ async def handle_route_creation(message: Message, state: FSMContext):
     
     # Отправляем в заглушку агентской системы
     username = user.username or user.first_name
-    result = process_route_request(
+    result = await aprocess_route_request(
         prompt=message_text,
         username=username,
         conversation_history=history
@@ -358,11 +362,19 @@ async def main():
     # Обработчик для сообщений вне активной сессии (должен быть последним)
     dp.message.register(handle_unknown_message)
     
+    # Графы и соединение с Weaviate готовим до первого запроса пользователя
+    await asyncio.to_thread(warmup_graphs)
+
     # Запускаем бота
     logger.info("Бот запущен...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for kind, stats in get_graph_registry().latency_report().items():
+            logger.info(f"Запросы ({kind}): {stats['count']}, среднее {stats['avg']:.2f} с, p50 {stats['p50']:.2f} с, макс {stats['max']:.2f} с")
+        await close_http_session()
+        close_shared_clients()
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Нормализация названий городов.
+
+Одна и та же функция используется при загрузке событий (свойство city в Weaviate)
+и при поиске (город из запроса пользователя), чтобы фильтр city == Y
+сравнивал одинаково записанные значения. Формы городов (падежи, сленг, коды
+KudaGo) описаны в газеттире src.utils.gazetteer.
+"""
+import re
+from typing import Optional
+
+from src.utils.gazetteer import find_cities, match_city
+
+
+_PREFIX_RE = re.compile(r"^(?:г\.|г |город )\s*")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _clean(text: str) -> str:
+    text = text.strip().lower().replace("ё", "е")
+    text = _SPACES_RE.sub(" ", text)
+    return _PREFIX_RE.sub("", text).strip(" .,")
+
+
+def normalize_city(name: Optional[str]) -> Optional[str]:
+    """
+    Приводит название города к каноническому виду ("Питер" -> "санкт-петербург").
+
+    Неизвестные города возвращаются очищенными (нижний регистр, ё → е),
+    чтобы точное сравнение всё равно работало.
+    """
+    if not name:
+        return None
+    text = _clean(name)
+    if not text:
+        return None
+    return match_city(text) or text
+
+
+def city_from_text(text: Optional[str]) -> Optional[str]:
+    """Ищет известный город в произвольном тексте (адрес, описание). None — не найден."""
+    return next((city for city in find_cities(text) if city), None)
@@ -0,0 +1,248 @@
+"""
+Локальный разбор ограничений планирования из запроса (RU/EN).
+
+Достаёт start_time, end_time, max_total_time_minutes, budget и preferred_transport
+регулярными выражениями. LLM (CONSTRAINTS_EXTRACTION_PROMPT) спрашивается только о
+полях из ParsedConstraints.missing — тех, на которые в запросе есть признаки (лишние
+числа, слова "бюджет", "транспорт", "с детьми", "без алкоголя" и т.п.), но разобрать их
+не удалось. other_constraints локально не разбираются и попадают в missing по признакам.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import time
+from typing import List, Optional, Tuple
+
+from src.planner_agent.models import Constraints
+
+
+_HOUR_MODIFIERS = {
+    "утра": 0, "am": 0, "ночи": 0,
+    "дня": 12, "вечера": 12, "pm": 12,
+}
+
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?(?:\s*(?:ч\.?|час(?:а|ов)?|h))?(?:\s*(утра|дня|вечера|ночи|am|pm))?"
+_TIME_STRICT = r"(\d{1,2})[:.](\d{2})(?:\s*(am|pm))?"
+# число с единицей измерения — не время: "до 10 лет", "с 5 до 12 лет", "до 3000 рублей"
+_UNIT = (
+    r"(?:лет|год\w*|мес\w*|км|м(?!\w)|метр\w*|руб\w*|р\.|₽|\$|%|процент\w*"
+    r"|человек\w*|чел\b|мест\w*|шт\w*|раз\w*|минут\w*|мин\b|years?|km|rub\w*|people|persons?)"
+)
+_NOT_UNIT = rf"(?!\d)(?!\s*(?:(?:до|по|to|-|–|—)\s*\d+\s*)?{_UNIT})"
+_RANGE_RE = re.compile(rf"(?<!\w)(?:с|from|between)\s+{_TIME}\s*(?:до|по|to|till|until|and|-|–|—)\s*{_TIME}{_NOT_UNIT}")
+_DASH_RANGE_RE = re.compile(rf"(?<![\w:.]){_TIME_STRICT}\s*[-–—]\s*{_TIME}(?!\d)")
+_START_PATTERNS: List[re.Pattern] = [
+    re.compile(rf"(?<!\w)(?:начиная\s+с|начать\s+в|с|после|from|after|start(?:ing)?\s+at)\s+{_TIME}{_NOT_UNIT}"),
+    re.compile(rf"(?<!\w)(?:в|at)\s+{_TIME_STRICT}(?!\d)"),
+    re.compile(r"(?<!\w)(?:в|at)\s+(\d{1,2})()\s*(?:час(?:а|ов)?\s*)?(утра|дня|вечера|ночи|am|pm)(?!\w)"),
+]
+_END_RE = re.compile(rf"(?<!\w)(?:до|не\s+позже|не\s+позднее|к|until|till|by|before)\s+{_TIME}{_NOT_UNIT}")
+
+_NUMBER_WORDS = {
+    "полчаса": 30, "час": 60, "часик": 60, "полтора часа": 90, "пару часов": 120, "пару часиков": 120,
+    "два часа": 120, "три часа": 180, "четыре часа": 240, "пять часов": 300, "шесть часов": 360,
+    "an hour": 60, "one hour": 60, "half an hour": 30, "two hours": 120, "three hours": 180,
+    "couple of hours": 120, "a couple of hours": 120,
+}
+_DURATION_PREFIX = r"(?:на|за|не\s+более|не\s+больше|максимум|в\s+течение|около|примерно|всего|for|up\s+to|within|max(?:imum)?|about)"
+_DURATION_RE = re.compile(
+    rf"(?<!\w){_DURATION_PREFIX}\s+(\d+(?:[.,]\d+)?)\s*(час(?:а|ов)?|ч\.?|hours?|hrs?|h|минут[уы]?|мин\.?|minutes?|mins?)(?!\w)"
+    rf"|(?<!\w)(\d+(?:[.,]\d+)?)\s*(часа|часов|hours|минут|minutes)(?!\w)"
+)
+_DURATION_WORDS_RE = re.compile(
+    rf"(?<!\w){_DURATION_PREFIX}\s+({'|'.join(sorted(map(re.escape, _NUMBER_WORDS), key=len, reverse=True))})(?!\w)"
+)
+
+_CURRENCY = r"(?:руб(?:\.|лей|ля|ль)?|р\.|₽|rub(?:les?)?|rur)"
+_AMOUNT = r"(\d[\d\s]*(?:[.,]\d+)?)\s*(к|k|тыс\.?|тысяч[иа]?)?"
+_BUDGET_RE = re.compile(
+    rf"(?<!\w)(?:бюджет\w*|budget|потратить|spend)\s*(?:[:\-—]|в|до|около|примерно|не\s+более|максимум|up\s+to|of|about|is)*\s*{_AMOUNT}(?:\s*{_CURRENCY})?"
+    rf"|(?<![\w:.]){_AMOUNT}\s*{_CURRENCY}(?!\w)"
+)
+_FREE_RE = re.compile(r"(?<!\w)(?:бесплатн\w*|for free|free of charge)")
+
+# (регэксп, значение preferred_transport) — значения понимает scheduler.normalize_transport
+_TRANSPORT_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"(?<!\w)(?:пешком|пешая|пешеходн\w*|on foot|walking|by walk)(?!\w)"), "пешком"),
+    (re.compile(r"(?<!\w)(?:такси|taxi|uber|яндекс\s*го)(?!\w)"), "такси"),
+    (re.compile(r"(?<!\w)(?:на\s+машин\w*|на\s+авто\w*|автомобил\w*|by car|driving)(?!\w)"), "автомобиль"),
+    (re.compile(
+        r"(?<!\w)(?:метро|metro|subway|автобус\w*|трамва\w*|троллейбус\w*|общественн\w*\s+транспорт\w*|public transport|by bus)(?!\w)"
+    ), "общественный транспорт"),
+    (re.compile(r"(?<!\w)(?:велосипед\w*|на\s+велике|by bike|bicycle)(?!\w)"), "велосипед"),
+]
+
+# Признаки поля, которое не удалось разобрать локально — тогда поле уходит в LLM
+_BUDGET_CUE_RE = re.compile(r"(?<!\w)(?:бюджет\w*|руб\w*|₽|денег|деньги|дешев\w*|недорог\w*|budget|cheap\w*|money)")
+_DURATION_CUE_RE = re.compile(r"(?<!\w)(?:час\w*|минут\w*|hours?|minutes?)(?!\w)")
+_TRANSPORT_CUE_RE = re.compile(r"(?<!\w)(?:транспорт\w*|доехать|добира\w*|ехать|поедем|transport|drive)(?!\w)")
+# other_constraints: дети, питание, доступность, животные, погода, исключения ("без", "кроме", "не люблю")
+_OTHER_CUE_RE = re.compile(
+    r"(?<!\w)(?:дет\w*|ребен\w*|ребят\w*|малыш\w*|подрост\w*|школьник\w*|семь[еияю]\w*|пожил\w*"
+    r"|бабушк\w*|дедушк\w*|алкогол\w*|трезв\w*|веган\w*|вегетариан\w*|халял\w*|кошерн\w*|аллерг\w*"
+    r"|коляск\w*|инвалид\w*|доступн\w*\s+сред\w*|собак\w*|питом\w*|животн\w*"
+    r"|в\s+помещени\w*|на\s+улиц\w*|под\s+крыш\w*|дожд\w*|тих\w*|без|кроме|избега\w*"
+    r"|не\s+(?:люблю|хочу|надо|нужн\w*|подходит)"
+    r"|kids?|child\w*|famil\w*|elderly|alcohol\w*|sober|vegan|vegetarian|halal|kosher|allerg\w*"
+    r"|wheelchair|stroller|accessib\w*|dogs?|pets?|indoors?|outdoors?|rain\w*|quiet|without|except|avoid\w*"
+    r"|no\s+\w+|don'?t\s+(?:like|want))(?!\w)"
+)
+_DIGITS_RE = re.compile(r"\d+")
+
+NUMERIC_FIELDS = ("start_time", "end_time", "max_total_time_minutes", "budget")
+
+
+@dataclass
+class ParsedConstraints:
+    """Результат локального разбора: найденные ограничения и поля, которые нужно спросить у LLM."""
+    constraints: Constraints
+    found: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def needs_llm(self) -> bool:
+        """Нужен ли вызов LLM в extract_constraints_node (есть поля, не разобранные локально)."""
+        return bool(self.missing)
+
+
+def _prepare(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").lower().replace("ё", "е")).strip()
+
+
+def _make_time(hour: str, minute: Optional[str], modifier: Optional[str]) -> Optional[time]:
+    h, m = int(hour), int(minute or 0)
+    if modifier and h < 12:
+        h += _HOUR_MODIFIERS.get(modifier, 0)
+    if h == 24 and m == 0:
+        return time(23, 59)
+    if h > 23 or m > 59:
+        return None
+    return time(h, m)
+
+
+def _to_number(value: str) -> float:
+    return float(value.replace(" ", "").replace(",", "."))
+
+
+class _Spans:
+    """Занятые участки текста: одно число не должно разбираться двумя правилами."""
+
+    def __init__(self):
+        self._spans: List[Tuple[int, int]] = []
+
+    def free(self, match: re.Match) -> bool:
+        start, end = match.span()
+        return all(end <= s or start >= e for s, e in self._spans)
+
+    def take(self, match: re.Match) -> None:
+        self._spans.append(match.span())
+
+    def covers(self, pos: int) -> bool:
+        return any(s <= pos < e for s, e in self._spans)
+
+
+def _parse_times(text: str, spans: _Spans) -> Tuple[Optional[time], Optional[time]]:
+    for regex in (_RANGE_RE, _DASH_RANGE_RE):
+        for match in regex.finditer(text):
+            if not spans.free(match):
+                continue
+            h1, m1, mod1, h2, m2, mod2 = match.groups()
+            if mod1 is None and mod2 in ("дня", "вечера", "pm") and int(h1) <= int(h2):
+                mod1 = mod2  # "с 3 до 5 вечера"
+            start, end = _make_time(h1, m1, mod1), _make_time(h2, m2, mod2)
+            if start and end:
+                spans.take(match)
+                return start, end
+
+    start = end = None
+    for match in (m for regex in _START_PATTERNS for m in regex.finditer(text)):
+        if spans.free(match):
+            start = _make_time(*match.groups())
+            if start:
+                spans.take(match)
+                break
+    for match in _END_RE.finditer(text):
+        if not spans.free(match):
+            continue
+        end = _make_time(*match.groups())
+        if end:
+            spans.take(match)
+            break
+    return start, end
+
+
+def _parse_duration(text: str, spans: _Spans) -> Optional[int]:
+    for match in _DURATION_RE.finditer(text):
+        if not spans.free(match):
+            continue
+        value, unit = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        minutes = _to_number(value) * (1 if unit.startswith(("мин", "min")) else 60)
+        spans.take(match)
+        return int(round(minutes))
+    for match in _DURATION_WORDS_RE.finditer(text):
+        if spans.free(match):
+            spans.take(match)
+            return _NUMBER_WORDS[match.group(1)]
+    return None
+
+
+def _parse_budget(text: str, spans: _Spans) -> Optional[float]:
+    for match in _BUDGET_RE.finditer(text):
+        if not spans.free(match):
+            continue
+        value, multiplier = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        amount = _to_number(value) * (1000 if multiplier else 1)
+        spans.take(match)
+        return amount
+    if _FREE_RE.search(text):
+        return 0.0
+    return None
+
+
+def _parse_transport(text: str) -> Optional[str]:
+    for regex, value in _TRANSPORT_PATTERNS:
+        if regex.search(text):
+            return value
+    return None
+
+
+def parse_constraints(user_query: str) -> ParsedConstraints:
+    """
+    Разбирает ограничения из запроса без LLM.
+
+    Returns:
+        ParsedConstraints: constraints с найденными полями, found — их имена,
+        missing — поля, на которые есть признаки в тексте, но значение не разобрано
+    """
+    text = _prepare(user_query)
+    spans = _Spans()
+
+    start_time, end_time = _parse_times(text, spans)
+    values = {
+        "start_time": start_time,
+        "end_time": end_time,
+        "max_total_time_minutes": _parse_duration(text, spans),
+        "budget": _parse_budget(text, spans),
+        "preferred_transport": _parse_transport(text),
+    }
+    found = [name for name, value in values.items() if value is not None]
+
+    def has_cue(regex: re.Pattern) -> bool:
+        return any(not spans.covers(m.start()) for m in regex.finditer(text))
+
+    missing = []
+    if has_cue(_DIGITS_RE):
+        missing.extend(name for name in NUMERIC_FIELDS if values[name] is None)
+    if values["budget"] is None and has_cue(_BUDGET_CUE_RE):
+        missing.append("budget")
+    if values["max_total_time_minutes"] is None and has_cue(_DURATION_CUE_RE):
+        missing.append("max_total_time_minutes")
+    if values["preferred_transport"] is None and has_cue(_TRANSPORT_CUE_RE):
+        missing.append("preferred_transport")
+    if has_cue(_OTHER_CUE_RE):
+        missing.append("other_constraints")
+
+    return ParsedConstraints(
+        constraints=Constraints(**{k: v for k, v in values.items() if v is not None}),
+        found=found,
+        missing=list(dict.fromkeys(missing)),
+    )
@@ -0,0 +1,212 @@
+"""
+Даты событий: числовые метки start_ts / end_ts и окно дат из запроса (RU/EN).
+
+parse_event_dates разбирает строку даты события ("2025-12-27 17:00 - 2025-12-27 21:00")
+в пару datetime с часовым поясом — их Weaviate хранит как DATE и фильтрует по диапазону.
+parse_date_window достаёт из запроса окно дат ("на выходных", "в субботу", "27 декабря")
+без LLM; результат имеет приоритет над QueryUnderstanding.date_from / date_to.
+"""
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+
+# Часовой пояс дат без явного пояса (Telegram-события: "YYYY-MM-DD HH:MM")
+EVENTS_TZ: tzinfo = ZoneInfo(os.getenv("EVENTS_TIMEZONE", "Europe/Moscow"))
+
+_EVENT_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{1,2}):(\d{2}))?")
+
+# Формы дней недели (без "среди" / "средний" и т.п.)
+_WEEKDAYS = {
+    "понедельник": 0, "вторник": 1, "среда": 2, "среду": 2, "четверг": 3, "пятница": 4, "пятницу": 4,
+    "суббота": 5, "субботу": 5, "воскресенье": 6,
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+}
+_MONTHS = {
+    "январ": 1, "феврал": 2, "март": 3, "апрел": 4, "ма": 5, "июн": 6,
+    "июл": 7, "август": 8, "сентябр": 9, "октябр": 10, "ноябр": 11, "декабр": 12,
+}
+_RELATIVE_DAYS = {
+    "сегодня": 0, "today": 0, "tonight": 0,
+    "завтра": 1, "tomorrow": 1,
+    "послезавтра": 2,
+}
+
+_RELATIVE_RE = re.compile(rf"(?<!\w)({'|'.join(_RELATIVE_DAYS)})(?!\w)")
+_WEEKEND_RE = re.compile(r"(?<!\w)(?:(следующ\w*|next)\s+)?(?:выходны\w*|weekend)(?!\w)")
+_WEEK_RE = re.compile(r"(?<!\w)(?:на\s+)?(эт\w+|следующ\w*|this|next)\s+(?:недел\w*|week)(?!\w)")
+_WEEKDAY_RE = re.compile(
+    rf"(?<!\w)(?:(?:в|во|on)\s+)?(?:(следующ\w*|next)\s+)?({'|'.join(_WEEKDAYS)})(?!\w)"
+)
+# "27.12" / "27.12.2025"; не время ("в 12.10") и не сумма/длительность ("1.5 часа", "2.5к")
+_NUMERIC_DATE_RE = re.compile(
+    r"(?<![\d.:])(?<!в )(?<!к )(?<!at )(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?"
+    r"(?![\d:])(?!\s*(?:к|k|тыс|ч|h|мин|руб|р\.|₽))"
+)
+_TEXT_DATE_RE = re.compile(
+    r"(?<!\w)(\d{1,2})\s+(январ\w*|феврал\w*|март\w*|апрел\w*|ма[йя]|июн\w*|июл\w*|август\w*|сентябр\w*"
+    r"|октябр\w*|ноябр\w*|декабр\w*)(?:\s+(\d{4}))?(?!\w)"
+)
+
+DateWindow = Tuple[date, date]
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=EVENTS_TZ)
+
+
+def day_start(day: date) -> datetime:
+    """Начало дня в часовом поясе событий."""
+    return datetime.combine(day, time.min, tzinfo=EVENTS_TZ)
+
+
+def day_end(day: date) -> datetime:
+    """Конец дня в часовом поясе событий."""
+    return datetime.combine(day, time.max, tzinfo=EVENTS_TZ)
+
+
+def to_minutes(t: time) -> int:
+    """Минуты от полуночи (время в расписании и ограничениях)."""
+    return t.hour * 60 + t.minute
+
+
+def from_timestamp(timestamp: Optional[int]) -> Optional[datetime]:
+    """Unix timestamp (KudaGo) → datetime с часовым поясом."""
+    if not timestamp or timestamp < 0 or timestamp > 253370754000:
+        return None
+    try:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    except (ValueError, OSError, OverflowError):
+        return None
+
+
+def parse_event_dates(text: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Разбирает строку даты события в (start_ts, end_ts).
+
+    "2025-12-27 17:00 - 2025-12-27 21:00" → начало и конец;
+    "2025-12-27 17:00" → конец совпадает с началом;
+    "2025-12-27" → весь день.
+
+    Returns:
+        (start_ts, end_ts) с часовым поясом или (None, None)
+    """
+    stamps = []
+    for match in _EVENT_DATE_RE.finditer(text or ""):
+        year, month, day, hour, minute = match.groups()
+        try:
+            day_value = date(int(year), int(month), int(day))
+            if hour is None:
+                stamps.append((day_start(day_value), day_end(day_value)))
+            else:
+                moment = datetime.combine(day_value, time(int(hour), int(minute)), tzinfo=EVENTS_TZ)
+                stamps.append((moment, moment))
+        except ValueError:
+            continue
+        if len(stamps) == 2:
+            break
+
+    if not stamps:
+        return None, None
+    start, end = stamps[0][0], stamps[-1][1]
+    return (start, end) if end >= start else (start, stamps[0][1])
+
+
+def _next_weekday(today: date, weekday: int, skip_week: bool = False) -> date:
+    ahead = (weekday - today.weekday()) % 7
+    if skip_week:
+        ahead += 7
+    return today + timedelta(days=ahead)
+
+
+def _upcoming(today: date, month: int, day: int, year: Optional[int]) -> Optional[date]:
+    """Дата без года — ближайшая будущая (в декабре "5 января" — следующий год)."""
+    try:
+        if year is not None:
+            return date(year + 2000 if year < 100 else year, month, day)
+        candidate = date(today.year, month, day)
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def parse_date_window(user_query: str, today: Optional[date] = None) -> Optional[DateWindow]:
+    """
+    Окно дат из запроса без LLM.
+
+    Понимает "сегодня/завтра/послезавтра", "на (следующих) выходных",
+    "на этой/следующей неделе", дни недели ("в субботу"), "27.12", "27 декабря".
+
+    Returns:
+        (date_from, date_to) или None, если даты в запросе не найдены
+    """
+    today = today or datetime.now(EVENTS_TZ).date()
+    text = re.sub(r"\s+", " ", (user_query or "").lower().replace("ё", "е"))
+
+    dates = []
+    for match in _NUMERIC_DATE_RE.finditer(text):
+        day, month, year = match.groups()
+        dates.append(_upcoming(today, int(month), int(day), int(year) if year else None))
+    for match in _TEXT_DATE_RE.finditer(text):
+        day, month, year = match.groups()
+        month = next(n for stem, n in _MONTHS.items() if month.startswith(stem))
+        dates.append(_upcoming(today, month, int(day), int(year) if year else None))
+    dates = [d for d in dates if d is not None]
+    if dates:
+        return min(dates), max(dates)
+
+    match = _WEEKEND_RE.search(text)
+    if match:
+        saturday = _next_weekday(today, 5, skip_week=bool(match.group(1)))
+        if today.weekday() == 6 and not match.group(1):
+            return today, today  # "на выходных" в воскресенье — сегодня
+        return saturday, saturday + timedelta(days=1)
+
+    match = _WEEK_RE.search(text)
+    if match:
+        monday = today - timedelta(days=today.weekday())
+        if match.group(1).startswith(("следующ", "next")):
+            monday += timedelta(days=7)
+        return max(monday, today), monday + timedelta(days=6)
+
+    match = _WEEKDAY_RE.search(text)
+    if match:
+        day = _next_weekday(today, _WEEKDAYS[match.group(2)], skip_week=bool(match.group(1)))
+        return day, day
+
+    match = _RELATIVE_RE.search(text)
+    if match:
+        day = today + timedelta(days=_RELATIVE_DAYS[match.group(1)])
+        return day, day
+
+    return None
+
+
+def window_bounds(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    now: Optional[datetime] = None,
+    upcoming_only: bool = True,
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Границы окна поиска: событие подходит, если end_ts >= lower и start_ts <= upper.
+
+    С upcoming_only нижняя граница не раньше текущего момента — прошедшие события отсекаются.
+    """
+    lower = day_start(date_from) if date_from else None
+    if upcoming_only:
+        now = _aware(now) if now else datetime.now(EVENTS_TZ)
+        lower = max(lower, now) if lower else now
+    upper = day_end(date_to or date_from) if (date_to or date_from) else None
+    return lower, upper
+
+
+def in_window(start_ts: Optional[datetime], end_ts: Optional[datetime], lower, upper) -> bool:
+    """Локальная проверка окна; события без дат проходят (прошедшими их не признать)."""
+    if start_ts is None and end_ts is None:
+        return True
+    end_ts = _aware(end_ts or start_ts)
+    start_ts = _aware(start_ts or end_ts)
+    return (lower is None or end_ts >= lower) and (upper is None or start_ts <= upper)
@@ -0,0 +1,156 @@
+"""
+Локальный газеттир городов России.
+
+Один предкомпилированный регэксп по всем формам: официальные названия,
+падежные формы ("в Москве", "по Питеру"), сленг и коды KudaGo ("мск", "спб").
+Используется до LLM: extract_city_node обращается к модели только если
+город не найден или найдено несколько разных городов.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# Каноническое название -> регэкспы форм (текст заранее в нижнем регистре, ё → е)
+CITY_PATTERNS: Dict[str, List[str]] = {
+    "москва": [r"москв(?:а|ы|е|у|ой|ою)", r"мск", r"msk", r"moscow", r"маскв(?:а|ы|е|у|ой)"],
+    "санкт-петербург": [
+        r"санкт[- ]петербург(?:а|е|у|ом)?",
+        r"петербург(?:а|е|у|ом)?",
+        r"питер(?:а|е|у|ом)?",
+        r"спб",
+        r"spb",
+        r"saint[- ]petersburg",
+        r"st\.? ?petersburg",
+        r"северн(?:ая|ой|ую) столиц(?:а|ы|е|у|ей)",
+        r"ленинград(?:а|е|у|ом)?",
+    ],
+    "екатеринбург": [r"екатеринбург(?:а|е|у|ом)?", r"екб", r"ekb", r"ебург(?:а|е|у|ом)?"],
+    "казань": [r"казан(?:ь|и|ью)", r"kzn"],
+    "новосибирск": [r"новосибирск(?:а|е|у|ом)?", r"новосиб(?:а|е|у|ом)?", r"nsk"],
+    "нижний новгород": [r"нижн(?:ий|его|ем|ему|им) новгород(?:а|е|у|ом)?", r"nnv"],
+    "самара": [r"самар(?:а|ы|е|у|ой)", r"smr"],
+    "краснодар": [r"краснодар(?:а|е|у|ом)?", r"krd"],
+    "сочи": [r"сочи", r"sochi"],
+    "калининград": [r"калининград(?:а|е|у|ом)?"],
+    "владивосток": [r"владивосток(?:а|е|у|ом)?", r"владик(?:а|е|у|ом)?"],
+    "ростов-на-дону": [r"ростов(?:а|е|у|ом)?[- ]на[- ]дону", r"ростов(?:а|е|у|ом)?"],
+    "уфа": [r"уф(?:а|ы|е|у|ой)"],
+    "пермь": [r"перм(?:ь|и|ью)"],
+    "воронеж": [r"воронеж(?:а|е|у|ем)?"],
+    "волгоград": [r"волгоград(?:а|е|у|ом)?"],
+    "красноярск": [r"красноярск(?:а|е|у|ом)?"],
+    "омск": [r"омск(?:а|е|у|ом)?"],
+    "челябинск": [r"челябинск(?:а|е|у|ом)?", r"челяб(?:а|е|у|ой|ы)"],
+    "тула": [r"тул(?:а|ы|е|у|ой)"],
+    "ярославль": [r"ярославл(?:ь|я|е|ю|ем)"],
+    "великий новгород": [r"велик(?:ий|ого|ом) новгород(?:а|е|у|ом)?"],
+}
+
+# Формы, которые сами по себе не определяют город ("новгород" — Нижний или Великий)
+AMBIGUOUS_PATTERNS: List[str] = [r"новгород(?:а|е|у|ом)?"]
+
+_BOUNDARY_L = r"(?<![\w-])"
+_BOUNDARY_R = r"(?![\w-])"
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _build_regex() -> re.Pattern:
+    """Один регэксп с именованной группой на каждый город; длинные формы раньше коротких."""
+    parts = []
+    for i, (city, patterns) in enumerate(CITY_PATTERNS.items()):
+        alternatives = "|".join(sorted(patterns, key=len, reverse=True))
+        parts.append(f"(?P<c{i}>{alternatives})")
+    parts.append(f"(?P<ambiguous>{'|'.join(AMBIGUOUS_PATTERNS)})")
+    return re.compile(f"{_BOUNDARY_L}(?:{'|'.join(parts)}){_BOUNDARY_R}")
+
+
+_CITY_RE = _build_regex()
+_GROUP_TO_CITY = {f"c{i}": city for i, city in enumerate(CITY_PATTERNS)}
+
+
+def prepare_text(text: str) -> str:
+    """Нижний регистр, ё → е, схлопнутые пробелы."""
+    return _SPACES_RE.sub(" ", (text or "").lower().replace("ё", "е")).strip()
+
+
+def find_cities(text: Optional[str]) -> List[str]:
+    """
+    Все города, упомянутые в тексте, в порядке появления (без повторов).
+    Неоднозначная форма добавляет None в результат.
+    """
+    found: List[Optional[str]] = []
+    for match in _CITY_RE.finditer(prepare_text(text)):
+        city = _GROUP_TO_CITY.get(match.lastgroup)
+        if city not in found:
+            found.append(city)
+    return found
+
+
+def match_city(text: Optional[str]) -> Optional[str]:
+    """Каноническое название, если text целиком — одна из форм города."""
+    text = prepare_text(text)
+    match = _CITY_RE.fullmatch(text) if text else None
+    return _GROUP_TO_CITY.get(match.lastgroup) if match else None
+
+
+@dataclass
+class GazetteerResult:
+    """Результат поиска города в запросе."""
+    city: Optional[str]
+    candidates: List[Optional[str]] = field(default_factory=list)
+
+    @property
+    def is_hit(self) -> bool:
+        """Однозначно найден ровно один город — LLM не нужна."""
+        return self.city is not None
+
+    @property
+    def is_ambiguous(self) -> bool:
+        return len(self.candidates) > 1 or (len(self.candidates) == 1 and self.candidates[0] is None)
+
+
+class GazetteerStats:
+    """Потокобезопасные счётчики: сколько вызовов LLM сэкономил газеттир."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.ambiguous = 0
+        self.misses = 0
+
+    def record(self, result: GazetteerResult) -> None:
+        with self._lock:
+            if result.is_hit:
+                self.hits += 1
+            elif result.is_ambiguous:
+                self.ambiguous += 1
+            else:
+                self.misses += 1
+
+    @property
+    def total(self) -> int:
+        return self.hits + self.ambiguous + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.total if self.total else 0.0
+
+    def report(self) -> str:
+        return (
+            f"газеттир: попаданий {self.hits}/{self.total} ({self.hit_rate:.0%}), "
+            f"неоднозначно {self.ambiguous}, не найдено {self.misses}"
+        )
+
+
+gazetteer_stats = GazetteerStats()
+
+
+def extract_city(text: Optional[str]) -> GazetteerResult:
+    """Ищет город в запросе пользователя и учитывает результат в gazetteer_stats."""
+    candidates = find_cities(text)
+    city = candidates[0] if len(candidates) == 1 else None
+    result = GazetteerResult(city=city, candidates=candidates)
+    gazetteer_stats.record(result)
+    return result
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Optional
+
+import aiohttp
+
+
+# Одна aiohttp-сессия на event loop: соединения (keep-alive, DNS, TLS)
+# переиспользуются между всеми асинхронными клиентами (погода, геокодер, веб-поиск).
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """
+    Возвращает общую aiohttp-сессию для текущего event loop
+    (создаёт при первом обращении или если предыдущая закрыта).
+    """
+    loop = asyncio.get_running_loop()
+    session: Optional[aiohttp.ClientSession] = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession()
+        _sessions[loop] = session
+    return session
+
+
+async def close_http_session() -> None:
+    """Закрывает общую сессию текущего event loop (на shutdown бота/API)."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
@@ -27,6 +27,7 @@ class JourneyLLM:
     - поддерживает:
         * .invoke() / .stream() / .bind_tools() и т.п. (через __getattr__)
         * .parse(output_model, user_prompt, system_prompt, web_context)
+        * .aparse(...) — то же самое асинхронно
     """
 
     def __init__(
@@ -81,7 +82,45 @@ class JourneyLLM:
         Пример использования:
             result = llm.parse(MySchema, "Сделай расписание выходных")
         """
+        messages = self._build_messages(user_prompt, system_prompt, web_context)
+        return self.parse_messages(output_model, messages)
 
+    async def aparse(
+        self,
+        output_model: Type[T],
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        web_context: Optional[str] = None,
+    ) -> T:
+        """
+        Асинхронная версия parse (через ainvoke, не блокирует event loop).
+        Пример использования:
+            result = await llm.aparse(MySchema, "Сделай расписание выходных")
+        """
+        messages = self._build_messages(user_prompt, system_prompt, web_context)
+        return await self.aparse_messages(output_model, messages)
+
+    def parse_messages(self, output_model: Type[T], messages: List[BaseMessage]) -> T:
+        """
+        Структурированный ответ по готовой истории сообщений
+        (например, после цикла вызовов инструментов).
+        """
+        structured = self.llm.with_structured_output(output_model)
+        result: T = structured.invoke(messages)
+        return result
+
+    async def aparse_messages(self, output_model: Type[T], messages: List[BaseMessage]) -> T:
+        """Асинхронная версия parse_messages."""
+        structured = self.llm.with_structured_output(output_model)
+        result: T = await structured.ainvoke(messages)
+        return result
+
+    @staticmethod
+    def _build_messages(
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        web_context: Optional[str] = None,
+    ) -> List[BaseMessage]:
         messages: List[BaseMessage] = []
 
         if system_prompt:
@@ -98,10 +137,7 @@ class JourneyLLM:
             )
 
         messages.append(HumanMessage(content=user_prompt))
-
-        structured = self.llm.with_structured_output(output_model)
-        result: T = structured.invoke(messages)
-        return result
+        return messages
 
     def __getattr__(self, name: str) -> Any:
         """
@@ -116,3 +152,20 @@ class JourneyLLM:
             llm("привет")  или llm.invoke(...)
         """
         return self.llm(*args, **kwargs)
+
+
+def parse_structured(
+    llm: Any,
+    output_model: Type[T],
+    user_prompt: str,
+    system_prompt: Optional[str] = None,
+) -> T:
+    """
+    Структурированный ответ от JourneyLLM (через .parse) или от «голой»
+    LangChain chat-модели (через with_structured_output) — в графах Self-RAG
+    встречаются обе.
+    """
+    if isinstance(llm, JourneyLLM):
+        return llm.parse(output_model, user_prompt, system_prompt=system_prompt)
+    messages = JourneyLLM._build_messages(user_prompt, system_prompt)
+    return llm.with_structured_output(output_model).invoke(messages)
@@ -1,10 +1,21 @@
 import os
+import json
 import math
+import atexit
+import asyncio
+import tempfile
+import threading
 from dataclasses import dataclass, field
-from typing import Dict, Tuple, Literal, Optional
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Literal, Optional
 
+import aiohttp
+import numpy as np
 import requests
 
+from src.utils.http_session import get_http_session
+from src.utils.paths import DATA
+
 
 GeoPoint = Tuple[float, float]
 Mode = Literal["walking", "car", "bus"]
@@ -34,15 +45,98 @@ def haversine_distance_m(p1: GeoPoint, p2: GeoPoint) -> float:
     return R * c
 
 
+def haversine_matrix_m(points: np.ndarray) -> np.ndarray:
+    """
+    Матрица попарных геодезических расстояний (м) для массива точек.
+    points: массив формы (n, 2) с (lon, lat) в градусах; NaN даёт NaN в строке/столбце.
+    """
+    rad = np.radians(np.asarray(points, dtype=np.float64))
+    lon = rad[:, 0]
+    lat = rad[:, 1]
+
+    dlon = lon[None, :] - lon[:, None]
+    dlat = lat[None, :] - lat[:, None]
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    )
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    R = 6371000  # радиус Земли, м
+    return R * c
+
+
+def _nan_to_none(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """NumPy-матрица → вложенные списки (NaN → None), чтобы класть в состояние графа."""
+    return [[None if math.isnan(v) else float(v) for v in row] for row in matrix.tolist()]
+
+
 @dataclass
 class YandexGeocoder:
     geocoder_url: str = "https://geocode-maps.yandex.ru/1.x"
+    # JSON-файл кэша: адреса не геокодируются повторно между запусками (None — только в памяти)
+    cache_path: Optional[Path] = None
+    # файл переписывается целиком, поэтому не на каждый новый адрес, а раз в flush_every (и в flush())
+    flush_every: int = 50
+    # адрес -> (lon, lat) или None; каждый адрес геокодируется один раз за процесс
+    _cache: Dict[str, Optional[GeoPoint]] = field(default_factory=dict, repr=False)
+    # новые адреса, ещё не записанные в cache_path
+    _pending: int = field(default=0, repr=False)
+    # защищает только кэш и запись файла; HTTP-запросы идут без блокировки
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.cache_path is not None and self.cache_path.exists():
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    self._cache.update({a: tuple(p) if p else None for a, p in json.load(f).items()})
+            except (OSError, ValueError):
+                pass
+
+    def _remember(self, address: str, point: Optional[GeoPoint]) -> None:
+        with self._lock:
+            self._cache[address] = point
+            if self.cache_path is None:
+                return
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._write_cache()
+
+    def flush(self) -> None:
+        """Записать новые адреса в cache_path (в конце загрузки событий)."""
+        with self._lock:
+            self._write_cache()
+
+    def _write_cache(self) -> None:
+        """Атомарная запись кэша через уникальный временный файл; вызывается под self._lock."""
+        if self.cache_path is None or not self._pending:
+            return
+        tmp = None
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent, prefix=f".{self.cache_path.name}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
+            self._pending = 0
+        except OSError:
+            if tmp is not None and os.path.exists(tmp):
+                os.unlink(tmp)
 
     def adress_to_geopoint(self, address: str) -> Optional[GeoPoint]:
         """
         Преобразование адреса в геокоординаты.
         Возвращает (lon, lat) или None, если адрес не найден.
         """
+        if address in self._cache:
+            return self._cache[address]
+        point = self._request_geopoint(address)
+        self._remember(address, point)
+        return point
+
+    def _request_geopoint(self, address: str) -> Optional[GeoPoint]:
+        """Запрос к API геокодера без кэша."""
         api_key = os.getenv("YANDEX_GEOCODER_API_KEY")
         if not api_key:
             raise ValueError("YANDEX_GEOCODER_API_KEY не установлен в переменных окружения")
@@ -59,14 +153,7 @@ class YandexGeocoder:
             )
             resp.raise_for_status()
 
-            members = resp.json()["response"]["GeoObjectCollection"]["featureMember"]
-            if not members:
-                return None
-
-            pos = members[0]["GeoObject"]["Point"]["pos"]
-            lon_str, lat_str = pos.split(" ")
-
-            return float(lon_str), float(lat_str)
+            return self._parse_geopoint(resp.json())
         except requests.exceptions.HTTPError as e:
             error_msg = f"HTTP ошибка {e.response.status_code}"
             try:
@@ -78,8 +165,91 @@ class YandexGeocoder:
             raise ValueError(error_msg) from e
         except requests.exceptions.RequestException as e:
             raise ValueError(f"Ошибка запроса к геокодеру: {str(e)}") from e
+
+    async def aadress_to_geopoint(self, address: str) -> Optional[GeoPoint]:
+        """
+        Асинхронная версия adress_to_geopoint (общая aiohttp-сессия, тот же кэш).
+        """
+        if address in self._cache:
+            return self._cache[address]
+        point = await self._arequest_geopoint(address)
+        self._remember(address, point)
+        return point
+
+    async def _arequest_geopoint(self, address: str) -> Optional[GeoPoint]:
+        """Асинхронный запрос к API геокодера без кэша."""
+        api_key = os.getenv("YANDEX_GEOCODER_API_KEY")
+        if not api_key:
+            raise ValueError("YANDEX_GEOCODER_API_KEY не установлен в переменных окружения")
+
+        session = await get_http_session()
+        try:
+            async with session.get(
+                self.geocoder_url,
+                params={
+                    "apikey": api_key,
+                    "geocode": address,
+                    "format": "json",
+                },
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as resp:
+                if resp.status >= 400:
+                    raise ValueError(f"HTTP ошибка {resp.status}: {(await resp.text())[:200]}")
+                return self._parse_geopoint(await resp.json())
+        except aiohttp.ClientError as e:
+            raise ValueError(f"Ошибка запроса к геокодеру: {str(e)}") from e
+
+    @staticmethod
+    def _parse_geopoint(data: dict) -> Optional[GeoPoint]:
+        members = data["response"]["GeoObjectCollection"]["featureMember"]
+        if not members:
+            return None
+
+        pos = members[0]["GeoObject"]["Point"]["pos"]
+        lon_str, lat_str = pos.split(" ")
+
+        return float(lon_str), float(lat_str)
     
 
+_VENUE_CACHE_PATH = DATA / "cache" / "venues.json"
+_venue_geocoder: Optional[YandexGeocoder] = None
+_venue_lock = threading.Lock()
+
+
+def _get_venue_geocoder() -> YandexGeocoder:
+    """Общий геокодер мест; кэш читается с диска один раз, при выходе дописываются новые адреса."""
+    global _venue_geocoder
+    with _venue_lock:
+        if _venue_geocoder is None:
+            _venue_geocoder = YandexGeocoder(cache_path=_VENUE_CACHE_PATH)
+            atexit.register(_venue_geocoder.flush)
+        return _venue_geocoder
+
+
+def geocode_venue(address: Optional[str], city: Optional[str] = None) -> Optional[GeoPoint]:
+    """
+    Координаты места проведения при загрузке событий: (lon, lat) или None.
+
+    Каждое место геокодируется один раз — кэш хранится в data/cache/venues.json
+    (записывается пачками и в flush_venue_cache()). Запросы к геокодеру из разных
+    потоков идут параллельно. Без YANDEX_GEOCODER_API_KEY и при ошибках геокодера
+    возвращает None.
+    """
+    if not address or not os.getenv("YANDEX_GEOCODER_API_KEY"):
+        return None
+    query = f"{city}, {address}" if city and city.lower() not in address.lower() else address
+    try:
+        return _get_venue_geocoder().adress_to_geopoint(query)
+    except ValueError:
+        return None
+
+
+def flush_venue_cache() -> None:
+    """Записать новые адреса кэша мест на диск (вызывается в конце загрузки событий)."""
+    if _venue_geocoder is not None:
+        _venue_geocoder.flush()
+
+
 @dataclass
 class SimpleRouteEstimator:
     """
@@ -169,6 +339,38 @@ class SimpleRouteEstimator:
         result["modes"] = modes_result
         return result
 
+    def estimate_matrix(
+        self,
+        points: np.ndarray,
+        modes: Tuple[Mode, ...] = ("walking", "car", "bus"),
+    ) -> Dict[str, object]:
+        """
+        Векторизованный аналог estimate_route для всех пар точек сразу.
+
+        points: массив (n, 2) с (lon, lat); строки с NaN — точки без координат.
+
+        Возвращает:
+        {
+          "distance_km_straight": ndarray (n, n),
+          "distances_km": {"walking": ndarray (n, n), ...},
+          "durations_min": {"walking": ndarray (n, n), ...},
+        }
+        """
+        straight_km = haversine_matrix_m(points) / 1000.0
+
+        distances_km: Dict[str, np.ndarray] = {}
+        durations_min: Dict[str, np.ndarray] = {}
+        for mode in modes:
+            distance_km = straight_km * self.road_coefficients[mode]
+            distances_km[mode] = distance_km
+            durations_min[mode] = distance_km / self.speeds_kmh[mode] * 60.0
+
+        return {
+            "distance_km_straight": straight_km,
+            "distances_km": distances_km,
+            "durations_min": durations_min,
+        }
+
 
 @dataclass
 class YandexRouteService:
@@ -191,6 +393,32 @@ class YandexRouteService:
         start = self.geocoder.adress_to_geopoint(from_address)
         end = self.geocoder.adress_to_geopoint(to_address)
 
+        return self._route_info(from_address, to_address, start, end, modes)
+
+    async def aroute_by_addresses(
+        self,
+        from_address: str,
+        to_address: str,
+        modes: Tuple[Mode, ...] = ("walking", "car", "bus"),
+    ) -> Dict[str, object]:
+        """
+        Асинхронная версия route_by_addresses: оба адреса геокодируются параллельно.
+        """
+        start, end = await asyncio.gather(
+            self.geocoder.aadress_to_geopoint(from_address),
+            self.geocoder.aadress_to_geopoint(to_address),
+        )
+
+        return self._route_info(from_address, to_address, start, end, modes)
+
+    def _route_info(
+        self,
+        from_address: str,
+        to_address: str,
+        start: Optional[GeoPoint],
+        end: Optional[GeoPoint],
+        modes: Tuple[Mode, ...],
+    ) -> Dict[str, object]:
         if start is None or end is None:
             raise ValueError("Не удалось получить координаты одного из адресов")
 
@@ -206,3 +434,97 @@ class YandexRouteService:
         )
 
         return route_info
+
+    def matrix_by_addresses(
+        self,
+        addresses: Sequence[Optional[str]],
+        modes: Tuple[Mode, ...] = ("walking", "car", "bus"),
+        points: Optional[Sequence[Optional[GeoPoint]]] = None,
+    ) -> Dict[str, object]:
+        """
+        Матрица расстояний и времени в пути между всеми адресами.
+
+        Каждый уникальный адрес геокодируется один раз; адреса, которые не удалось
+        найти (или None), дают None в соответствующих строках и столбцах.
+        points — уже известные координаты (Event.geopoint из Weaviate): такие адреса не геокодируются.
+
+        Возвращает:
+        {
+          "success": True,
+          "addresses": [...],
+          "points": [(lon, lat) | None, ...],
+          "modes": [...],
+          "distance_km_straight": [[...]],
+          "distances_km": {"walking": [[...]], ...},
+          "durations_min": {"walking": [[...]], ...},
+        }
+        """
+        known = self._known_points(addresses, points)
+        unique: Dict[str, Optional[GeoPoint]] = {}
+        for address in addresses:
+            if address and address not in unique and address not in known:
+                try:
+                    unique[address] = self.geocoder.adress_to_geopoint(address)
+                except ValueError:
+                    unique[address] = None
+
+        return self._matrix_info(addresses, {**unique, **known}, modes, points)
+
+    async def amatrix_by_addresses(
+        self,
+        addresses: Sequence[Optional[str]],
+        modes: Tuple[Mode, ...] = ("walking", "car", "bus"),
+        points: Optional[Sequence[Optional[GeoPoint]]] = None,
+    ) -> Dict[str, object]:
+        """
+        Асинхронная версия matrix_by_addresses: уникальные адреса геокодируются параллельно.
+        """
+        known = self._known_points(addresses, points)
+        unique_addresses = list(dict.fromkeys(a for a in addresses if a and a not in known))
+        results = await asyncio.gather(
+            *(self.geocoder.aadress_to_geopoint(a) for a in unique_addresses),
+            return_exceptions=True,
+        )
+        unique: Dict[str, Optional[GeoPoint]] = {
+            a: (None if isinstance(r, BaseException) else r)
+            for a, r in zip(unique_addresses, results)
+        }
+
+        return self._matrix_info(addresses, {**unique, **known}, modes, points)
+
+    @staticmethod
+    def _known_points(
+        addresses: Sequence[Optional[str]],
+        points: Optional[Sequence[Optional[GeoPoint]]],
+    ) -> Dict[str, GeoPoint]:
+        if not points:
+            return {}
+        return {a: p for a, p in zip(addresses, points) if a and p is not None}
+
+    def _matrix_info(
+        self,
+        addresses: Sequence[Optional[str]],
+        unique: Dict[str, Optional[GeoPoint]],
+        modes: Tuple[Mode, ...],
+        known: Optional[Sequence[Optional[GeoPoint]]] = None,
+    ) -> Dict[str, object]:
+        known = list(known or [None] * len(addresses))
+        points: List[Optional[GeoPoint]] = [
+            p if p is not None else (unique.get(a) if a else None) for a, p in zip(addresses, known)
+        ]
+        coords = np.array(
+            [p if p is not None else (np.nan, np.nan) for p in points],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        matrix = self.estimator.estimate_matrix(coords, modes=modes)
+
+        return {
+            "success": True,
+            "addresses": list(addresses),
+            "points": points,
+            "modes": list(modes),
+            "distance_km_straight": _nan_to_none(matrix["distance_km_straight"]),
+            "distances_km": {m: _nan_to_none(v) for m, v in matrix["distances_km"].items()},
+            "durations_min": {m: _nan_to_none(v) for m, v in matrix["durations_min"].items()},
+        }
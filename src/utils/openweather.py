@@ -4,8 +4,11 @@ import os
 from dataclasses import dataclass
 from typing import Dict, Any
 
+import aiohttp
 import requests
 
+from src.utils.http_session import get_http_session
+
 
 @dataclass
 class Weather:
@@ -58,8 +61,38 @@ class OpenWeatherClient:
                 f"Ответ: {resp.text}"
             )
 
-        data = resp.json()
+        return self._parse_weather(resp.json())
+
+    async def aget_weather(self, lat: float, lon: float, units: str = "metric") -> Weather:
+        """
+        Асинхронная версия get_weather через общую aiohttp-сессию.
+        """
+
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "appid": self.api_key,
+            "units": units,
+        }
 
+        session = await get_http_session()
+        async with session.get(
+            self.BASE_URL,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(
+                    f"Ошибка при обращении к OpenWeather: HTTP {resp.status}\n"
+                    f"URL: {resp.url}\n"
+                    f"Ответ: {await resp.text()}"
+                )
+            data = await resp.json()
+
+        return self._parse_weather(data)
+
+    @staticmethod
+    def _parse_weather(data: Dict[str, Any]) -> Weather:
         weather_list = data.get("weather") or []
         if not weather_list:
             raise ValueError("Некорректный ответ OpenWeather: нет поля 'weather'")
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+import asyncio
 from dataclasses import dataclass
 from typing import List, Optional
 
+import aiohttp
 import requests
 
+from src.utils.http_session import get_http_session
+
 
 @dataclass
 class Page:
@@ -49,16 +53,7 @@ class TavilyHtmlFetcher:
         :return: список Page(url, title, html)
         """
         max_results = max_results or self.default_max_results
-
-        payload = {
-            "api_key": self.api_key,
-            "query": query,
-            "max_results": max_results,
-            "search_depth": "basic",
-            "include_answer": False,
-            "include_raw_content": False,
-            "include_images": False,
-        }
+        payload = self._payload(query, max_results)
 
         resp = requests.post(
             self.tavily_endpoint,
@@ -90,3 +85,45 @@ class TavilyHtmlFetcher:
             pages.append(Page(url=url, title=title, html=html))
 
         return pages
+
+    async def asearch(self, query: str, max_results: Optional[int] = None) -> List[Page]:
+        """
+        Асинхронная версия search: страницы скачиваются параллельно
+        через общую aiohttp-сессию.
+        """
+        max_results = max_results or self.default_max_results
+        payload = self._payload(query, max_results)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+
+        session = await get_http_session()
+        async with session.post(self.tavily_endpoint, json=payload, timeout=timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+
+        items = [item for item in data.get("results", []) if item.get("url")]
+
+        async def fetch_html(url: str) -> str:
+            try:
+                async with session.get(url, timeout=timeout) as page_resp:
+                    page_resp.raise_for_status()
+                    return await page_resp.text()
+            except Exception:
+                return ""
+
+        htmls = await asyncio.gather(*(fetch_html(item["url"]) for item in items))
+
+        return [
+            Page(url=item["url"], title=item.get("title"), html=html)
+            for item, html in zip(items, htmls)
+        ]
+
+    def _payload(self, query: str, max_results: int) -> dict:
+        return {
+            "api_key": self.api_key,
+            "query": query,
+            "max_results": max_results,
+            "search_depth": "basic",
+            "include_answer": False,
+            "include_raw_content": False,
+            "include_images": False,
+        }
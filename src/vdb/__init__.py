@@ -22,7 +22,25 @@ from src.vdb.config import (
 # ============================================================================
 # КЛИЕНТ WEAVIATE
 # ============================================================================
-from src.vdb.client import get_weaviate_client
+from src.vdb.client import (
+    get_weaviate_client,
+    get_async_weaviate_client,
+    get_shared_client,
+    open_shared_clients,
+    close_shared_clients,
+    weaviate_lifespan,
+)
+
+# ============================================================================
+# ЭМБЕДДИНГИ (векторы на стороне клиента)
+# ============================================================================
+from src.vdb.embeddings import (
+    CachedEmbeddings,
+    HashingEmbeddings,
+    create_embedder,
+    get_embedder,
+    register_embedder,
+)
 
 # ============================================================================
 # RAG СИСТЕМА
@@ -57,6 +75,17 @@ __all__ = [
     "MAX_ITERATIONS",
     # Клиент
     "get_weaviate_client",
+    "get_async_weaviate_client",
+    "get_shared_client",
+    "open_shared_clients",
+    "close_shared_clients",
+    "weaviate_lifespan",
+    # Эмбеддинги
+    "CachedEmbeddings",
+    "HashingEmbeddings",
+    "create_embedder",
+    "get_embedder",
+    "register_embedder",
     # RAG система
     "EventRetriever",
     "create_self_rag_graph",
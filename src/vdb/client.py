@@ -1,8 +1,12 @@
-import json
-from typing import List, Optional
+import atexit
+import threading
+import time
+import warnings
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 from pathlib import Path
 from src.models.event import Event
-from src.vdb.config import WEAVIATE_URL, COLLECTION_NAME
+from src.vdb.config import WEAVIATE_URL, COLLECTION_NAME, WEAVIATE_HEALTH_CHECK_SECONDS
 
 try:
     import weaviate
@@ -12,21 +16,146 @@ except ImportError:
 from urllib.parse import urlparse
 
 
-def get_weaviate_client() -> weaviate.WeaviateClient:
-    """Создает клиент Weaviate."""
-    parsed = urlparse(WEAVIATE_URL)
+def _connection_params(weaviate_url: str) -> Optional[dict]:
+    """Параметры connect_to_custom / use_async_with_custom; None — локальный Weaviate по умолчанию."""
+    parsed = urlparse(weaviate_url)
     http_port = parsed.port or (443 if parsed.scheme == "https" else 8080)
     http_secure = parsed.scheme == "https"
     hostname = parsed.hostname or "localhost"
 
     if hostname in ("localhost", "127.0.0.1") and http_port == 8080 and not http_secure:
+        return None
+    return dict(
+        http_host=hostname,
+        http_port=http_port,
+        http_secure=http_secure,
+        grpc_host=hostname,
+        grpc_port=50051,
+        grpc_secure=http_secure,
+    )
+
+
+def get_weaviate_client(weaviate_url: str = WEAVIATE_URL) -> weaviate.WeaviateClient:
+    """
+    Создает новый клиент Weaviate (его нужно закрыть самостоятельно).
+
+    Для долгоживущих процессов (бот, API, пайплайн) используйте get_shared_client().
+    """
+    params = _connection_params(weaviate_url)
+    if params is None:
         return weaviate.connect_to_local()
-    else:
-        return weaviate.connect_to_custom(
-            http_host=hostname,
-            http_port=http_port,
-            http_secure=http_secure,
-            grpc_host=hostname,
-            grpc_port=50051,
-            grpc_secure=http_secure,
-        )
\ No newline at end of file
+    return weaviate.connect_to_custom(**params)
+
+
+async def get_async_weaviate_client(weaviate_url: str = WEAVIATE_URL) -> weaviate.WeaviateAsyncClient:
+    """Создает и подключает асинхронный клиент Weaviate (закрывать: await client.close())."""
+    params = _connection_params(weaviate_url)
+    client = weaviate.use_async_with_local() if params is None else weaviate.use_async_with_custom(**params)
+    await client.connect()
+    return client
+
+
+class WeaviateClientManager:
+    """
+    Общие клиенты Weaviate процесса: один на URL.
+
+    Клиент v4 потокобезопасен и сам держит пул HTTP-соединений и gRPC-канал,
+    поэтому несколько клиентов на один сервер не нужны. Здоровье проверяется
+    через is_ready() не чаще health_check_seconds (и сразу после mark_unhealthy),
+    мёртвый клиент закрывается и пересоздаётся.
+    """
+
+    def __init__(self, health_check_seconds: float = WEAVIATE_HEALTH_CHECK_SECONDS):
+        self.health_check_seconds = health_check_seconds
+        self._clients: Dict[str, weaviate.WeaviateClient] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def get(self, weaviate_url: str = WEAVIATE_URL) -> weaviate.WeaviateClient:
+        """Общий клиент для weaviate_url (подключается при первом обращении)."""
+        with self._lock:
+            client = self._clients.get(weaviate_url)
+            if client is not None and not self._is_healthy(weaviate_url, client):
+                self._close(weaviate_url)
+                client = None
+            if client is None:
+                client = get_weaviate_client(weaviate_url)
+                self._clients[weaviate_url] = client
+                self._checked_at[weaviate_url] = time.monotonic()
+                self.connects += 1
+            return client
+
+    def _is_healthy(self, weaviate_url: str, client: weaviate.WeaviateClient) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at.get(weaviate_url, 0.0) < self.health_check_seconds:
+            return True
+        try:
+            healthy = client.is_ready()
+        except Exception:
+            healthy = False
+        self._checked_at[weaviate_url] = now
+        return healthy
+
+    def mark_unhealthy(self, weaviate_url: str = WEAVIATE_URL) -> None:
+        """Проверить клиент при следующем get() (например, после ошибки запроса)."""
+        with self._lock:
+            self._checked_at.pop(weaviate_url, None)
+
+    def _close(self, weaviate_url: str) -> None:
+        client = self._clients.pop(weaviate_url, None)
+        self._checked_at.pop(weaviate_url, None)
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                warnings.warn(f"Ошибка при закрытии клиента Weaviate: {e}")
+
+    def close_all(self) -> None:
+        """Закрыть все общие клиенты (shutdown процесса)."""
+        with self._lock:
+            for weaviate_url in list(self._clients):
+                self._close(weaviate_url)
+
+
+_manager = WeaviateClientManager()
+atexit.register(_manager.close_all)
+
+
+def get_client_manager() -> WeaviateClientManager:
+    """Менеджер общих клиентов процесса."""
+    return _manager
+
+
+def get_shared_client(weaviate_url: str = WEAVIATE_URL) -> weaviate.WeaviateClient:
+    """Общий долгоживущий клиент Weaviate. Не закрывайте его — это делает close_shared_clients()."""
+    return _manager.get(weaviate_url)
+
+
+def open_shared_clients(weaviate_url: str = WEAVIATE_URL) -> bool:
+    """
+    Прогрев на старте процесса: соединение (HTTP + gRPC) устанавливается заранее,
+    а не в первом запросе пользователя. Ошибка не фатальна — клиент
+    переподключится при следующем обращении.
+    """
+    try:
+        get_shared_client(weaviate_url)
+        return True
+    except Exception as e:
+        warnings.warn(f"Weaviate недоступен при старте: {e}")
+        return False
+
+
+def close_shared_clients() -> None:
+    """Закрыть общие клиенты (shutdown бота/API)."""
+    _manager.close_all()
+
+
+@asynccontextmanager
+async def weaviate_lifespan(app=None):
+    """Lifespan для FastAPI (FastAPI(lifespan=weaviate_lifespan)) и других asyncio-приложений."""
+    open_shared_clients()
+    try:
+        yield
+    finally:
+        close_shared_clients()
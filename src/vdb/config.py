@@ -1,17 +1,73 @@
 """Конфигурация для Self-RAG системы."""
 
 import os
-from typing import Optional
+from typing import List, Optional
 
 
 # Weaviate настройки
 WEAVIATE_URL: str = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 COLLECTION_NAME: str = os.getenv("COLLECTION_NAME", "Events")
+# Как часто проверять общий клиент через is_ready() (src/vdb/client.py)
+WEAVIATE_HEALTH_CHECK_SECONDS: float = float(os.getenv("WEAVIATE_HEALTH_CHECK_SECONDS", "30"))
 
 # OpenAI настройки
 OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
 
+# Поиск: "vector" (near_text), "bm25" или "hybrid" (BM25 + вектор)
+RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "vector")
+# Вес векторной части в hybrid: 0 — чистый BM25, 1 — чистый вектор
+HYBRID_ALPHA: float = float(os.getenv("HYBRID_ALPHA", "0.5"))
+# Поля BM25 с бустами: совпадение в названии важнее, чем в описании
+BM25_PROPERTIES: List[str] = ["title^3", "location^2", "description"]
+
+# Векторизация на стороне клиента (src/vdb/embeddings.py): "hashing[:dim]" или
+# "sentence-transformers[:model]"; пусто — векторы считает Weaviate (text2vec_contextionary).
+# Смена режима требует пересоздать коллекцию; пороги релевантности откалибровать заново
+EMBEDDER: str = os.getenv("EMBEDDER", "")
+# Каталог кэша эмбеддингов; по умолчанию data/cache/embeddings
+EMBEDDING_CACHE_DIR: Optional[str] = os.getenv("EMBEDDING_CACHE_DIR")
+
+# Где искать события: "weaviate" или "local" — встроенный индекс на NumPy
+# (src/vdb/rag/local_retriever.py, строится scripts/build_local_index.py)
+RETRIEVAL_BACKEND: str = os.getenv("RETRIEVAL_BACKEND", "weaviate")
+# Каталог локального индекса; по умолчанию data/cache/local_index
+LOCAL_INDEX_DIR: Optional[str] = os.getenv("LOCAL_INDEX_DIR")
+
+# Кэш результатов поиска EventRetriever (TTL + LRU, сбрасывается при загрузке событий)
+RETRIEVAL_CACHE_ENABLED: bool = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RETRIEVAL_CACHE_TTL_SECONDS: int = int(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "600"))
+RETRIEVAL_CACHE_MAX_ENTRIES: int = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+
+# Фильтр по датам (start_ts / end_ts): прошедшие события не попадают в выдачу.
+# Часовой пояс дат без явного пояса — EVENTS_TIMEZONE (src/utils/event_dates.py)
+UPCOMING_ONLY: bool = os.getenv("UPCOMING_ONLY", "true").lower() in ("1", "true", "yes")
+# Радиус поиска вокруг ориентира из запроса ("около Невского"), метры
+NEAR_RADIUS_M: float = float(os.getenv("NEAR_RADIUS_M", "1500"))
+
+# Семантическая память запросов (src/vdb/rag/memory.py)
+MEMORY_ENABLED: bool = os.getenv("MEMORY_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMORY_COLLECTION_NAME: str = os.getenv("MEMORY_COLLECTION_NAME", "QueryMemory")
+# Максимальная косинусная дистанция между запросами, при которой ответ берётся из памяти
+MEMORY_MAX_DISTANCE: float = float(os.getenv("MEMORY_MAX_DISTANCE", "0.08"))
+MEMORY_TTL_SECONDS: int = int(os.getenv("MEMORY_TTL_SECONDS", str(6 * 3600)))
+# Сколько ближайших записей проверять: ближайшая может не совпасть по числам, городам или датам
+MEMORY_CANDIDATES: int = int(os.getenv("MEMORY_CANDIDATES", "5"))
+
+# Разбор запроса одним структурированным вызовом LLM (QueryUnderstanding) вместо
+# отдельных узлов извлечения города и ограничений
+QUERY_UNDERSTANDING_ENABLED: bool = os.getenv("QUERY_UNDERSTANDING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Оценка релевантности по дистанциям (src/vdb/rag/relevance.py); пороги —
+# из scripts/calibrate_relevance_thresholds.py, по умолчанию консервативные
+RELEVANCE_ACCEPT_DISTANCE: float = float(os.getenv("RELEVANCE_ACCEPT_DISTANCE", "0.15"))
+RELEVANCE_ACCEPT_MIN_HITS: int = int(os.getenv("RELEVANCE_ACCEPT_MIN_HITS", "3"))
+RELEVANCE_REJECT_DISTANCE: float = float(os.getenv("RELEVANCE_REJECT_DISTANCE", "0.45"))
+# Поштучная оценка событий LLM: минимальный score и сколько релевантных событий
+# должно остаться, чтобы не переформулировать запрос
+RELEVANCE_MIN_SCORE: float = float(os.getenv("RELEVANCE_MIN_SCORE", "0.5"))
+RELEVANCE_MIN_KEPT_EVENTS: int = int(os.getenv("RELEVANCE_MIN_KEPT_EVENTS", "3"))
+
 # Ограничения
 MAX_EVENTS: int = 15
 MAX_ITERATIONS: int = 3
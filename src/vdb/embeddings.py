@@ -0,0 +1,354 @@
+"""
+Векторизация на стороне клиента (bring your own vectors) и дисковый кэш эмбеддингов.
+
+По умолчанию коллекция Events векторизуется на сервере (text2vec_contextionary).
+Если задан EMBEDDER, коллекция создаётся без векторизатора: векторы событий и
+запросов считает локальный эмбеддер, а CachedEmbeddings хранит их в кэше на диске.
+
+Кэш (data/cache/embeddings/<эмбеддер>/): vectors.f32 — float32-матрица,
+открытая через np.memmap, и keys.txt — sha256 текста на каждую строку матрицы.
+Ключ зависит только от текста и эмбеддера, поэтому неизменённые события при
+повторной загрузке не векторизуются заново, а повторные запросы не вызывают
+эмбеддер. Смена эмбеддера — другой каталог кэша.
+
+Эмбеддер — любой langchain Embeddings; встроены:
+    EMBEDDER=hashing[:dim]                       — хэширование слов и триграмм (только numpy)
+    EMBEDDER=sentence-transformers[:model]       — локальная модель sentence-transformers
+Свои эмбеддеры подключаются через register_embedder.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса
+    fcntl = None
+
+from src.models.event import Event
+from src.utils.paths import project_root
+from src.vdb.config import EMBEDDER, EMBEDDING_CACHE_DIR
+
+
+DEFAULT_SENTENCE_TRANSFORMER = "intfloat/multilingual-e5-small"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+# ---------------- Embedders ----------------
+
+class HashingEmbeddings(Embeddings):
+    """
+    Эмбеддер без модели: слова и символьные триграммы хэшируются в вектор
+    фиксированной длины (feature hashing со знаком), вектор нормируется.
+
+    Детерминирован и не требует сети и весов — годится для офлайн-работы и тестов;
+    синонимы не понимает, поэтому по качеству ближе к BM25, чем к нейросетевой модели.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Iterator[tuple]:
+        for word in _WORD_RE.findall((text or "").lower().replace("ё", "е")):
+            yield word, 1.0
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if digest >> 63 else -1.0
+                vectors[row, digest % self.dim] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Локальная модель sentence-transformers (загружается при первом вызове).
+
+    Для моделей семейства e5 к текстам добавляются префиксы "query: " / "passage: ".
+    """
+
+    def __init__(self, model_name: str = DEFAULT_SENTENCE_TRANSFORMER, device: Optional[str] = None):
+        self.model_name = model_name
+        self.device = device
+        self.name = f"sentence-transformers-{model_name}"
+        e5 = "e5" in model_name.lower()
+        self.query_prefix = "query: " if e5 else ""
+        self.document_prefix = "passage: " if e5 else ""
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                except ImportError as e:
+                    raise ImportError(
+                        "Для EMBEDDER=sentence-transformers установите пакет: pip install sentence-transformers"
+                    ) from e
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+            return self._model
+
+    def _encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self._get_model().encode(
+            list(texts), normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False,
+        ).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode([self.document_prefix + t for t in texts]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([self.query_prefix + text])[0].tolist()
+
+
+_FACTORIES: Dict[str, Callable[[Optional[str]], Embeddings]] = {
+    "hashing": lambda arg: HashingEmbeddings(int(arg) if arg else 512),
+    "sentence-transformers": lambda arg: SentenceTransformerEmbeddings(arg or DEFAULT_SENTENCE_TRANSFORMER),
+}
+
+
+def register_embedder(kind: str, factory: Callable[[Optional[str]], Embeddings]) -> None:
+    """Подключить свой эмбеддер: EMBEDDER=<kind>[:<аргумент>] → factory(аргумент)."""
+    _FACTORIES[kind] = factory
+
+
+def create_embedder(spec: str) -> Embeddings:
+    """
+    Эмбеддер по строке "kind[:аргумент]" ("hashing:768", "sentence-transformers:intfloat/multilingual-e5-small").
+
+    Raises:
+        ValueError: неизвестный kind
+    """
+    kind, _, arg = spec.strip().partition(":")
+    if kind not in _FACTORIES:
+        raise ValueError(f"Неизвестный эмбеддер: {kind} (доступны: {', '.join(sorted(_FACTORIES))})")
+    return _FACTORIES[kind](arg or None)
+
+
+def embedder_name(embedder: Embeddings) -> str:
+    """Стабильное имя эмбеддера — по нему разделяются каталоги кэша."""
+    name = getattr(embedder, "name", None)
+    if name:
+        return str(name)
+    model = getattr(embedder, "model", None) or getattr(embedder, "model_name", None) or ""
+    return f"{type(embedder).__name__}-{model}".rstrip("-")
+
+
+# ---------------- On-disk cache ----------------
+
+class EmbeddingCache:
+    """
+    Кэш векторов на диске: ключ (sha256 текста) → строка float32-матрицы в np.memmap.
+
+    Запись только дописыванием: сначала векторы, затем ключи — строка без ключа
+    (падение между записями) при следующей записи отбрасывается. Между процессами
+    (бот, sync worker, скрипты загрузки) запись сериализуется через flock.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._keys_path = self.directory / "keys.txt"
+        self._vectors_path = self.directory / "vectors.f32"
+        self._meta_path = self.directory / "meta.json"
+        self._lock_path = self.directory / "lock"
+
+        self.dim: Optional[int] = None
+        if self._meta_path.exists():
+            self.dim = json.loads(self._meta_path.read_text())["dim"]
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Дочитать ключи, дописанные с прошлого раза (в том числе другими процессами)."""
+        try:
+            size = self._keys_path.stat().st_size
+        except OSError:
+            return
+        if size == self._keys_offset and self._vectors is not None:
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            chunk = f.read()
+        complete = chunk[:chunk.rfind(b"\n") + 1]  # недописанная строка — в следующий раз
+        for key in complete.decode("ascii").split():
+            self._rows.setdefault(key, len(self._rows))
+        self._keys_offset += len(complete)
+        if self.dim and self._rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim))
+
+    def get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Найденные в кэше векторы по ключам."""
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._refresh()
+            vectors = self._vectors
+            return {key: np.array(vectors[self._rows[key]]) for key in keys if key in self._rows}
+
+    def put(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """Дописать векторы (ключи, которые уже есть в кэше, пропускаются)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._meta_path.write_text(json.dumps({"dim": self.dim}))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Размерность {vectors.shape[1]} не совпадает с кэшем ({self.dim})")
+
+            fresh = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows:
+                    fresh.setdefault(key, vector)
+            if not fresh:
+                return
+
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(len(self._rows) * self.dim * 4)  # хвост без ключей после падения
+                f.write(np.stack(list(fresh.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._keys_path, "a", encoding="ascii") as f:
+                f.write("".join(f"{key}\n" for key in fresh))
+            self._refresh()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Эмбеддер с кэшем на диске: векторы считаются только для текстов,
+    которых ещё нет в кэше (батчами по batch_size).
+    """
+
+    def __init__(self, embedder: Embeddings, cache_dir: Optional[Path] = None, batch_size: int = 64):
+        self.embedder = embedder
+        self.name = embedder_name(embedder)
+        cache_dir = Path(cache_dir or EMBEDDING_CACHE_DIR or project_root() / "data" / "cache" / "embeddings")
+        self.cache = EmbeddingCache(cache_dir / re.sub(r"[^\w.-]+", "_", self.name))
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(kind: str, text: str) -> str:
+        # запросы и документы кодируются по-разному (префиксы e5) — разные ключи
+        return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_array(self, texts: Sequence[str], kind: str = "document") -> np.ndarray:
+        """
+        Векторы текстов матрицей float32 (n, dim).
+
+        Args:
+            texts: Тексты
+            kind: "document" (события) или "query" (запросы)
+        """
+        keys = [self._key(kind, t) for t in texts]
+        found = self.cache.get(keys)
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        self.hits += len(keys) - sum(1 for k in keys if k not in found)
+        self.misses += len(missing)
+
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                batch_texts = [text_by_key[k] for k in batch]
+                if kind == "query":
+                    computed = np.array([self.embedder.embed_query(t) for t in batch_texts], dtype=np.float32)
+                else:
+                    computed = np.array(self.embedder.embed_documents(batch_texts), dtype=np.float32)
+                self.cache.put(batch, computed)
+                found.update(zip(batch, computed))
+
+        if not keys:
+            return np.zeros((0, self.cache.dim or 0), dtype=np.float32)
+        return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts, kind="document").tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.query_vector(text).tolist()
+
+    def query_vector(self, text: str) -> np.ndarray:
+        """Вектор запроса (повторный запрос берётся из кэша без вызова эмбеддера)."""
+        return self.embed_array([text], kind="query")[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.cache)}
+
+
+def as_cached(embedder: Optional[Embeddings]) -> Optional[CachedEmbeddings]:
+    """Обернуть эмбеддер в CachedEmbeddings (если он ещё не обёрнут)."""
+    if embedder is None or isinstance(embedder, CachedEmbeddings):
+        return embedder
+    return CachedEmbeddings(embedder)
+
+
+# ---------------- Events ----------------
+
+def event_embedding_text(event: Event) -> str:
+    """Текст события для векторизации: название, место и описание."""
+    return "\n".join(part for part in (event.title, event.location, event.description) if part)
+
+
+def embed_events(events: Sequence[Event], embedder: CachedEmbeddings) -> np.ndarray:
+    """Векторы событий (n, dim); неизменённые события берутся из кэша."""
+    return embedder.embed_array([event_embedding_text(e) for e in events], kind="document")
+
+
+_embedder: Optional[CachedEmbeddings] = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> Optional[CachedEmbeddings]:
+    """
+    Общий эмбеддер процесса из EMBEDDER (с кэшем на диске)
+    или None — векторизация на сервере Weaviate.
+    """
+    global _embedder
+    if not EMBEDDER:
+        return None
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = CachedEmbeddings(create_embedder(EMBEDDER))
+    return _embedder
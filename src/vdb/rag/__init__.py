@@ -1,8 +1,39 @@
 """Self-RAG система на LangGraph."""
 
-from src.vdb.rag.self_rag_graph import create_self_rag_graph, run_self_rag
-from src.vdb.rag.retriever import EventRetriever
-from src.vdb.rag.memory import check_memory
+from src.vdb.rag.self_rag_graph import (
+    arun_self_rag_batch,
+    create_self_rag_graph,
+    run_self_rag,
+    run_self_rag_batch,
+)
+from src.vdb.rag.retriever import EventRetriever, get_retrieval_cache
+from src.vdb.rag.async_retriever import AsyncEventRetriever
+from src.vdb.rag.local_retriever import (
+    LocalEventRetriever,
+    LocalVectorIndex,
+    build_local_index,
+    create_event_retriever,
+)
+from src.vdb.rag.memory import QueryMemory, check_memory, get_query_memory
+from src.vdb.rag.query_understanding import QueryUnderstanding, understand_locally, understand_query
 
-__all__ = ["create_self_rag_graph", "run_self_rag", "EventRetriever", "check_memory"]
+__all__ = [
+    "create_self_rag_graph",
+    "run_self_rag",
+    "run_self_rag_batch",
+    "arun_self_rag_batch",
+    "EventRetriever",
+    "AsyncEventRetriever",
+    "LocalEventRetriever",
+    "LocalVectorIndex",
+    "build_local_index",
+    "create_event_retriever",
+    "get_retrieval_cache",
+    "check_memory",
+    "QueryMemory",
+    "get_query_memory",
+    "QueryUnderstanding",
+    "understand_locally",
+    "understand_query",
+]
 
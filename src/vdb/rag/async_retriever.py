@@ -0,0 +1,206 @@
+"""Асинхронный retriever событий на WeaviateAsyncClient."""
+
+import asyncio
+import warnings
+from datetime import date
+from typing import List, Optional, Sequence
+
+try:
+    import weaviate
+except ImportError:
+    weaviate = None
+
+from src.models.event import Event
+from src.utils.cities import normalize_city
+from src.vdb.client import get_async_weaviate_client
+from src.vdb.config import MAX_EVENTS
+from src.vdb.rag.retriever import DateBounds, EventRetriever, Near, SearchMode, reciprocal_rank_fusion
+
+
+class AsyncEventRetriever(EventRetriever):
+    """
+    Асинхронный поиск событий: те же фильтры, режимы и кэш, что у EventRetriever,
+    но запросы идут через WeaviateAsyncClient и не занимают потоки.
+
+    Одно соединение на экземпляр (и event loop): aretrieve_many выполняет
+    все формулировки конкурентно поверх него.
+
+    Пример:
+        async with AsyncEventRetriever() as retriever:
+            events = await retriever.aretrieve_many(["джаз", "концерт"], city="москва")
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_client: Optional[weaviate.WeaviateAsyncClient] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def _aget_client(self) -> weaviate.WeaviateAsyncClient:
+        """Получить или создать асинхронный клиент Weaviate."""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._async_client is None or not self._async_client.is_connected():
+                self._async_client = await get_async_weaviate_client(self.weaviate_url)
+        return self._async_client
+
+    async def aretrieve(
+        self,
+        query: str,
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        """
+        Асинхронный retrieve: (owner == X OR (owner == "all" AND city == Y)) AND окно дат AND радиус.
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество результатов
+            owner: Владелец события для фильтрации
+            city: Город для фильтрации публичных событий
+            mode: Режим поиска; по умолчанию self.mode
+            alpha: Вес векторной части для hybrid; по умолчанию self.alpha
+            date_from: Начало окна дат (включительно)
+            date_to: Конец окна дат (включительно)
+            near: (широта, долгота, радиус в метрах)
+
+        Returns:
+            Список найденных событий
+        """
+        city = normalize_city(city)
+        bounds = self._date_bounds(date_from, date_to)
+        filters = await self._abuild_filters(owner, city, bounds, near)
+        events = await self._acached_search(query, limit, filters, owner, city, mode, alpha, bounds, near)
+        events = self.filter_by_city(events, city)
+        events = self.filter_by_dates(events, date_from, date_to, self.upcoming_only)
+        return self.filter_by_distance(events, near)
+
+    async def aretrieve_many(
+        self,
+        queries: Sequence[str],
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+        mode: Optional[SearchMode] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        """
+        Конкурентный поиск по нескольким формулировкам через одно соединение и слияние через RRF.
+
+        Returns:
+            Список уникальных событий, упорядоченный по RRF
+        """
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            return []
+        search = lambda q: self.aretrieve(
+            q, limit=limit, owner=owner, city=city, mode=mode, date_from=date_from, date_to=date_to, near=near,
+        )
+        if len(queries) == 1:
+            return await search(queries[0])
+
+        await self._aget_client()  # одно подключение до запуска запросов
+        results = await asyncio.gather(*(search(q) for q in queries))
+        return reciprocal_rank_fusion(results)[:limit]
+
+    async def aretrieve_candidates(
+        self,
+        query: str,
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+    ) -> List[Event]:
+        """Асинхронный retrieve_candidates: limit * 3 кандидатов без фильтра по городу и окну дат."""
+        bounds = self._date_bounds(None, None)
+        filters = await self._abuild_filters(owner, None, bounds, None)
+        events = await self._acached_search(query, limit * 3, filters, owner, None, bounds=bounds)
+        return self.filter_by_dates(events, None, None, self.upcoming_only)
+
+    async def _abuild_filters(
+        self,
+        owner: Optional[str],
+        city: Optional[str],
+        bounds: Optional[DateBounds],
+        near: Optional[Near],
+    ):
+        await self._aload_schema()
+        return self._schema_filters(owner, city, bounds, near)
+
+    async def _aload_schema(self) -> None:
+        if self._schema is not None:
+            return
+        try:
+            client = await self._aget_client()
+            config = await client.collections.get(self.collection_name).config.get()
+        except Exception:
+            return  # попробуем при следующем запросе
+        self._set_schema(self._parse_schema(config))
+
+    async def _acached_search(
+        self,
+        query: str,
+        limit: int,
+        filters,
+        owner: Optional[str],
+        city: Optional[str],
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+        bounds: Optional[DateBounds] = None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        if self.cache is None:
+            return await self._asearch(query, limit=limit, filters=filters, mode=mode, alpha=alpha)
+
+        key = self._cache_key(query, limit, owner, city, mode, alpha, bounds, near)
+        events = self.cache.get(key)
+        if events is None:
+            events = await self._asearch(query, limit=limit, filters=filters, mode=mode, alpha=alpha)
+            if events:
+                self.cache.put(key, events)
+        return events
+
+    async def _asearch(
+        self,
+        query: str,
+        limit: int,
+        filters=None,
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+    ) -> List[Event]:
+        mode = mode or self.mode
+        if mode not in ("vector", "bm25", "hybrid"):
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
+        client = await self._aget_client()
+        vector = None
+        if self.embedder is not None:
+            await self._aload_schema()
+            # эмбеддер может считать на CPU — не блокируем event loop
+            vector = await asyncio.to_thread(self._query_vector, query, mode)
+
+        try:
+            collection = client.collections.get(self.collection_name)
+            result = await self._query(collection, query, limit, filters, mode, alpha, vector)
+            return self._to_events(result)
+        except Exception as e:
+            warnings.warn(f"Ошибка при асинхронном поиске в Weaviate: {e}")
+            return []
+
+    async def aclose(self) -> None:
+        """Закрыть асинхронное соединение с Weaviate."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    async def __aenter__(self) -> "AsyncEventRetriever":
+        await self._aget_client()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
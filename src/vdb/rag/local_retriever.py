@@ -0,0 +1,363 @@
+"""
+Встроенный векторный индекс на NumPy — EventRetriever без Weaviate.
+
+Для тестов, оценки и небольших развёртываний на один город: ~1000 событий
+ищутся в памяти процесса за доли миллисекунды, контейнеры Weaviate и
+contextionary не нужны.
+
+Индекс — float32-матрица нормированных векторов (поиск — батчевое умножение
+матриц и top-k) плюс столбцы метаданных owner / city / start_ts / end_ts / lat / lon
+для тех же фильтров, что строит EventRetriever для Weaviate. На диске
+(data/cache/local_index по умолчанию): vectors.npy (np.save, загружается через
+mmap), columns.npz, events.jsonl и meta.json с именем эмбеддера.
+
+Включается RETRIEVAL_BACKEND=local (create_event_retriever) или напрямую:
+    retriever = LocalEventRetriever()             # индекс из LOCAL_INDEX_DIR
+    retriever = LocalEventRetriever.from_events(events)
+"""
+
+import json
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.models.event import Event
+from src.utils.cities import normalize_city
+from src.utils.paths import project_root
+from src.vdb.config import LOCAL_INDEX_DIR, MAX_EVENTS, RETRIEVAL_BACKEND, UPCOMING_ONLY
+from src.vdb.embeddings import CachedEmbeddings, HashingEmbeddings, as_cached, embed_events, get_embedder
+from src.vdb.rag.retriever import (
+    DateBounds,
+    EventRetriever,
+    Near,
+    SearchMode,
+    reciprocal_rank_fusion,
+)
+
+
+EARTH_RADIUS_M = 6371008.8
+
+# Строк матрицы за одно умножение: память на промежуточные score ограничена
+# (запросы × SEARCH_CHUNK_ROWS), а top-k сливается между блоками
+SEARCH_CHUNK_ROWS = 65536
+
+# (индексы строк, косинусные дистанции) для одного запроса
+Hits = Tuple[np.ndarray, np.ndarray]
+
+
+def default_index_dir() -> Path:
+    return Path(LOCAL_INDEX_DIR) if LOCAL_INDEX_DIR else project_root() / "data" / "cache" / "local_index"
+
+
+def _default_embedder() -> CachedEmbeddings:
+    """EMBEDDER из конфигурации, иначе хэширующий эмбеддер (без моделей и сети)."""
+    return get_embedder() or CachedEmbeddings(HashingEmbeddings())
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else np.nan
+
+
+class LocalVectorIndex:
+    """Нормированные векторы событий и столбцы метаданных для фильтров."""
+
+    def __init__(self, vectors: np.ndarray, events: List[Event], embedder_name: str, columns: Optional[dict] = None):
+        if len(vectors) != len(events):
+            raise ValueError(f"Векторов {len(vectors)}, а событий {len(events)}")
+        self.vectors = vectors
+        self.events = events
+        self.embedder_name = embedder_name
+        self.columns = columns or self._columns(events)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @staticmethod
+    def _columns(events: Sequence[Event]) -> dict:
+        return {
+            "owner": np.array([e.owner or "" for e in events], dtype=str),
+            "city": np.array([e.city or "" for e in events], dtype=str),
+            "start_ts": np.array([_epoch(e.start_ts) for e in events], dtype=np.float64),
+            "end_ts": np.array([_epoch(e.end_ts) for e in events], dtype=np.float64),
+            "lat": np.array([e.coords.latitude if e.coords else np.nan for e in events], dtype=np.float64),
+            "lon": np.array([e.coords.longitude if e.coords else np.nan for e in events], dtype=np.float64),
+        }
+
+    @classmethod
+    def build(cls, events: Sequence[Event], embedder: CachedEmbeddings) -> "LocalVectorIndex":
+        """Векторизовать события (неизменённые — из кэша эмбеддингов) и собрать индекс."""
+        from src.vdb.utils.load_kudago_events import make_event_uuid  # те же UUID, что в Weaviate
+
+        events = [e if getattr(e, "uuid", None) else make_event_uuid(e) for e in events]
+        vectors = _normalize_rows(embed_events(events, embedder)) if events else np.zeros((0, 0), np.float32)
+        return cls(vectors, list(events), embedder.name)
+
+    def add(self, events: Sequence[Event], vectors: np.ndarray) -> None:
+        """Дописать события с готовыми векторами (индекс переходит в память из mmap)."""
+        if not len(events):
+            return
+        vectors = _normalize_rows(vectors)
+        self.vectors = np.concatenate([self.vectors, vectors]) if len(self.vectors) else vectors
+        self.events = self.events + list(events)
+        added = self._columns(events)
+        self.columns = {name: np.concatenate([self.columns[name], added[name]]) for name in added}
+
+    def save(self, directory: Optional[Path] = None) -> Path:
+        """Сохранить индекс: vectors.npy (np.save), columns.npz, events.jsonl, meta.json."""
+        directory = Path(directory or default_index_dir())
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors.npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        np.savez(directory / "columns.npz", **self.columns)
+        with open(directory / "events.jsonl", "w", encoding="utf-8") as f:
+            for event in self.events:
+                f.write(event.model_dump_json(exclude={"distance", "score"}) + "\n")
+        (directory / "meta.json").write_text(json.dumps({"embedder": self.embedder_name, "count": len(self.events)}))
+        return directory
+
+    @classmethod
+    def load(cls, directory: Optional[Path] = None, mmap: bool = True) -> "LocalVectorIndex":
+        """
+        Загрузить индекс; с mmap матрица векторов не читается в память целиком.
+
+        Raises:
+            FileNotFoundError: индекс не построен (scripts/build_local_index.py)
+        """
+        directory = Path(directory or default_index_dir())
+        if not (directory / "meta.json").exists():
+            raise FileNotFoundError(
+                f"Локальный индекс не найден: {directory}. Постройте его: python scripts/build_local_index.py"
+            )
+        meta = json.loads((directory / "meta.json").read_text())
+        vectors = np.load(directory / "vectors.npy", mmap_mode="r" if mmap else None)
+        with np.load(directory / "columns.npz") as data:
+            columns = {name: data[name] for name in data.files}
+        with open(directory / "events.jsonl", "r", encoding="utf-8") as f:
+            events = [Event.model_validate_json(line) for line in f if line.strip()]
+        return cls(vectors, events, meta["embedder"], columns)
+
+    def mask(
+        self,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+        bounds: Optional[DateBounds] = None,
+        near: Optional[Near] = None,
+    ) -> np.ndarray:
+        """
+        Булева маска строк — те же условия, что build_filter / build_date_filter /
+        build_geo_filter в Weaviate (события без дат проходят фильтр по датам).
+        """
+        cols = self.columns
+        owners = cols["owner"]
+        public = owners == "all"
+        if city:
+            public &= cols["city"] == city
+        if owner:
+            mask = (owners == owner) | public
+        elif city:
+            mask = (owners != "all") | public
+        else:
+            mask = np.ones(len(self), dtype=bool)
+
+        lower, upper = bounds or (None, None)
+        if lower is not None or upper is not None:
+            start = cols["start_ts"]
+            end = np.where(np.isnan(cols["end_ts"]), start, cols["end_ts"])
+            dated = np.ones(len(self), dtype=bool)
+            with np.errstate(invalid="ignore"):
+                if lower is not None:
+                    dated &= end >= lower.timestamp()
+                if upper is not None:
+                    dated &= start <= upper.timestamp()
+            mask &= dated | np.isnan(start)
+
+        if near:
+            lat, lon, radius_m = near
+            lat1, lon1 = np.radians(lat), np.radians(lon)
+            lat2, lon2 = np.radians(cols["lat"]), np.radians(cols["lon"])
+            a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+            distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+            with np.errstate(invalid="ignore"):
+                mask &= distance <= radius_m  # NaN (нет координат) не проходит
+
+        return mask
+
+    def search(self, query_vectors: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> List[Hits]:
+        """
+        Top-k по косинусной близости для пачки запросов одним умножением матриц на блок строк.
+
+        Args:
+            query_vectors: (q, dim) векторы запросов
+            k: Сколько событий вернуть на запрос
+            mask: Булева маска допустимых строк (None — все)
+
+        Returns:
+            Для каждого запроса: (индексы строк, косинусные дистанции) по возрастанию дистанции
+        """
+        queries = _normalize_rows(np.atleast_2d(query_vectors))
+        n = len(self)
+        if n == 0 or k <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, n, SEARCH_CHUNK_ROWS):
+            stop = min(start + SEARCH_CHUNK_ROWS, n)
+            scores = queries @ np.asarray(self.vectors[start:stop]).T
+            if mask is not None:
+                scores[:, ~mask[start:stop]] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, rows], axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+
+        hits = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores, kind="stable")
+            keep = order[np.isfinite(scores[order])]
+            hits.append((rows[keep], (1.0 - scores[keep]).astype(np.float32)))
+        return hits
+
+    def events_for(self, hits: Hits) -> List[Event]:
+        """События по результату search с distance / score, как у Weaviate."""
+        rows, distances = hits
+        return [
+            self.events[row].model_copy(update={"distance": float(d), "score": float(1.0 - d)})
+            for row, d in zip(rows.tolist(), distances.tolist())
+        ]
+
+
+class LocalEventRetriever(EventRetriever):
+    """
+    EventRetriever поверх LocalVectorIndex: тот же интерфейс retrieve / retrieve_many /
+    retrieve_candidates и те же фильтры, но поиск в памяти процесса.
+
+    Поддерживается только векторный режим: bm25 / hybrid выполняются как vector.
+    """
+
+    def __init__(
+        self,
+        index: Optional[LocalVectorIndex] = None,
+        index_dir: Optional[Path] = None,
+        embedder: Optional[Embeddings] = None,
+        mode: SearchMode = "vector",
+        use_cache: bool = False,
+        upcoming_only: bool = UPCOMING_ONLY,
+        **kwargs,
+    ):
+        """
+        Args:
+            index: Готовый индекс; по умолчанию загружается из index_dir
+            index_dir: Каталог индекса (по умолчанию LOCAL_INDEX_DIR / data/cache/local_index)
+            embedder: Эмбеддер запросов — тот же, что строил индекс
+                (по умолчанию EMBEDDER, иначе хэширующий)
+            mode: Режим поиска (только "vector")
+            use_cache: Кэш результатов (поиск в памяти и так дешёвый)
+            upcoming_only: Не возвращать уже закончившиеся события
+        """
+        embedder = as_cached(embedder) or _default_embedder()
+        super().__init__(mode=mode, use_cache=use_cache, upcoming_only=upcoming_only, embedder=embedder, **kwargs)
+        self.index = index if index is not None else LocalVectorIndex.load(index_dir)
+        if self.index.embedder_name != self.embedder.name:
+            raise ValueError(
+                f"Индекс построен эмбеддером {self.index.embedder_name}, а запросы — {self.embedder.name}"
+            )
+        # ключ кэша результатов не должен совпасть с Weaviate
+        self.weaviate_url = "local"
+        self.collection_name = str(index_dir or default_index_dir())
+        self._warned_mode = False
+
+    @classmethod
+    def from_events(cls, events: Sequence[Event], embedder: Optional[Embeddings] = None, **kwargs) -> "LocalEventRetriever":
+        """Построить индекс в памяти из событий (тесты, оценка)."""
+        embedder = as_cached(embedder) or _default_embedder()
+        return cls(index=LocalVectorIndex.build(events, embedder), embedder=embedder, **kwargs)
+
+    def _build_filters(
+        self,
+        owner: Optional[str],
+        city: Optional[str],
+        bounds: Optional[DateBounds],
+        near: Optional[Near],
+    ) -> np.ndarray:
+        return self.index.mask(owner, city, bounds, near)
+
+    def _check_mode(self, mode: Optional[SearchMode]) -> None:
+        mode = mode or self.mode
+        if mode not in ("vector", "bm25", "hybrid"):
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
+        if mode != "vector" and not self._warned_mode:
+            warnings.warn(f"Локальный индекс поддерживает только векторный поиск: режим {mode} выполняется как vector")
+            self._warned_mode = True
+
+    def _search(
+        self,
+        query: str,
+        limit: int,
+        filters=None,
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+    ) -> List[Event]:
+        self._check_mode(mode)
+        hits = self.index.search(self.embedder.query_vector(query)[None, :], limit, filters)
+        return self.index.events_for(hits[0])
+
+    def retrieve_many(
+        self,
+        queries: Sequence[str],
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+        mode: Optional[SearchMode] = None,
+        date_from=None,
+        date_to=None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        """Все формулировки одним умножением матриц и слияние через RRF."""
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            return []
+        self._check_mode(mode)
+        city = normalize_city(city)
+        mask = self.index.mask(owner, city, self._date_bounds(date_from, date_to), near)
+        vectors = self.embedder.embed_array(queries, kind="query")
+
+        results = []
+        for hits in self.index.search(vectors, limit, mask):
+            events = self.filter_by_dates(self.index.events_for(hits), date_from, date_to, self.upcoming_only)
+            results.append(self.filter_by_distance(events, near))
+        if len(results) == 1:
+            return results[0]
+        return reciprocal_rank_fusion(results)[:limit]
+
+
+def build_local_index(
+    events: Sequence[Event],
+    directory: Optional[Path] = None,
+    embedder: Optional[Embeddings] = None,
+) -> LocalVectorIndex:
+    """Построить индекс из событий и сохранить на диск."""
+    index = LocalVectorIndex.build(events, as_cached(embedder) or _default_embedder())
+    index.save(directory)
+    return index
+
+
+def create_event_retriever(**kwargs) -> EventRetriever:
+    """Retriever по RETRIEVAL_BACKEND: "weaviate" (по умолчанию) или "local" (LocalEventRetriever)."""
+    if RETRIEVAL_BACKEND == "local":
+        return LocalEventRetriever(**kwargs)
+    return EventRetriever(**kwargs)
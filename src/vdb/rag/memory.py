@@ -1,19 +1,298 @@
-"""Заглушка для проверки памяти (проверка похожих вопросов)."""
+"""
+Семантическая память запросов для Self-RAG.
 
-from typing import Optional
+Хранит прошлые (user_query, owner, city) → InputData в отдельной коллекции Weaviate
+(вектор строится тем же векторизатором, что и для событий). Если новый запрос
+достаточно близок к сохранённому, Self-RAG сразу возвращает InputData из памяти,
+пропуская извлечение города, поиск, оценку и переформулировку.
+
+- порог похожести: MEMORY_MAX_DISTANCE (косинусная дистанция); кроме того, у запросов
+  должны совпадать числа, города (газеттир) и окно дат ("сегодня" вчерашнего
+  запроса — другой день, чем "сегодня" нового);
+- TTL: MEMORY_TTL_SECONDS, устаревшие записи не находятся и удаляются при записи;
+- изоляция: поиск только среди записей того же owner;
+- инвалидация: при загрузке новых событий удаляются записи их городов
+  (и записи без города), для личных событий — все записи владельца.
+"""
+
+import re
+import warnings
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import weaviate
+    import weaviate.classes as wvc
+except ImportError:
+    weaviate = None
+    wvc = None
+
+from src.models.event import Event
+from src.planner_agent.models import InputData
+from src.utils.cities import normalize_city
+from src.utils.event_dates import EVENTS_TZ, DateWindow, parse_date_window
+from src.utils.gazetteer import find_cities
+from src.vdb.client import get_shared_client
+from src.vdb.config import (
+    MEMORY_CANDIDATES,
+    MEMORY_COLLECTION_NAME,
+    MEMORY_ENABLED,
+    MEMORY_MAX_DISTANCE,
+    MEMORY_TTL_SECONDS,
+)
+
+
+# Значения owner/city для записей без владельца/города (пустые строки не индексируются)
+PUBLIC_OWNER = "all"
+ANY_CITY = "any"
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _numbers(text: str) -> List[str]:
+    """Числа в запросе (время, бюджет, даты): у совпавших запросов они должны быть одинаковыми."""
+    return sorted(_NUMBER_RE.findall(text or ""))
+
+
+def _query_key(
+    text: str, today: Optional[date] = None
+) -> Tuple[List[str], List[Optional[str]], Optional[DateWindow]]:
+    """
+    Что должно совпасть у двух близких по вектору запросов, чтобы ответ подошёл:
+    числа, города из газеттира и окно дат, разрешённое на день запроса.
+    """
+    return _numbers(text), sorted(find_cities(text), key=str), parse_date_window(text, today=today)
+
+
+def _saved_day(created_at) -> Optional[date]:
+    """Локальный день, в который была сохранена запись памяти."""
+    if not isinstance(created_at, datetime):
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(EVENTS_TZ).date()
+
+
+class QueryMemory:
+    """Семантический кэш InputData по прошлым запросам."""
+
+    def __init__(
+        self,
+        collection_name: str = MEMORY_COLLECTION_NAME,
+        max_distance: float = MEMORY_MAX_DISTANCE,
+        ttl_seconds: int = MEMORY_TTL_SECONDS,
+        candidates: int = MEMORY_CANDIDATES,
+    ):
+        """
+        Args:
+            collection_name: Имя коллекции памяти в Weaviate
+            max_distance: Максимальная дистанция до сохранённого запроса
+            ttl_seconds: Время жизни записи
+            candidates: Сколько ближайших записей проверять по числам, городам и датам
+        """
+        self.collection_name = collection_name
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.candidates = candidates
+        self._collection_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def _get_collection(self):
+        client = get_shared_client()
+        if not self._collection_ready:
+            if not client.collections.exists(self.collection_name):
+                self._create_collection(client)
+            self._collection_ready = True
+        return client.collections.get(self.collection_name)
+
+    def _create_collection(self, client: weaviate.WeaviateClient) -> None:
+        client.collections.create(
+            name=self.collection_name,
+            description="Прошлые запросы Self-RAG и их InputData",
+            properties=[
+                wvc.config.Property(
+                    name="query",
+                    description="Запрос пользователя",
+                    data_type=wvc.config.DataType.TEXT,
+                    vectorize_property_name=False,  # Единственное поле для векторизации
+                ),
+                wvc.config.Property(
+                    name="owner",
+                    description="Владелец запроса",
+                    data_type=wvc.config.DataType.TEXT,
+                    skip_vectorization=True,
+                    tokenization=wvc.config.Tokenization.FIELD,
+                    index_filterable=True,
+                ),
+                wvc.config.Property(
+                    name="city",
+                    description="Нормализованный город запроса",
+                    data_type=wvc.config.DataType.TEXT,
+                    skip_vectorization=True,
+                    tokenization=wvc.config.Tokenization.FIELD,
+                    index_filterable=True,
+                ),
+                wvc.config.Property(
+                    name="payload",
+                    description="InputData в JSON",
+                    data_type=wvc.config.DataType.TEXT,
+                    skip_vectorization=True,
+                    index_filterable=False,
+                    index_searchable=False,
+                ),
+                wvc.config.Property(
+                    name="created_at",
+                    description="Время сохранения",
+                    data_type=wvc.config.DataType.DATE,
+                    index_filterable=True,
+                ),
+            ],
+            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_contextionary(),
+            vector_index_config=wvc.config.Configure.VectorIndex.hnsw(
+                distance_metric=wvc.config.VectorDistances.COSINE,
+            ),
+        )
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+
+    def lookup(self, user_query: str, owner: Optional[str] = None) -> Optional[InputData]:
+        """
+        Найти InputData для похожего запроса того же владельца.
+
+        Проверяются несколько ближайших записей в пределах max_distance: берётся
+        первая, у которой совпадают числа, города и окно дат (_query_key).
+
+        Args:
+            user_query: Запрос пользователя
+            owner: Владелец (None — публичные запросы)
+
+        Returns:
+            InputData с промптом текущего запроса или None
+        """
+        try:
+            collection = self._get_collection()
+            result = collection.query.near_text(
+                query=user_query,
+                limit=self.candidates,
+                distance=self.max_distance,
+                filters=(
+                    wvc.query.Filter.by_property("owner").equal(owner or PUBLIC_OWNER)
+                    & wvc.query.Filter.by_property("created_at").greater_than(self._cutoff())
+                ),
+                return_metadata=wvc.query.MetadataQuery(distance=True),
+            )
+        except Exception as e:
+            warnings.warn(f"Ошибка при поиске в памяти запросов: {e}")
+            self.misses += 1
+            return None
+
+        key = _query_key(user_query)
+        for obj in result.objects:
+            saved_day = _saved_day(obj.properties.get("created_at"))
+            if _query_key(obj.properties.get("query", ""), today=saved_day) != key:
+                continue
+            try:
+                input_data = InputData.model_validate_json(obj.properties["payload"])
+            except Exception as e:
+                warnings.warn(f"Повреждённая запись памяти {obj.uuid}: {e}")
+                continue
+            self.hits += 1
+            return input_data.model_copy(update={"user_prompt": user_query})
+
+        self.misses += 1
+        return None
+
+    def remember(
+        self,
+        user_query: str,
+        input_data: InputData,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+    ) -> None:
+        """Сохранить результат Self-RAG (и удалить устаревшие записи)."""
+        try:
+            collection = self._get_collection()
+            collection.data.delete_many(
+                where=wvc.query.Filter.by_property("created_at").less_than(self._cutoff())
+            )
+            collection.data.insert(
+                properties={
+                    "query": user_query,
+                    "owner": owner or PUBLIC_OWNER,
+                    "city": normalize_city(city) or ANY_CITY,
+                    "payload": input_data.model_dump_json(),
+                    "created_at": datetime.now(timezone.utc),
+                }
+            )
+        except Exception as e:
+            warnings.warn(f"Ошибка при сохранении в память запросов: {e}")
+
+    def invalidate(self, cities: Iterable[Optional[str]] = (), owners: Iterable[str] = ()) -> None:
+        """
+        Удалить записи, на которые влияют новые события.
+
+        Args:
+            cities: Города новых публичных событий (записи без города удаляются всегда)
+            owners: Владельцы новых личных событий (удаляются все их записи)
+        """
+        cities = sorted({c for c in (normalize_city(c) for c in cities) if c})
+        owners = sorted({o for o in owners if o and o != PUBLIC_OWNER})
+        if not cities and not owners:
+            return
+
+        city_prop = wvc.query.Filter.by_property("city")
+        where = city_prop.equal(ANY_CITY)
+        if cities:
+            where = where | city_prop.contains_any(cities)
+        if owners:
+            where = where | wvc.query.Filter.by_property("owner").contains_any(owners)
+
+        try:
+            self._get_collection().data.delete_many(where=where)
+        except Exception as e:
+            warnings.warn(f"Ошибка при инвалидации памяти запросов: {e}")
+
+    def close(self):
+        """Оставлено для совместимости: общий клиент закрывается close_shared_clients()."""
+
+
+_memory: Optional[QueryMemory] = None
+
+
+def get_query_memory() -> Optional[QueryMemory]:
+    """Общий экземпляр памяти процесса (None, если память выключена MEMORY_ENABLED)."""
+    global _memory
+    if not MEMORY_ENABLED:
+        return None
+    if _memory is None:
+        _memory = QueryMemory()
+    return _memory
+
+
+def invalidate_memory_for_events(events: Iterable[Event]) -> None:
+    """Инвалидация памяти после загрузки событий в Weaviate."""
+    memory = get_query_memory()
+    if memory is None:
+        return
+    events = list(events)
+    memory.invalidate(
+        cities=[e.city for e in events if e.owner == PUBLIC_OWNER],
+        owners=[e.owner for e in events if e.owner and e.owner != PUBLIC_OWNER],
+    )
 
 
 def check_memory(user_query: str, user_tag: Optional[str] = None) -> bool:
     """
     Проверяет, был ли задан похожий вопрос ранее.
-    
+
     Args:
         user_query: Запрос пользователя
-        user_tag: Тег пользователя (не используется в заглушке)
-        
+        user_tag: Владелец (изоляция памяти по пользователю)
+
     Returns:
-        False - всегда возвращает False (заглушка)
+        True, если в памяти есть ответ на похожий запрос
     """
-    # Заглушка: всегда возвращаем False
-    return False
-
+    memory = get_query_memory()
+    return memory is not None and memory.lookup(user_query, user_tag) is not None
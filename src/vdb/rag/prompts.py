@@ -78,3 +78,38 @@ CITY_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
 Извлеки город:"""),
 ])
 
+
+
+# --- Промпт для разбора запроса одним вызовом (QueryUnderstanding) ---
+QUERY_UNDERSTANDING_SYSTEM_PROMPT = """Ты разбираешь запрос пользователя к сервису планирования досуга.
+
+Сегодня: {today} ({weekday}).
+
+Заполни структуру:
+- city: город из запроса в стандартной форме ("спб", "питер" -> "Санкт-Петербург", "мск" -> "Москва") или null
+- date_from / date_to: окно дат, на которое планируется досуг ("в субботу" -> ближайшая суббота,
+  "на выходных" -> ближайшие суббота и воскресенье), или null, если даты не указаны
+- interests: интересы и категории событий ("выставка", "джаз", "мастер-класс"), кратко, в начальной форме
+- near_place: ориентир, рядом с которым искать ("около Невского" -> "Невский проспект",
+  "у метро Чистые пруды" -> "метро Чистые пруды"), или null; "рядом со мной" — null
+- constraints: ограничения планирования — start_time / end_time (HH:MM), max_total_time_minutes,
+  preferred_transport, budget, other_constraints; только то, что явно следует из запроса
+- search_query: короткая переформулировка запроса для поиска событий (без города, дат, ориентира и бюджета)
+
+Ничего не выдумывай: если поле не следует из запроса, оставь его пустым."""
+
+
+# --- Промпт для поштучной оценки релевантности событий ---
+EVENT_RELEVANCE_SCORING_SYSTEM_PROMPT = """Ты эксперт по оценке релевантности событий запросу пользователя.
+
+Оцени КАЖДОЕ событие из пронумерованного списка:
+- index: номер события из списка
+- score: релевантность от 0 до 1 (1 — точно подходит под запрос, 0 — не имеет отношения)
+- keep: true, если событие стоит оставить для планирования
+
+Оцени все события, не пропуская номера и не придумывая новых."""
+
+EVENT_RELEVANCE_SCORING_USER_PROMPT = """Запрос пользователя: {user_query}
+
+События:
+{retrieved_events}"""
@@ -0,0 +1,109 @@
+"""
+Разбор запроса одним структурированным вызовом LLM.
+
+QueryUnderstanding заменяет отдельные промпты извлечения города и ограничений:
+город, окно дат, интересы, Constraints и поисковая переформулировка приходят
+из одного JourneyLLM.parse. Локальные газеттир, парсер ограничений и окна дат
+применяются поверх ответа модели — детерминированные значения надёжнее.
+Если они разобрали город, даты и ограничения целиком, модель не вызывается
+(understand_locally).
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.planner_agent.models import Constraints
+from src.utils.cities import normalize_city
+from src.utils.constraints_parser import parse_constraints
+from src.utils.event_dates import parse_date_window
+from src.utils.gazetteer import extract_city
+from src.utils.journey_llm import parse_structured
+from src.vdb.rag.prompts import QUERY_UNDERSTANDING_SYSTEM_PROMPT
+
+
+_WEEKDAYS = ["понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"]
+# ориентир ("около Невского", "у метро") локально не разобрать — нужен near_place от LLM;
+# "рядом со мной" — геопозиция пользователя, а не ориентир
+_NEAR_CUE_RE = re.compile(
+    r"(?<!\w)(?:около|возле|вблизи|поблизости|недалеко|рядом(?!\s+со\s+мной)|в\s+районе|у\s+метро"
+    r"|near(?!\s+me)|close\s+to|around)(?!\w)",
+    re.IGNORECASE,
+)
+
+
+class QueryUnderstanding(BaseModel):
+    """Структурированный разбор запроса пользователя."""
+    city: Optional[str] = Field(description="Город из запроса или null", default=None)
+    date_from: Optional[date] = Field(description="Начало окна дат (YYYY-MM-DD) или null", default=None)
+    date_to: Optional[date] = Field(description="Конец окна дат (YYYY-MM-DD) или null", default=None)
+    interests: List[str] = Field(description="Интересы и категории событий", default_factory=list)
+    near_place: Optional[str] = Field(
+        description="Ориентир, рядом с которым искать события (улица, станция метро, достопримечательность), или null",
+        default=None,
+    )
+    constraints: Constraints = Field(description="Ограничения планирования", default_factory=Constraints)
+    search_query: Optional[str] = Field(description="Переформулировка запроса для поиска событий", default=None)
+
+
+def _system_prompt(today: date) -> str:
+    return QUERY_UNDERSTANDING_SYSTEM_PROMPT.format(today=today.isoformat(), weekday=_WEEKDAYS[today.weekday()])
+
+
+def apply_local_parsers(
+    understanding: QueryUnderstanding,
+    user_query: str,
+    today: Optional[date] = None,
+) -> QueryUnderstanding:
+    """Город из газеттира, локально разобранные ограничения и окно дат имеют приоритет над LLM."""
+    match = extract_city(user_query)
+    city = match.city if match.is_hit else normalize_city(understanding.city)
+
+    parsed = parse_constraints(user_query)
+    constraints = understanding.constraints.model_copy(
+        update={name: getattr(parsed.constraints, name) for name in parsed.found}
+    )
+
+    window = parse_date_window(user_query, today)
+    if window:
+        understanding = understanding.model_copy(update={"date_from": window[0], "date_to": window[1]})
+    elif understanding.date_from and understanding.date_to and understanding.date_to < understanding.date_from:
+        understanding = understanding.model_copy(update={"date_to": understanding.date_from})
+
+    return understanding.model_copy(update={"city": city, "constraints": constraints})
+
+
+def understand_locally(user_query: str, today: Optional[date] = None) -> Optional[QueryUnderstanding]:
+    """
+    Разбор запроса без LLM: только если газеттир нашёл город, в запросе есть окно дат,
+    у парсера ограничений не осталось полей для LLM и нет ориентира.
+
+    Returns:
+        QueryUnderstanding от локальных парсеров или None, если нужен understand_query
+    """
+    if _NEAR_CUE_RE.search(user_query) or not extract_city(user_query).is_hit:
+        return None
+    if parse_constraints(user_query).needs_llm:
+        return None
+    understanding = apply_local_parsers(QueryUnderstanding(), user_query, today)
+    return understanding if understanding.date_from else None
+
+
+def understand_query(llm, user_query: str, today: Optional[date] = None) -> QueryUnderstanding:
+    """
+    Один вызов LLM вместо отдельных извлечений города и ограничений.
+
+    Args:
+        llm: JourneyLLM или LangChain chat-модель
+        user_query: Запрос пользователя
+        today: Дата «сегодня» для относительных дат (по умолчанию — текущая)
+
+    Returns:
+        QueryUnderstanding с применёнными локальными парсерами
+    """
+    today = today or datetime.now().date()
+    understanding = parse_structured(llm, QueryUnderstanding, user_query, _system_prompt(today))
+    return apply_local_parsers(understanding, user_query, today)
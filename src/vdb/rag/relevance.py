@@ -0,0 +1,109 @@
+"""
+Оценка релевантности по дистанциям поиска без вызова LLM.
+
+Ретривер кладёт в событие косинусную дистанцию до запроса (event.distance,
+только в режиме vector). Политика:
+- принять, если не меньше min_hits событий ближе accept_distance;
+- отклонить, если все события дальше reject_distance (или событий нет);
+- иначе решение за LLM (RELEVANCE_EVALUATION_PROMPT).
+
+Пороги калибруются офлайн: scripts/calibrate_relevance_thresholds.py.
+
+В пограничных случаях LLM оценивает каждое событие одним структурированным
+вызовом (score_events): нерелевантные события отбрасываются, а переформулировка
+нужна, только если осталось меньше RELEVANCE_MIN_KEPT_EVENTS.
+"""
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.models.event import Event
+from src.utils.journey_llm import parse_structured
+from src.vdb.config import (
+    RELEVANCE_ACCEPT_DISTANCE,
+    RELEVANCE_ACCEPT_MIN_HITS,
+    RELEVANCE_MIN_SCORE,
+    RELEVANCE_REJECT_DISTANCE,
+)
+from src.vdb.rag.prompts import EVENT_RELEVANCE_SCORING_SYSTEM_PROMPT, EVENT_RELEVANCE_SCORING_USER_PROMPT
+
+
+class EventScore(BaseModel):
+    """Оценка одного события."""
+    index: int = Field(description="Номер события из списка (с 1)")
+    score: float = Field(description="Релевантность от 0 до 1")
+    keep: bool = Field(description="Оставить событие для планирования")
+
+
+class EventRelevanceScores(BaseModel):
+    """Оценки всех событий выдачи."""
+    scores: List[EventScore] = Field(description="Оценка для каждого события", default_factory=list)
+
+    def kept_indices(self, min_score: float = RELEVANCE_MIN_SCORE) -> List[int]:
+        """Номера оставленных событий (с 1) по убыванию score."""
+        kept = [s for s in self.scores if s.keep and s.score >= min_score]
+        return [s.index for s in sorted(kept, key=lambda s: s.score, reverse=True)]
+
+
+def event_distances(events: Sequence[Event]) -> List[float]:
+    """Дистанции найденных событий (события без дистанции пропускаются)."""
+    return [d for d in (getattr(e, "distance", None) for e in events) if d is not None]
+
+
+@dataclass
+class RelevancePolicy:
+    """Пороговая политика: True — релевантно, False — нет, None — спросить LLM."""
+    accept_distance: float = RELEVANCE_ACCEPT_DISTANCE
+    accept_min_hits: int = RELEVANCE_ACCEPT_MIN_HITS
+    reject_distance: float = RELEVANCE_REJECT_DISTANCE
+
+    def decide(self, events: Sequence[Event]) -> Optional[bool]:
+        if not events:
+            return False
+
+        distances = event_distances(events)
+        # дистанций нет (bm25/hybrid) или их меньше, чем событий — решать по ним нельзя
+        if len(distances) < len(events):
+            return None
+        return self.decide_distances(distances)
+
+    def decide_distances(self, distances: Sequence[float]) -> Optional[bool]:
+        """Решение по готовому списку дистанций (используется и при калибровке)."""
+        if not distances:
+            return False
+        if sum(d <= self.accept_distance for d in distances) >= self.accept_min_hits:
+            return True
+        if min(distances) > self.reject_distance:
+            return False
+        return None
+
+
+def score_events(
+    llm: Any,
+    user_query: str,
+    events: Sequence[Event],
+    events_context: str,
+    min_score: float = RELEVANCE_MIN_SCORE,
+) -> Tuple[List[Event], EventRelevanceScores]:
+    """
+    Поштучная оценка событий одним вызовом LLM.
+
+    Args:
+        llm: JourneyLLM или LangChain chat-модель
+        user_query: Запрос пользователя
+        events: События в порядке выдачи
+        events_context: Они же, пронумерованные (EventRetriever.format_events_for_context)
+        min_score: Минимальный score оставляемого события
+
+    Returns:
+        (оставленные события по убыванию score, сырые оценки)
+    """
+    result = parse_structured(
+        llm,
+        EventRelevanceScores,
+        EVENT_RELEVANCE_SCORING_USER_PROMPT.format(user_query=user_query, retrieved_events=events_context),
+        EVENT_RELEVANCE_SCORING_SYSTEM_PROMPT,
+    )
+    kept = [events[i - 1] for i in dict.fromkeys(result.kept_indices(min_score)) if 1 <= i <= len(events)]
+    return kept, result
@@ -1,7 +1,14 @@
 """Retriever для поиска событий в Weaviate с фильтрацией по тегам."""
 
-from typing import List, Optional
-from urllib.parse import urlparse
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Hashable, List, Literal, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
 
 try:
     import weaviate
@@ -10,45 +17,233 @@ except ImportError:
     weaviate = None
     wvc = None
 
-from src.vdb.config import WEAVIATE_URL, COLLECTION_NAME, MAX_EVENTS
+from src.vdb.config import (
+    WEAVIATE_URL,
+    COLLECTION_NAME,
+    MAX_EVENTS,
+    RETRIEVAL_MODE,
+    HYBRID_ALPHA,
+    BM25_PROPERTIES,
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    UPCOMING_ONLY,
+)
 from src.models.event import Event
+from src.utils.cities import city_from_text, normalize_city
+from src.utils.event_dates import EVENTS_TZ, day_start, in_window, window_bounds
+from src.utils.maps import haversine_distance_m
+from src.utils.paths import project_root
+from src.vdb.client import get_client_manager, get_shared_client
+from src.vdb.embeddings import CachedEmbeddings, as_cached, get_embedder
+
+
+SearchMode = Literal["vector", "bm25", "hybrid"]
+
+# Границы окна дат для фильтра Weaviate: (нижняя, верхняя), любая может быть None
+DateBounds = Tuple[Optional[datetime], Optional[datetime]]
+# Поиск в радиусе: (широта, долгота, радиус в метрах)
+Near = Tuple[float, float, float]
+
+
+class CollectionSchema(NamedTuple):
+    """Что поддерживает схема коллекции (старые коллекции фильтруются по городу, датам и координатам только локально)."""
+    has_dates: bool
+    null_indexed: bool
+    has_coords: bool
+    has_city: bool
+    # коллекция без векторизатора: векторы запросов считает клиент (EMBEDDER)
+    client_vectors: bool = False
+
+# Константа сглаживания RRF (стандартное значение из Cormack et al., 2009)
+RRF_K: int = 60
+
+
+def event_key(event: Event) -> str:
+    """Ключ дедупликации: UUID объекта Weaviate, иначе название + место + дата."""
+    uuid = getattr(event, "uuid", None)
+    if uuid:
+        return str(uuid)
+    return f"{event.title}|{event.location}|{event.date}"
+
+
+def _closer(candidate: Event, current: Event) -> bool:
+    """Ближе ли candidate к своему запросу: меньше distance, а без неё — больше score (hybrid)."""
+    new_d, old_d = getattr(candidate, "distance", None), getattr(current, "distance", None)
+    if new_d is not None or old_d is not None:
+        return new_d is not None and (old_d is None or new_d < old_d)
+    new_s, old_s = getattr(candidate, "score", None), getattr(current, "score", None)
+    return new_s is not None and (old_s is None or new_s > old_s)
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Event]], k: int = RRF_K) -> List[Event]:
+    """
+    Объединяет несколько ранжированных списков: score(e) = Σ 1 / (k + rank).
+    События дедуплицируются по event_key; при равенстве score раньше идёт то,
+    что встретилось раньше.
+
+    Из копий одного события остаётся та, что ближе всего к своему запросу
+    (минимальная distance, для hybrid — максимальный score): пороги релевантности
+    (RELEVANCE_*_DISTANCE) оценивают лучшее совпадение с любой формулировкой запроса,
+    а не случайно первую из них.
+    """
+    scores: Dict[str, float] = {}
+    events: Dict[str, Event] = {}
+    for results in result_lists:
+        for rank, event in enumerate(results, 1):
+            key = event_key(event)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in events or _closer(event, events[key]):
+                events[key] = event
+
+    order = sorted(scores, key=lambda key: -scores[key])
+    return [events[key] for key in order]
+
+
+# Поколение данных: увеличивается при каждой загрузке событий. Файл-маркер нужен,
+# чтобы загрузка в другом процессе (sync worker, скрипты) сбрасывала кэш бота.
+_GENERATION_FILE = project_root() / "data" / "cache" / "retrieval_generation"
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def bump_retrieval_generation() -> None:
+    """Сбросить кэш поиска во всех процессах: вызывать после загрузки/удаления событий."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    try:
+        _GENERATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _GENERATION_FILE.write_text(str(time.time_ns()))
+    except OSError:
+        pass
+
+
+def retrieval_generation() -> Tuple[int, int]:
+    """Текущее поколение: счётчик процесса и время изменения файла-маркера."""
+    try:
+        mtime = _GENERATION_FILE.stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+    return _generation, mtime
+
+
+class RetrievalCache:
+    """Кэш результатов поиска в памяти процесса: TTL + LRU + поколение данных."""
+
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = RETRIEVAL_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Event]]]" = OrderedDict()
+        self._generation = retrieval_generation()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_generation(self) -> None:
+        generation = retrieval_generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable) -> Optional[List[Event]]:
+        """Результат поиска или None (промах, истёк TTL, данные обновились)."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: Hashable, events: List[Event]) -> None:
+        with self._lock:
+            self._check_generation()
+            self._entries[key] = (time.monotonic(), list(events))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Счётчики попаданий/промахов и размер кэша."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
+
+
+_retrieval_cache = RetrievalCache()
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """Общий кэш поиска процесса (разделяется всеми EventRetriever)."""
+    return _retrieval_cache
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
 
 
 class EventRetriever:
     """Retriever для поиска событий в Weaviate."""
 
-    def __init__(self, weaviate_url: str = WEAVIATE_URL, collection_name: str = COLLECTION_NAME):
+    def __init__(
+        self,
+        weaviate_url: str = WEAVIATE_URL,
+        collection_name: str = COLLECTION_NAME,
+        mode: SearchMode = RETRIEVAL_MODE,
+        alpha: float = HYBRID_ALPHA,
+        query_properties: Optional[List[str]] = None,
+        use_cache: bool = RETRIEVAL_CACHE_ENABLED,
+        upcoming_only: bool = UPCOMING_ONLY,
+        embedder: Optional[Embeddings] = None,
+    ):
         """
         Инициализация retriever.
 
         Args:
             weaviate_url: URL сервера Weaviate
             collection_name: Имя коллекции с событиями
+            mode: Режим поиска по умолчанию: "vector", "bm25" или "hybrid"
+            alpha: Вес векторной части в hybrid (0 — BM25, 1 — вектор)
+            query_properties: Поля для BM25 с бустами ("title^3")
+            use_cache: Использовать общий кэш результатов (get_retrieval_cache())
+            upcoming_only: Не возвращать уже закончившиеся события (фильтр по end_ts)
+            embedder: Эмбеддер запросов для коллекции с векторами клиента;
+                по умолчанию get_embedder() (None — near_text, векторизует Weaviate)
         """
         self.weaviate_url = weaviate_url
         self.collection_name = collection_name
-        self._client: Optional[weaviate.WeaviateClient] = None
+        self.mode = mode
+        self.alpha = alpha
+        self.query_properties = query_properties or list(BM25_PROPERTIES)
+        self.cache: Optional[RetrievalCache] = get_retrieval_cache() if use_cache else None
+        self.upcoming_only = upcoming_only
+        self.embedder: Optional[CachedEmbeddings] = as_cached(embedder) or get_embedder()
+        # схема коллекции читается один раз (_load_schema)
+        self._schema: Optional[CollectionSchema] = None
 
     def _get_client(self) -> weaviate.WeaviateClient:
-        """Получить или создать клиент Weaviate."""
-        if self._client is None:
-            parsed = urlparse(self.weaviate_url)
-            http_port = parsed.port or (443 if parsed.scheme == "https" else 8080)
-            http_secure = parsed.scheme == "https"
-            hostname = parsed.hostname or "localhost"
-
-            if hostname in ("localhost", "127.0.0.1") and http_port == 8080 and not http_secure:
-                self._client = weaviate.connect_to_local()
-            else:
-                self._client = weaviate.connect_to_custom(
-                    http_host=hostname,
-                    http_port=http_port,
-                    http_secure=http_secure,
-                    grpc_host=hostname,
-                    grpc_port=50051,
-                    grpc_secure=http_secure,
-                )
-        return self._client
+        """Общий клиент Weaviate процесса (пул и проверка здоровья — в src.vdb.client)."""
+        return get_shared_client(self.weaviate_url)
 
     def retrieve(
         self,
@@ -56,20 +251,354 @@ class EventRetriever:
         limit: int = MAX_EVENTS,
         owner: Optional[str] = None,
         city: Optional[str] = None,
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        near: Optional[Near] = None,
     ) -> List[Event]:
         """
-        Поиск событий по запросу с фильтрацией по владельцу и городу.
+        Поиск событий по запросу с фильтрацией по владельцу, городу, датам и расстоянию.
+
+        Фильтр выполняется в Weaviate одним запросом вместе с векторным поиском:
+        (owner == X OR (owner == "all" AND city == Y)) AND окно дат по start_ts / end_ts
+        AND coords в радиусе near.
 
         Args:
             query: Поисковый запрос
             limit: Максимальное количество результатов
             owner: Владелец события для фильтрации
             city: Город для фильтрации (применяется только для публичных событий owner="all")
+            mode: Режим поиска ("vector", "bm25", "hybrid"); по умолчанию self.mode
+            alpha: Вес векторной части для hybrid; по умолчанию self.alpha
+            date_from: Начало окна дат (включительно)
+            date_to: Конец окна дат (включительно); по умолчанию равен date_from
+            near: (широта, долгота, радиус в метрах) — только события в радиусе
 
         Returns:
             Список найденных событий
         """
+        city = normalize_city(city)
+        bounds = self._date_bounds(date_from, date_to)
+        filters = self._build_filters(owner, city, bounds, near)
+        events = self._cached_search(query, limit, filters, owner, city, mode, alpha, bounds, near)
+        events = self.filter_by_city(events, city)
+        events = self.filter_by_dates(events, date_from, date_to, self.upcoming_only)
+        return self.filter_by_distance(events, near)
+
+    def retrieve_many(
+        self,
+        queries: Sequence[str],
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+        city: Optional[str] = None,
+        mode: Optional[SearchMode] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        """
+        Параллельный поиск по нескольким формулировкам запроса и слияние через RRF.
+
+        Args:
+            queries: Формулировки запроса (исходная + переформулированные)
+            limit: Максимальное количество результатов после слияния
+            owner: Владелец события для фильтрации
+            city: Город для фильтрации публичных событий
+            mode: Режим поиска; по умолчанию self.mode
+            date_from: Начало окна дат
+            date_to: Конец окна дат
+            near: (широта, долгота, радиус в метрах)
+
+        Returns:
+            Список уникальных событий, упорядоченный по RRF
+        """
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            return []
+        search = lambda q: self.retrieve(
+            q, limit=limit, owner=owner, city=city, mode=mode, date_from=date_from, date_to=date_to, near=near,
+        )
+        if len(queries) == 1:
+            return search(queries[0])
+
+        self._get_client()  # создаём клиент до запуска потоков
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            results = list(pool.map(search, queries))
+
+        return reciprocal_rank_fusion(results)[:limit]
+
+    def retrieve_candidates(
+        self,
+        query: str,
+        limit: int = MAX_EVENTS,
+        owner: Optional[str] = None,
+    ) -> List[Event]:
+        """
+        Семантический поиск кандидатов (limit * 3) без фильтра по городу.
+
+        Нужен, чтобы начать поиск, ещё не зная города и дат: они затем
+        применяются локально через filter_by_city / filter_by_dates.
+
+        Args:
+            query: Поисковый запрос
+            limit: Итоговое количество результатов (кандидатов берётся втрое больше)
+            owner: Владелец события для фильтрации
+
+        Returns:
+            Список кандидатов в порядке близости
+        """
+        bounds = self._date_bounds(None, None)
+        filters = self._build_filters(owner, None, bounds, None)
+        events = self._cached_search(query, limit * 3, filters, owner, None, bounds=bounds)
+        return self.filter_by_dates(events, None, None, self.upcoming_only)
+
+    def _cache_key(
+        self,
+        query: str,
+        limit: int,
+        owner: Optional[str],
+        city: Optional[str],
+        mode: Optional[SearchMode],
+        alpha: Optional[float],
+        bounds: Optional[DateBounds] = None,
+        near: Optional[Near] = None,
+    ) -> Hashable:
+        """Ключ кэша: нормализованные аргументы (фильтр однозначно задают owner, city, bounds и near)."""
+        mode = mode or self.mode
+        alpha = (self.alpha if alpha is None else alpha) if mode == "hybrid" else None
+        return (
+            self.weaviate_url, self.collection_name, _normalize_query(query),
+            limit, owner, city, mode, alpha, bounds, tuple(near) if near else None,
+            tuple(self.query_properties) if mode != "vector" else None,
+            self.embedder.name if self.embedder is not None and mode != "bm25" else None,
+        )
+
+    def _cached_search(
+        self,
+        query: str,
+        limit: int,
+        filters,
+        owner: Optional[str],
+        city: Optional[str],
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+        bounds: Optional[DateBounds] = None,
+        near: Optional[Near] = None,
+    ) -> List[Event]:
+        """_search через общий кэш результатов."""
+        if self.cache is None:
+            return self._search(query, limit=limit, filters=filters, mode=mode, alpha=alpha)
+
+        key = self._cache_key(query, limit, owner, city, mode, alpha, bounds, near)
+        events = self.cache.get(key)
+        if events is None:
+            events = self._search(query, limit=limit, filters=filters, mode=mode, alpha=alpha)
+            # пустой результат может быть ошибкой Weaviate — не кэшируем
+            if events:
+                self.cache.put(key, events)
+        return events
+
+    @staticmethod
+    def build_filter(owner: Optional[str], city: Optional[str]):
+        """
+        Фильтр Weaviate по владельцу и (нормализованному) городу.
+
+        Город ограничивает только публичные события (owner="all"),
+        личные события пользователя по городу не фильтруются.
+        """
+        owner_prop = wvc.query.Filter.by_property("owner")
+        public = owner_prop.equal("all")
+        if city:
+            public = public & wvc.query.Filter.by_property("city").equal(city)
+
+        if owner:
+            return owner_prop.equal(owner) | public
+        if city:
+            return owner_prop.not_equal("all") | public
+        return None
+
+    @staticmethod
+    def build_date_filter(bounds: Optional[DateBounds], keep_undated: bool = True):
+        """
+        Фильтр Weaviate по окну дат: end_ts >= нижней границы AND start_ts <= верхней.
+
+        С keep_undated события без дат тоже проходят (прошедшими их не признать);
+        для этого в коллекции должен быть индексирован null (index_null_state).
+        """
+        lower, upper = bounds or (None, None)
+        conditions = []
+        if lower is not None:
+            conditions.append(wvc.query.Filter.by_property("end_ts").greater_or_equal(lower))
+        if upper is not None:
+            conditions.append(wvc.query.Filter.by_property("start_ts").less_or_equal(upper))
+        if not conditions:
+            return None
+        dated = wvc.query.Filter.all_of(conditions) if len(conditions) > 1 else conditions[0]
+        if keep_undated:
+            return dated | wvc.query.Filter.by_property("start_ts").is_none(True)
+        return dated
+
+    @staticmethod
+    def _combine_filters(*filters):
+        filters = [f for f in filters if f is not None]
+        if not filters:
+            return None
+        return wvc.query.Filter.all_of(filters) if len(filters) > 1 else filters[0]
+
+    def _date_bounds(self, date_from: Optional[date], date_to: Optional[date]) -> Optional[DateBounds]:
+        """
+        Границы окна дат для Weaviate или None, если фильтровать по датам не нужно.
+
+        «Сейчас» округляется до начала дня: ключ кэша не меняется каждую секунду,
+        а уже закончившиеся сегодня события отсекает filter_by_dates.
+        """
+        if not (self.upcoming_only or date_from or date_to):
+            return None
+        today = day_start(datetime.now(EVENTS_TZ).date())
+        return window_bounds(date_from, date_to, now=today, upcoming_only=self.upcoming_only)
+
+    @staticmethod
+    def build_geo_filter(near: Optional[Near]):
+        """Фильтр Weaviate: coords в радиусе near = (широта, долгота, радиус в метрах)."""
+        if not near:
+            return None
+        lat, lon, radius_m = near
+        return wvc.query.Filter.by_property("coords").within_geo_range(
+            coordinate=wvc.data.GeoCoordinate(latitude=lat, longitude=lon),
+            distance=float(radius_m),
+        )
+
+    @staticmethod
+    def _parse_schema(config) -> CollectionSchema:
+        names = {prop.name for prop in config.properties}
+        vectorizer = getattr(config, "vectorizer", None)
+        has_dates = {"start_ts", "end_ts"} <= names
+        return CollectionSchema(
+            has_dates=has_dates,
+            null_indexed=bool(has_dates and config.inverted_index_config.index_null_state),
+            has_coords="coords" in names,
+            has_city="city" in names,
+            client_vectors=str(getattr(vectorizer, "value", vectorizer)) == "none",
+        )
+
+    def _load_schema(self) -> None:
+        """Один раз читает схему коллекции: старые коллекции без city / start_ts / coords фильтруются только локально."""
+        if self._schema is not None:
+            return
+        try:
+            config = self._get_client().collections.get(self.collection_name).config.get()
+        except Exception:
+            return  # попробуем при следующем запросе
+        self._set_schema(self._parse_schema(config))
+
+    def _set_schema(self, schema: CollectionSchema) -> None:
+        self._schema = schema
+        missing = [
+            name for name, ok in (
+                ("city", schema.has_city), ("start_ts/end_ts", schema.has_dates), ("coords", schema.has_coords),
+            ) if not ok
+        ]
+        if missing:
+            warnings.warn(
+                f"В коллекции '{self.collection_name}' нет {', '.join(missing)}: фильтр только локальный. "
+                "Пересоздайте коллекцию (add_events.py --recreate) и загрузите события заново."
+            )
+        if self.embedder is not None and not schema.client_vectors:
+            warnings.warn(
+                f"Коллекция '{self.collection_name}' векторизуется на сервере: EMBEDDER не используется. "
+                "Пересоздайте коллекцию с EMBEDDER, чтобы векторы считал клиент."
+            )
+        elif self.embedder is None and schema.client_vectors:
+            warnings.warn(
+                f"В коллекции '{self.collection_name}' нет векторизатора: векторный поиск требует EMBEDDER."
+            )
+
+    def _build_filters(
+        self,
+        owner: Optional[str],
+        city: Optional[str],
+        bounds: Optional[DateBounds],
+        near: Optional[Near],
+    ):
+        """build_filter по владельцу и городу AND фильтры по датам и радиусу (если коллекция их поддерживает)."""
+        self._load_schema()
+        return self._schema_filters(owner, city, bounds, near)
+
+    def _schema_filters(
+        self,
+        owner: Optional[str],
+        city: Optional[str],
+        bounds: Optional[DateBounds],
+        near: Optional[Near],
+    ):
+        schema = self._schema
+        date_filter = geo_filter = None
+        if not (schema and schema.has_city):
+            city = None  # свойства city нет (или схема не прочитана) — город отфильтрует filter_by_city
+        if bounds is not None and schema and schema.has_dates:
+            date_filter = self.build_date_filter(bounds, keep_undated=schema.null_indexed)
+        if near and schema and schema.has_coords:
+            geo_filter = self.build_geo_filter(near)
+        return self._combine_filters(self.build_filter(owner, city), date_filter, geo_filter)
+
+    @staticmethod
+    def filter_by_dates(
+        events: List[Event],
+        date_from: Optional[date],
+        date_to: Optional[date],
+        upcoming_only: bool = True,
+        now: Optional[datetime] = None,
+    ) -> List[Event]:
+        """
+        Локальный аналог фильтра по датам: точное отсечение закончившихся событий
+        и фильтр кандидатов, найденных до того, как стало известно окно дат.
+        """
+        if not (upcoming_only or date_from or date_to):
+            return list(events)
+        lower, upper = window_bounds(date_from, date_to, now=now, upcoming_only=upcoming_only)
+        return [e for e in events if in_window(e.start_ts, e.end_ts, lower, upper)]
+
+    @staticmethod
+    def filter_by_distance(events: List[Event], near: Optional[Near]) -> List[Event]:
+        """
+        Локальный аналог фильтра по радиусу (для кандидатов и коллекций без coords).
+        События без координат не проходят: близость к точке не подтвердить.
+        """
+        if not near:
+            return list(events)
+        lat, lon, radius_m = near
+        return [
+            e for e in events
+            if e.geopoint is not None and haversine_distance_m(e.geopoint, (lon, lat)) <= radius_m
+        ]
+
+    def _query_vector(self, query: str, mode: SearchMode) -> Optional[List[float]]:
+        """
+        Вектор запроса от эмбеддера клиента (повторные запросы — из кэша эмбеддингов)
+        или None: BM25, нет эмбеддера или коллекция векторизуется на сервере.
+        """
+        if self.embedder is None or mode == "bm25":
+            return None
+        if self._schema is not None and not self._schema.client_vectors:
+            return None
+        return self.embedder.query_vector(query).tolist()
+
+    def _search(
+        self,
+        query: str,
+        limit: int,
+        filters=None,
+        mode: Optional[SearchMode] = None,
+        alpha: Optional[float] = None,
+    ) -> List[Event]:
+        mode = mode or self.mode
+        if mode not in ("vector", "bm25", "hybrid"):
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
         client = self._get_client()
+        if self.embedder is not None:
+            self._load_schema()
+        vector = self._query_vector(query, mode)
 
         try:
             collection = client.collections.get(self.collection_name)
@@ -79,56 +608,82 @@ class EventRetriever:
 
         # Выполняем поиск
         try:
-            # В Weaviate v4 near_text не поддерживает where напрямую
-            # Используем двухэтапный подход: сначала семантический поиск, затем фильтрация
-            result = collection.query.near_text(
-                query=query,
-                limit=limit * 3,  # Берем больше результатов для фильтрации по городу
-                return_metadata=wvc.query.MetadataQuery(distance=True),
-            )
-
-            events = []
-            for obj in result.objects:
-                try:
-                    obj_owner = obj.properties.get("owner")
-                    
-                    # Фильтруем по владельцу программно
-                    if owner:
-                        # Проверяем, соответствует ли владелец объекта запрошенному
-                        if owner != obj_owner:
-                            continue
-                    
-                    # Фильтрация по городу применяется ТОЛЬКО для публичных событий (owner="all")
-                    # Личные события пользователя не фильтруются по городу
-                    if city and obj_owner == "all":
-                        obj_location = obj.properties.get("location") or ""
-                        obj_country = obj.properties.get("country") or ""
-                        
-                        # Проверяем наличие города в location или country (без учёта регистра)
-                        city_lower = city.lower()
-                        if city_lower not in obj_location.lower() and city_lower not in obj_country.lower():
-                            continue
-                    
-                    event = Event(**obj.properties)
-                    events.append(event)
-                    
-                    # Ограничиваем количество результатов
-                    if len(events) >= limit:
-                        break
-                        
-                except Exception as e:
-                    # Пропускаем объекты, которые не соответствуют модели
-                    import warnings
-                    warnings.warn(f"Ошибка при парсинге события: {e}")
-                    continue
-
-            return events
+            return self._to_events(self._query(collection, query, limit, filters, mode, alpha, vector))
         except Exception as e:
             # В случае ошибки возвращаем пустой список
-            import warnings
             warnings.warn(f"Ошибка при поиске в Weaviate: {e}")
+            # соединение могло умереть — проверить клиент при следующем обращении
+            get_client_manager().mark_unhealthy(self.weaviate_url)
             return []
 
+    def _query(
+        self,
+        collection,
+        query: str,
+        limit: int,
+        filters,
+        mode: SearchMode,
+        alpha: Optional[float],
+        vector: Optional[List[float]] = None,
+    ):
+        """
+        Запрос к коллекции в нужном режиме. Для асинхронной коллекции
+        (AsyncEventRetriever) возвращает корутину.
+
+        vector — вектор запроса от эмбеддера клиента (near_vector вместо near_text).
+        """
+        metadata = wvc.query.MetadataQuery(distance=True, score=True)
+        if mode == "vector" and vector is not None:
+            return collection.query.near_vector(
+                near_vector=vector, limit=limit, filters=filters, return_metadata=metadata,
+            )
+        if mode == "vector":
+            return collection.query.near_text(
+                query=query, limit=limit, filters=filters, return_metadata=metadata,
+            )
+        if mode == "bm25":
+            return collection.query.bm25(
+                query=query, limit=limit, filters=filters,
+                query_properties=self.query_properties, return_metadata=metadata,
+            )
+        return collection.query.hybrid(
+            query=query, vector=vector, limit=limit, filters=filters,
+            alpha=self.alpha if alpha is None else alpha,
+            query_properties=self.query_properties, return_metadata=metadata,
+        )
+
+    @staticmethod
+    def _to_events(result) -> List[Event]:
+        events = []
+        for obj in result.objects:
+            try:
+                # UUID объекта нужен для кэша планов и дедупликации;
+                # distance (только vector) / score — для оценки релевантности без LLM
+                event = Event(**{
+                    **obj.properties,
+                    "uuid": str(obj.uuid),
+                    "distance": obj.metadata.distance,
+                    "score": obj.metadata.score,
+                })
+                events.append(event)
+            except Exception as e:
+                # Пропускаем объекты, которые не соответствуют модели
+                warnings.warn(f"Ошибка при парсинге события: {e}")
+                continue
+        return events
+
+    @staticmethod
+    def filter_by_city(events: List[Event], city: Optional[str]) -> List[Event]:
+        """
+        Локальный аналог фильтра по городу из build_filter (для кандидатов, найденных
+        до того, как стал известен город, и коллекций без свойства city).
+        У событий из старых коллекций city нет — город ищется в адресе.
+        """
+        city = normalize_city(city)
+        if not city:
+            return list(events)
+        return [e for e in events if e.owner != "all" or (e.city or city_from_text(e.location)) == city]
+
     def format_events_for_context(self, events: List[Event]) -> str:
         """
         Форматирует события для использования в контексте промпта.
@@ -158,8 +713,8 @@ class EventRetriever:
         return "\n\n".join(formatted)
 
     def close(self):
-        """Закрыть соединение с Weaviate."""
-        if self._client is not None:
-            self._client.close()
-            self._client = None
+        """
+        Оставлено для совместимости: клиент общий для процесса и закрывается
+        close_shared_clients() на shutdown (или при выходе из процесса).
+        """
 
@@ -2,23 +2,49 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import List, Literal, Optional, Tuple, TypedDict, Union
+import operator
+import re
+import time
+from datetime import date
+from pathlib import Path
+from typing import Annotated, Any, Dict, List, Literal, Optional, Sequence, Set, Tuple, TypedDict, Union
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 
-from src.vdb.config import OPENAI_API_KEY, OPENAI_MODEL, MAX_ITERATIONS
+from src.vdb.config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    MAX_EVENTS,
+    MAX_ITERATIONS,
+    NEAR_RADIUS_M,
+    QUERY_UNDERSTANDING_ENABLED,
+    RELEVANCE_MIN_KEPT_EVENTS,
+)
 from src.models.event import Event
-from src.vdb.rag.memory import check_memory
+from src.vdb.rag.memory import QueryMemory, get_query_memory
 from src.vdb.rag.prompts import (
     CITY_EXTRACTION_PROMPT,
     QUERY_REFORMULATION_PROMPT,
     RELEVANCE_EVALUATION_PROMPT,
 )
-from src.vdb.rag.retriever import EventRetriever
+from src.vdb.rag.query_understanding import (
+    QueryUnderstanding,
+    apply_local_parsers,
+    understand_locally,
+    understand_query,
+)
+from src.vdb.rag.relevance import RelevancePolicy, event_distances, score_events
+from src.vdb.rag.retriever import EventRetriever, Near, event_key
+from src.vdb.rag.local_retriever import create_event_retriever
 from src.planner_agent.models import InputData, Constraints
+from src.utils.constraints_parser import parse_constraints
+from src.utils.event_dates import parse_date_window
+from src.utils.maps import geocode_venue
+from src.utils.gazetteer import extract_city, gazetteer_stats
 
 
 # --- Вспомогательный промпт для extraction constraints ---
@@ -26,20 +52,33 @@ CONSTRAINTS_EXTRACTION_PROMPT = """
 Извлеки ограничения для планирования из текста пользователя.
 
 Верни ТОЛЬКО валидный JSON объект (без пояснений, без markdown), строго с ключами:
-- start_time: "HH:MM" или null
-- end_time: "HH:MM" или null
-- max_total_time_minutes: integer или null
-- preferred_transport: string или null
-- budget: number или null
-- other_constraints: array[string]
+{fields}
 
 Текст пользователя:
 {user_query}
 """.strip()
 
+# Ключи для CONSTRAINTS_EXTRACTION_PROMPT; в запрос попадают только поля, не разобранные локально
+CONSTRAINTS_FIELD_FORMATS = {
+    "start_time": '"HH:MM" или null',
+    "end_time": '"HH:MM" или null',
+    "max_total_time_minutes": "integer или null",
+    "preferred_transport": "string или null",
+    "budget": "number или null",
+    "other_constraints": "array[string]",
+}
+
+
+_LIST_MARKER_RE = re.compile(r"^\s*(?:\d+[\.\)]|[-*•])\s*")
+
 
 class SelfRAGState(TypedDict):
-    """Состояние графа Self-RAG."""
+    """
+    Состояние графа Self-RAG.
+
+    Узлы возвращают только изменённые поля; logs склеиваются редьюсером,
+    поэтому параллельные ветки (город / ограничения / поиск) не конфликтуют.
+    """
 
     user_query: str
     owner: Optional[str]
@@ -47,11 +86,24 @@ class SelfRAGState(TypedDict):
     # extracted city for filtering public events
     city: Optional[str]
 
+    # query understanding (один структурированный вызов LLM)
+    date_from: Optional[date]
+    date_to: Optional[date]
+    interests: List[str]
+    search_query: Optional[str]
+    # поиск в радиусе: (широта, долгота, радиус в метрах) — от вызывающего или по ориентиру из запроса
+    near: Optional[Near]
+
     # retrieval loop
+    speculative_events: List[Event]
     retrieved_events: List[Event]
+    # события, признанные релевантными (копятся между итерациями)
+    relevant_events: List[Event]
     reformulated_queries: List[str]
     iteration_count: int
     current_query: str
+    # формулировки последней переформулировки (ищутся параллельно, слияние через RRF)
+    current_queries: List[str]
 
     # flags
     memory_found: bool
@@ -62,28 +114,104 @@ class SelfRAGState(TypedDict):
     response: Optional[InputData]
 
     # logs
-    logs: List[str]
+    logs: Annotated[List[str], operator.add]
 
 
 # ---------------- Nodes ----------------
 
-def check_memory_node(state: SelfRAGState) -> SelfRAGState:
-    """Узел проверки памяти (не прерывает граф, только логирует)."""
-    has_memory = check_memory(state["user_query"], state.get("owner"))
-    logs = state.get("logs", [])
-    logs.append(f"🔍 Проверка памяти: {'найдено' if has_memory else 'не найдено'}")
+def check_memory_node(state: SelfRAGState, memory: Optional[QueryMemory]) -> SelfRAGState:
+    """Узел проверки семантической памяти: при совпадении сразу отдаёт сохранённый InputData."""
+    if state.get("near"):
+        # ответ зависит от местоположения пользователя — память не используется
+        return {"memory_found": False, "logs": ["🔍 Проверка памяти: пропущена (поиск рядом с точкой)"]}
+    cached = memory.lookup(state["user_query"], state.get("owner")) if memory is not None else None
+
+    if cached is None:
+        return {
+            "memory_found": False,
+            "logs": ["🔍 Проверка памяти: не найдено"],
+        }
+
+    return {
+        "memory_found": True,
+        "is_relevant": True,
+        "retrieved_events": cached.events,
+        "constraints": cached.constraints,
+        "response": cached,
+        "logs": [f"🔍 Проверка памяти: найдено ({len(cached.events)} событий) → пропускаю поиск"],
+    }
+
+
+def save_memory_node(state: SelfRAGState, memory: Optional[QueryMemory]) -> SelfRAGState:
+    """Сохраняем релевантный результат в семантическую память."""
+    if memory is None or not state.get("is_relevant") or not state.get("retrieved_events") or state.get("near"):
+        return {"logs": []}
+
+    memory.remember(state["user_query"], state["response"], owner=state.get("owner"), city=state.get("city"))
+    return {"logs": ["💾 Результат сохранён в память запросов"]}
+
+
+def understand_query_node(state: SelfRAGState, llm: BaseChatModel) -> SelfRAGState:
+    """
+    Узел разбора запроса одним вызовом LLM (QueryUnderstanding):
+    город, окно дат, интересы, Constraints и поисковая переформулировка.
+    Если город, даты и ограничения разобраны локально целиком, LLM не вызывается.
+    """
+    user_query = state["user_query"]
+    logs = []
+
+    understanding = understand_locally(user_query)
+    if understanding is not None:
+        logs.append("🧠 Запрос разобран локально целиком → без вызова LLM")
+    else:
+        try:
+            understanding = understand_query(llm, user_query)
+        except Exception as e:
+            # без LLM остаются только локальные газеттир и парсер ограничений
+            understanding = apply_local_parsers(QueryUnderstanding(), user_query)
+            logs.append(f"🧠 Ошибка разбора запроса через LLM: {e} → только локальные парсеры")
+
+    dates = ""
+    if understanding.date_from:
+        dates = f", даты={understanding.date_from}..{understanding.date_to or understanding.date_from}"
+    logs.append(
+        f"🧠 Разбор запроса: город='{understanding.city}'{dates}, "
+        f"интересы={understanding.interests}, поиск='{understanding.search_query}'"
+    )
+
+    near = {}
+    if understanding.near_place and not state.get("near"):
+        point = geocode_venue(understanding.near_place, understanding.city)
+        if point is not None:
+            near = {"near": (point[1], point[0], NEAR_RADIUS_M)}
+            logs.append(f"📍 Ориентир '{understanding.near_place}': поиск в радиусе {NEAR_RADIUS_M:.0f} м")
+        else:
+            logs.append(f"📍 Ориентир '{understanding.near_place}' не геокодирован → без фильтра по радиусу")
 
     return {
-        **state,
-        "memory_found": has_memory,
-        # is_relevant тут НЕ трогаем — это про релевантность retrieved_events
+        **near,
+        "city": understanding.city,
+        "date_from": understanding.date_from,
+        "date_to": understanding.date_to or understanding.date_from,
+        "interests": understanding.interests,
+        "search_query": understanding.search_query,
+        "constraints": understanding.constraints,
         "logs": logs,
     }
 
 
 def extract_city_node(state: SelfRAGState, llm: BaseChatModel) -> SelfRAGState:
-    """Узел извлечения города из запроса пользователя."""
-    logs = state.get("logs", [])
+    """Узел извлечения города: сначала локальный газеттир, LLM — только если город не найден или неоднозначен."""
+    logs = []
+
+    match = extract_city(state["user_query"])
+    if match.is_hit:
+        return {
+            "city": match.city,
+            "logs": [f"🏙️ Извлечён город (газеттир): {match.city}; {gazetteer_stats.report()}"],
+        }
+    reason = "неоднозначно" if match.is_ambiguous else "не найден"
+    logs.append(f"🏙️ Газеттир: город {reason}, запрос к LLM; {gazetteer_stats.report()}")
 
     prompt = CITY_EXTRACTION_PROMPT.format_messages(user_query=state["user_query"])
 
@@ -103,56 +231,171 @@ def extract_city_node(state: SelfRAGState, llm: BaseChatModel) -> SelfRAGState:
         logs.append(f"🏙️ Ошибка извлечения города: {e}")
 
     return {
-        **state,
         "city": city,
         "logs": logs,
     }
 
 
 def retrieve_events_node(state: SelfRAGState, retriever: EventRetriever) -> SelfRAGState:
-    """Узел поиска событий."""
-    query = state.get("current_query") or state["user_query"]
+    """Узел поиска событий: исходный запрос + все переформулировки параллельно, слияние через RRF."""
+    queries = _search_queries(state) + list(state.get("current_queries") or [])
     owner = state.get("owner")
     city = state.get("city")
 
-    events = retriever.retrieve(query, owner=owner, city=city)
+    events = retriever.retrieve_many(
+        queries, owner=owner, city=city,
+        date_from=state.get("date_from"), date_to=state.get("date_to"), near=state.get("near"),
+    )
+
+    city_info = f", город='{city}'" if city else ""
+    return {
+        "retrieved_events": events,
+        "logs": [
+            f"🔎 Поиск событий: запросов={len(queries)} (RRF), владелец='{owner}'{city_info}{_dates_info(state)}, "
+            f"найдено={len(events)}"
+        ],
+    }
+
+
+def _dates_info(state: SelfRAGState) -> str:
+    info = ""
+    if state.get("date_from"):
+        info += f", даты={state['date_from']}..{state.get('date_to') or state['date_from']}"
+    if state.get("near"):
+        info += f", радиус={state['near'][2]:.0f} м"
+    return info
+
+
+def _search_queries(state: SelfRAGState) -> List[str]:
+    """Исходный запрос и поисковая переформулировка из QueryUnderstanding (если есть)."""
+    queries = [state["user_query"]]
+    search_query = (state.get("search_query") or "").strip()
+    if search_query and search_query.lower() != state["user_query"].strip().lower():
+        queries.append(search_query)
+    return queries
+
+
+def speculative_retrieve_node(state: SelfRAGState, retriever: EventRetriever) -> SelfRAGState:
+    """
+    Первый поиск по исходному запросу, запускается параллельно с извлечением города.
+    Берёт кандидатов без фильтра по городу — фильтр применяется в merge_retrieval.
+    """
+    query = state["user_query"]
+    owner = state.get("owner")
+
+    candidates = retriever.retrieve_candidates(query, owner=owner)
+
+    return {
+        "speculative_events": candidates,
+        "logs": [f"🔎 Упреждающий поиск: запрос='{query}', владелец='{owner}', кандидатов={len(candidates)}"],
+    }
+
+
+def merge_retrieval_node(state: SelfRAGState, retriever: EventRetriever) -> SelfRAGState:
+    """
+    Точка сборки параллельных веток: применяем найденные город и окно дат к кандидатам упреждающего поиска.
+    Если после фильтра событий меньше MAX_EVENTS — один точный поиск с фильтрами в Weaviate.
+    """
+    city = state.get("city")
+    date_from, date_to, near = state.get("date_from"), state.get("date_to"), state.get("near")
+    events = EventRetriever.filter_by_city(state.get("speculative_events", []), city)
+    events = EventRetriever.filter_by_dates(events, date_from, date_to, retriever.upcoming_only)
+    events = EventRetriever.filter_by_distance(events, near)[:MAX_EVENTS]
 
-    logs = state.get("logs", [])
     city_info = f", город='{city}'" if city else ""
-    logs.append(f"🔎 Поиск событий: запрос='{query}', владелец='{owner}'{city_info}, найдено={len(events)}")
+    logs = [f"🔗 Сборка веток{city_info}{_dates_info(state)}: найдено={len(events)}"]
+
+    if (city or date_from or near) and len(events) < MAX_EVENTS:
+        events = retriever.retrieve_many(
+            _search_queries(state), owner=state.get("owner"), city=city,
+            date_from=date_from, date_to=date_to, near=near,
+        )
+        logs.append(f"🔎 Дозапрос с фильтрами по городу, датам и радиусу: найдено={len(events)}")
 
     return {
-        **state,
         "retrieved_events": events,
+        "speculative_events": [],
         "logs": logs,
     }
 
 
+def _merge_relevant(pool: List[Event], kept: List[Event]) -> List[Event]:
+    """Накопленные релевантные события + новые, без дублей, не больше MAX_EVENTS."""
+    merged = {event_key(e): e for e in pool}
+    for event in kept:
+        merged.setdefault(event_key(event), event)
+    return list(merged.values())[:MAX_EVENTS]
+
+
 def evaluate_relevance_node(
-    state: SelfRAGState, llm: BaseChatModel, retriever: Optional[EventRetriever] = None
+    state: SelfRAGState,
+    llm: BaseChatModel,
+    retriever: Optional[EventRetriever] = None,
+    policy: Optional[RelevancePolicy] = None,
+    min_kept: int = RELEVANCE_MIN_KEPT_EVENTS,
 ) -> SelfRAGState:
-    """Узел оценки релевантности извлеченной информации."""
+    """
+    Узел оценки релевантности извлеченной информации.
+
+    Сначала пороговая политика по дистанциям; в пограничных случаях LLM оценивает
+    каждое событие одним вызовом, нерелевантные отбрасываются. Релевантные события
+    копятся между итерациями; переформулировка нужна, если их меньше min_kept.
+    """
+    events = state["retrieved_events"]
+    pool = state.get("relevant_events") or []
+    # если поиск вернул меньше min_kept событий, достаточно, чтобы все они подошли
+    needed = min(min_kept, len(events)) or 1
+
+    policy = policy or RelevancePolicy()
+    decision = policy.decide(events)
+    if decision is not None:
+        pool = _merge_relevant(pool, events if decision else [])
+        distances = event_distances(events)
+        best = f", лучшая дистанция={min(distances):.3f}" if distances else ""
+        return {
+            "is_relevant": len(pool) >= needed,
+            "relevant_events": pool,
+            "logs": [
+                f"📊 Оценка релевантности по дистанции: {'релевантно' if decision else 'не релевантно'} (без LLM)",
+                f"   Найдено событий: {len(events)}{best}",
+            ],
+        }
+
     if retriever is None:
         retriever = EventRetriever()
 
-    events_context = retriever.format_events_for_context(state["retrieved_events"])
+    events_context = retriever.format_events_for_context(events)
 
-    prompt = RELEVANCE_EVALUATION_PROMPT.format_messages(
-        user_query=state["user_query"],
-        retrieved_events=events_context,
-    )
+    try:
+        kept, _ = score_events(llm, state["user_query"], events, events_context)
+        pool = _merge_relevant(pool, kept)
+        is_relevant = len(pool) >= needed
+        logs = [
+            f"📊 Поштучная оценка релевантности: оставлено {len(kept)} из {len(events)}, "
+            f"всего релевантных {len(pool)} (нужно {needed}) → {'достаточно' if is_relevant else 'переформулирую'}",
+        ]
+    except Exception as e:
+        # запасной путь: один вердикт YES/NO на всю выдачу
+        prompt = RELEVANCE_EVALUATION_PROMPT.format_messages(
+            user_query=state["user_query"],
+            retrieved_events=events_context,
+        )
 
-    response = llm.invoke(prompt)
-    relevance_text = response.content.strip().upper()
-    is_relevant = relevance_text.startswith("YES")
+        response = llm.invoke(prompt)
+        relevance_text = response.content.strip().upper()
+        is_relevant = relevance_text.startswith("YES")
+        if is_relevant:
+            pool = _merge_relevant(pool, events)
 
-    logs = state.get("logs", [])
-    logs.append(f"📊 Оценка релевантности: {relevance_text} ({'релевантно' if is_relevant else 'не релевантно'})")
-    logs.append(f"   Найдено событий: {len(state['retrieved_events'])}")
+        logs = [
+            f"📊 Поштучная оценка недоступна ({e}) → общий вердикт",
+            f"📊 Оценка релевантности: {relevance_text} ({'релевантно' if is_relevant else 'не релевантно'})",
+            f"   Найдено событий: {len(events)}",
+        ]
 
     return {
-        **state,
         "is_relevant": is_relevant,
+        "relevant_events": pool,
         "logs": logs,
     }
 
@@ -164,7 +407,10 @@ def reformulate_queries_node(
     if retriever is None:
         retriever = EventRetriever()
 
-    events_context = retriever.format_events_for_context(state["retrieved_events"])
+    # в промпт — только отброшенные события: уже релевантные переформулировка не должна «чинить»
+    relevant = {event_key(e) for e in state.get("relevant_events") or []}
+    rejected = [e for e in state["retrieved_events"] if event_key(e) not in relevant]
+    events_context = retriever.format_events_for_context(rejected)
 
     prompt = QUERY_REFORMULATION_PROMPT.format_messages(
         user_query=state["user_query"],
@@ -174,31 +420,54 @@ def reformulate_queries_node(
     response = llm.invoke(prompt)
     reformulated_text = response.content.strip()
 
-    new_queries = [q.strip() for q in reformulated_text.split("\n") if q.strip()]
+    # модель иногда всё же нумерует строки — убираем маркеры списка
+    new_queries = [_LIST_MARKER_RE.sub("", q).strip() for q in reformulated_text.split("\n")]
+    new_queries = [q for q in new_queries if q][:3]
     current_query = new_queries[0] if new_queries else state["user_query"]
 
-    logs = state.get("logs", [])
     iteration = state.get("iteration_count", 0) + 1
-    logs.append(f"🔄 Переформулировка запроса (итерация {iteration}):")
-    for i, q in enumerate(new_queries[:3], 1):
+    logs = [f"🔄 Переформулировка запроса (итерация {iteration}):"]
+    for i, q in enumerate(new_queries, 1):
         logs.append(f"   {i}. {q}")
 
     return {
-        **state,
         "reformulated_queries": state.get("reformulated_queries", []) + new_queries,
         "current_query": current_query,
+        "current_queries": new_queries,
         "iteration_count": iteration,
         "logs": logs,
     }
 
 
 def extract_constraints_node(state: SelfRAGState, llm: BaseChatModel) -> SelfRAGState:
-    """Достаём Constraints из user_query через LLM (JSON), с безопасным fallback."""
-    logs = state.get("logs", [])
-
-    prompt = CONSTRAINTS_EXTRACTION_PROMPT.format(user_query=state["user_query"])
+    """
+    Достаём Constraints из user_query: сначала локальный парсер,
+    LLM (JSON) — только если в запросе есть признаки полей, которые разобрать
+    не удалось, в том числе other_constraints ("с детьми", "без алкоголя").
+    Окно дат ("на выходных", "в субботу") разбирается здесь же локально.
+    """
+    logs = []
+
+    window = parse_date_window(state["user_query"])
+    dates = {"date_from": window[0], "date_to": window[1]} if window else {}
+    if window:
+        logs.append(f"📅 Окно дат (локально): {window[0]}..{window[1]}")
+
+    parsed = parse_constraints(state["user_query"])
+    constraints = parsed.constraints
+    if parsed.found:
+        logs.append(f"🧩 Constraints разобраны локально: {', '.join(parsed.found)}")
+
+    if not parsed.needs_llm:
+        return {"constraints": constraints, **dates, "logs": logs}
+
+    # LLM спрашиваем только о том, чего не нашёл парсер
+    fields = parsed.missing
+    prompt = CONSTRAINTS_EXTRACTION_PROMPT.format(
+        user_query=state["user_query"],
+        fields="\n".join(f"- {name}: {CONSTRAINTS_FIELD_FORMATS[name]}" for name in fields),
+    )
     raw = ""
-    constraints = None
 
     try:
         resp = llm.invoke(prompt)
@@ -208,49 +477,55 @@ def extract_constraints_node(state: SelfRAGState, llm: BaseChatModel) -> SelfRAG
         raw = raw.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
 
         data = json.loads(raw)
+        # локально разобранные поля не перезаписываем
+        data = {k: v for k, v in data.items() if k in fields}
 
         # pydantic v1/v2 совместимость
         if hasattr(Constraints, "model_validate"):
-            constraints = Constraints.model_validate(data)
+            extracted = Constraints.model_validate(data)
         else:
-            constraints = Constraints.parse_obj(data)
+            extracted = Constraints.parse_obj(data)
+        constraints = constraints.model_copy(update={k: getattr(extracted, k) for k in data})
 
-        logs.append("🧩 Constraints извлечены из запроса через LLM")
+        logs.append(f"🧩 Constraints через LLM: {', '.join(fields)}")
     except Exception:
-        constraints = Constraints()
-        logs.append("🧩 Не удалось извлечь Constraints через LLM → использую пустые Constraints()")
+        logs.append("🧩 Не удалось извлечь Constraints через LLM → оставляю разобранные локально")
         if raw:
             logs.append(f"   (сырое содержимое модели: {raw[:200]}...)")
 
     return {
-        **state,
         "constraints": constraints,
+        **dates,
         "logs": logs,
     }
 
 
 def build_input_data_node(state: SelfRAGState) -> SelfRAGState:
     """Собираем финальный InputData."""
-    logs = state.get("logs", [])
     constraints = state.get("constraints") or Constraints()
 
+    # отобранные оценкой релевантности события; если не подошло ничего — вся последняя выдача
     input_data = InputData(
-        events=state.get("retrieved_events", []),
+        events=state.get("relevant_events") or state.get("retrieved_events", []),
         user_prompt=state["user_query"],
         constraints=constraints,
     )
 
-    logs.append("✅ Сформирован InputData")
-
     return {
-        **state,
         "response": input_data,
-        "logs": logs,
+        "logs": ["✅ Сформирован InputData"],
     }
 
 
 # ---------------- Conditions ----------------
 
+def route_after_memory(state: SelfRAGState, fan_out: List[str]) -> Union[str, List[str]]:
+    """Ответ из памяти — завершаем; иначе параллельные ветки разбора запроса и поиска."""
+    if state.get("memory_found"):
+        return END
+    return fan_out
+
+
 def should_reformulate_or_finish(state: SelfRAGState) -> Literal["reformulate", "finish"]:
     """Если релевантно или достигнут лимит итераций — завершаем, иначе реформулируем."""
     iteration_count = state.get("iteration_count", 0)
@@ -266,8 +541,21 @@ def should_reformulate_or_finish(state: SelfRAGState) -> Literal["reformulate",
 def create_self_rag_graph(
     llm: Optional[BaseChatModel] = None,
     retriever: Optional[EventRetriever] = None,
+    memory: Optional[QueryMemory] = None,
+    query_understanding: bool = QUERY_UNDERSTANDING_ENABLED,
+    relevance_policy: Optional[RelevancePolicy] = None,
+    use_memory: bool = True,
 ) -> Tuple[StateGraph, Optional[EventRetriever]]:
-    """Создает граф Self-RAG."""
+    """
+    Создает граф Self-RAG.
+
+    memory по умолчанию — общая память процесса (get_query_memory());
+    use_memory=False отключает память (прогоны оценки).
+    query_understanding: один вызов QueryUnderstanding вместо отдельных
+    узлов extract_city и extract_constraints.
+    relevance_policy: пороги дистанций для оценки релевантности без LLM
+    (по умолчанию — из конфигурации).
+    """
     if llm is None:
         if not OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY не установлен")
@@ -275,24 +563,41 @@ def create_self_rag_graph(
 
     created_retriever = None
     if retriever is None:
-        retriever = EventRetriever()
+        retriever = create_event_retriever()
         created_retriever = retriever
 
+    if memory is None and use_memory:
+        memory = get_query_memory()
+
     workflow = StateGraph(SelfRAGState)
 
-    workflow.add_node("check_memory", check_memory_node)
-    workflow.add_node("extract_city", lambda state: extract_city_node(state, llm))
+    workflow.add_node("check_memory", lambda state: check_memory_node(state, memory))
+    if query_understanding:
+        workflow.add_node("understand_query", lambda state: understand_query_node(state, llm))
+        fan_out = ["understand_query", "speculative_retrieve"]
+    else:
+        workflow.add_node("extract_city", lambda state: extract_city_node(state, llm))
+        workflow.add_node("extract_constraints", lambda state: extract_constraints_node(state, llm))
+        fan_out = ["extract_city", "extract_constraints", "speculative_retrieve"]
+    workflow.add_node("speculative_retrieve", lambda state: speculative_retrieve_node(state, retriever))
+    workflow.add_node("merge_retrieval", lambda state: merge_retrieval_node(state, retriever))
     workflow.add_node("retrieve_events", lambda state: retrieve_events_node(state, retriever))
-    workflow.add_node("evaluate_relevance", lambda state: evaluate_relevance_node(state, llm, retriever))
+    workflow.add_node("evaluate_relevance", lambda state: evaluate_relevance_node(state, llm, retriever, relevance_policy))
     workflow.add_node("reformulate_queries", lambda state: reformulate_queries_node(state, llm, retriever))
-    workflow.add_node("extract_constraints", lambda state: extract_constraints_node(state, llm))
     workflow.add_node("build_input_data", build_input_data_node)
+    workflow.add_node("save_memory", lambda state: save_memory_node(state, memory))
 
     # Flow:
-    # check_memory -> extract_city -> retrieve -> evaluate -> (reformulate loop) -> extract_constraints -> build_input_data -> END
+    # check_memory -> (из памяти -> END)
+    #   | [understand_query | speculative_retrieve] -> merge_retrieval
+    #     (или [extract_city | extract_constraints | speculative_retrieve] при query_understanding=False)
+    #   -> evaluate -> (reformulate -> retrieve -> evaluate)* -> build_input_data -> save_memory -> END
+    # Ветки независимы и выполняются параллельно; merge_retrieval ждёт все.
+    # Разбор запроса идёт после памяти, чтобы попадание в память не стоило вызова LLM.
     workflow.set_entry_point("check_memory")
-    workflow.add_edge("check_memory", "extract_city")
-    workflow.add_edge("extract_city", "retrieve_events")
+    workflow.add_conditional_edges("check_memory", lambda state: route_after_memory(state, fan_out), [*fan_out, END])
+    workflow.add_edge(fan_out, "merge_retrieval")
+    workflow.add_edge("merge_retrieval", "evaluate_relevance")
     workflow.add_edge("retrieve_events", "evaluate_relevance")
 
     workflow.add_conditional_edges(
@@ -300,38 +605,39 @@ def create_self_rag_graph(
         should_reformulate_or_finish,
         {
             "reformulate": "reformulate_queries",
-            "finish": "extract_constraints",
+            "finish": "build_input_data",
         },
     )
 
     workflow.add_edge("reformulate_queries", "retrieve_events")
-    workflow.add_edge("extract_constraints", "build_input_data")
-    workflow.add_edge("build_input_data", END)
+    workflow.add_edge("build_input_data", "save_memory")
+    workflow.add_edge("save_memory", END)
 
     return workflow.compile(), created_retriever
 
 
 # ---------------- Runner ----------------
 
-def run_self_rag(
-    user_query: str,
-    owner: Optional[str] = None,
-    llm: Optional[BaseChatModel] = None,
-    retriever: Optional[EventRetriever] = None,
-    return_logs: bool = False,
-) -> Union[InputData, Tuple[InputData, List[str]]]:
-    """Запускает Self-RAG и возвращает InputData (или InputData + логи)."""
-    graph, created_retriever = create_self_rag_graph(llm=llm, retriever=retriever)
-
-    initial_state: SelfRAGState = {
+def initial_state(user_query: str, owner: Optional[str] = None, near: Optional[Near] = None) -> SelfRAGState:
+    """Начальное состояние графа для одного запроса."""
+    return {
         "user_query": user_query,
         "owner": owner,
         "city": None,
 
+        "date_from": None,
+        "date_to": None,
+        "interests": [],
+        "search_query": None,
+        "near": tuple(near) if near else None,
+
+        "speculative_events": [],
         "retrieved_events": [],
+        "relevant_events": [],
         "reformulated_queries": [],
         "iteration_count": 0,
         "current_query": user_query,
+        "current_queries": [],
 
         "memory_found": False,
         "is_relevant": False,
@@ -342,27 +648,161 @@ def run_self_rag(
         "logs": [],
     }
 
-    try:
-        result = graph.invoke(initial_state)
 
-        input_data: Optional[InputData] = result.get("response")
-        logs: List[str] = result.get("logs", [])
+def _result_to_input_data(result: SelfRAGState, user_query: str) -> Tuple[InputData, List[str]]:
+    input_data: Optional[InputData] = result.get("response")
+    logs: List[str] = result.get("logs", [])
 
-        if input_data is None:
-            # на всякий пожарный, чтобы тип всегда был InputData
-            input_data = InputData(
-                events=result.get("retrieved_events", []),
-                user_prompt=user_query,
-                constraints=Constraints(),
-            )
-            logs.append("⚠️ response был None → собрал InputData fallback")
+    if input_data is None:
+        # на всякий пожарный, чтобы тип всегда был InputData
+        input_data = InputData(
+            events=result.get("relevant_events") or result.get("retrieved_events", []),
+            user_prompt=user_query,
+            constraints=Constraints(),
+        )
+        logs.append("⚠️ response был None → собрал InputData fallback")
+    return input_data, logs
+
+
+def run_self_rag(
+    user_query: str,
+    owner: Optional[str] = None,
+    llm: Optional[BaseChatModel] = None,
+    retriever: Optional[EventRetriever] = None,
+    return_logs: bool = False,
+    near: Optional[Near] = None,
+    graph=None,
+) -> Union[InputData, Tuple[InputData, List[str]]]:
+    """
+    Запускает Self-RAG и возвращает InputData (или InputData + логи).
+
+    near — (широта, долгота, радиус в метрах), например геопозиция пользователя для "рядом со мной".
+    graph — уже скомпилированный граф (GraphRegistry); тогда llm и retriever не используются
+    и граф не собирается заново.
+    """
+    created_retriever = None
+    if graph is None:
+        graph, created_retriever = create_self_rag_graph(llm=llm, retriever=retriever)
+
+    try:
+        result = graph.invoke(initial_state(user_query, owner, near))
+        input_data, logs = _result_to_input_data(result, user_query)
 
         if return_logs:
             return input_data, logs
         return input_data
 
     finally:
+        # переданный retriever принадлежит вызывающему (main_pipeline берёт его из GraphRegistry) —
+        # не закрываем: иначе каждый запрос заново устанавливал бы соединение с Weaviate
         if created_retriever is not None:
             created_retriever.close()
-        if retriever is not None:
-            retriever.close()
+
+
+def _load_done(output_path: Optional[Path]) -> Set[str]:
+    """id запросов, уже успешно обработанных в output_path (для продолжения после падения)."""
+    done: Set[str] = set()
+    if output_path is None or not output_path.exists():
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # недописанная строка при падении
+            if record.get("ok"):
+                done.add(str(record["id"]))
+    return done
+
+
+async def arun_self_rag_batch(
+    queries: Sequence[str],
+    concurrency: int = 4,
+    ids: Optional[Sequence[str]] = None,
+    output_path: Optional[Union[str, Path]] = None,
+    owner: Optional[str] = None,
+    llm: Optional[BaseChatModel] = None,
+    retriever: Optional[EventRetriever] = None,
+    use_memory: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Прогоняет набор запросов через один скомпилированный граф Self-RAG.
+
+    Запросы выполняются конкурентно (не больше concurrency одновременно) с общим
+    retriever и клиентом Weaviate. Каждый результат сразу дописывается в JSONL
+    (id, query, ok, seconds, events, constraints, logs / error). Если output_path уже
+    содержит успешные записи, эти id пропускаются — упавший прогон можно продолжить.
+
+    Args:
+        queries: Запросы пользователя
+        concurrency: Сколько запросов выполняется одновременно
+        ids: Стабильные id запросов (по умолчанию — индекс в queries)
+        output_path: JSONL для потоковой записи результатов
+        owner: Владелец событий для фильтрации
+        llm: LLM (по умолчанию ChatOpenAI из конфигурации)
+        retriever: Общий retriever (по умолчанию создаётся один на весь прогон)
+        use_memory: Использовать семантическую память (для оценки обычно выключена)
+
+    Returns:
+        Записи, обработанные в этом запуске
+    """
+    ids = [str(i) for i in (ids if ids is not None else range(len(queries)))]
+    if len(ids) != len(queries):
+        raise ValueError("ids и queries должны быть одной длины")
+
+    output_path = Path(output_path) if output_path else None
+    done = _load_done(output_path)
+    pending = [(qid, q) for qid, q in zip(ids, queries) if qid not in done]
+    if done:
+        print(f"⏭️ Уже обработано: {len(done)}, осталось: {len(pending)}")
+
+    graph, created_retriever = create_self_rag_graph(llm=llm, retriever=retriever, use_memory=use_memory)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    records: List[Dict[str, Any]] = []
+    out = None
+
+    async def run_one(qid: str, query: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            record: Dict[str, Any] = {"id": qid, "query": query}
+            try:
+                result = await graph.ainvoke(initial_state(query, owner))
+                input_data, logs = _result_to_input_data(result, query)
+                record.update(
+                    ok=True,
+                    events=[e.model_dump(mode="json") for e in input_data.events],
+                    constraints=input_data.constraints.model_dump(mode="json") if input_data.constraints else None,
+                    logs=logs,
+                )
+            except Exception as e:
+                record.update(ok=False, error=f"{type(e).__name__}: {e}")
+            record["seconds"] = round(time.perf_counter() - started, 3)
+
+        records.append(record)
+        if out is not None:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+        status = "✅" if record["ok"] else "❌"
+        print(f"{status} [{len(records)}/{len(pending)}] {record['seconds']:.1f}s {query[:60]}")
+
+    try:
+        if output_path is not None:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            out = open(output_path, "a", encoding="utf-8")
+        await asyncio.gather(*(run_one(qid, q) for qid, q in pending))
+    finally:
+        if out is not None:
+            out.close()
+        if created_retriever is not None:
+            created_retriever.close()
+
+    return records
+
+
+def run_self_rag_batch(
+    queries: Sequence[str],
+    concurrency: int = 4,
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """Синхронная обёртка arun_self_rag_batch (параметры те же)."""
+    return asyncio.run(arun_self_rag_batch(queries, concurrency=concurrency, **kwargs))
@@ -1,12 +1,13 @@
 """Утилиты для работы с Weaviate."""
 
 from src.vdb.utils.test_connection import wait_for_weaviate
-from src.vdb.utils.add_events import create_collection_if_not_exists, get_client
+from src.vdb.utils.add_events import create_collection_if_not_exists, event_properties, get_client
 from src.vdb.utils.load_kudago_events import load_events_to_weaviate
 
 __all__ = [
     "wait_for_weaviate",
     "create_collection_if_not_exists",
+    "event_properties",
     "get_client",
     "load_events_to_weaviate",
 ]
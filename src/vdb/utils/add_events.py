@@ -9,7 +9,6 @@
 
 import sys
 from pathlib import Path
-from urllib.parse import urlparse
 
 try:
     import weaviate
@@ -23,26 +22,11 @@ project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.vdb.config import WEAVIATE_URL, COLLECTION_NAME
-
-
-def get_client() -> weaviate.WeaviateClient:
-    """Создает клиент Weaviate."""
-    parsed = urlparse(WEAVIATE_URL)
-    http_port = parsed.port or (443 if parsed.scheme == "https" else 8080)
-    http_secure = parsed.scheme == "https"
-    hostname = parsed.hostname or "localhost"
-
-    if hostname in ("localhost", "127.0.0.1") and http_port == 8080 and not http_secure:
-        return weaviate.connect_to_local()
-    else:
-        return weaviate.connect_to_custom(
-            http_host=hostname,
-            http_port=http_port,
-            http_secure=http_secure,
-            grpc_host=hostname,
-            grpc_port=50051,
-            grpc_secure=http_secure,
-        )
+from src.vdb.client import get_shared_client, get_weaviate_client as get_client  # get_client — прежнее имя
+from src.planner_agent.plan_cache import PlanCache
+from src.vdb.rag.retriever import bump_retrieval_generation
+from src.vdb.embeddings import get_embedder
+from src.models.event import Event
 
 
 def create_collection_if_not_exists(force_recreate: bool = False) -> None:
@@ -53,11 +37,14 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
         client: Клиент Weaviate
         force_recreate: Если True, пересоздает коллекцию даже если она существует
     """
-    client = get_client()
+    client = get_shared_client()
     if COLLECTION_NAME in client.collections.list_all():
         if force_recreate:
             print(f"ℹ️  Удаляю существующую коллекцию '{COLLECTION_NAME}' для пересоздания")
             client.collections.delete(COLLECTION_NAME)
+            # Все события удалены — закэшированные планы больше не актуальны
+            PlanCache().clear()
+            bump_retrieval_generation()
         else:
             collection = client.collections.get(COLLECTION_NAME)
             total_count = collection.aggregate.over_all(total_count=True).total_count
@@ -66,7 +53,11 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
             print(f"   Для пересоздания с новой конфигурацией используйте: python {__file__} --recreate")
             return
 
-    print(f"ℹ️  Создаю коллекцию '{COLLECTION_NAME}'")
+    embedder = get_embedder()
+    if embedder is not None:
+        print(f"ℹ️  Создаю коллекцию '{COLLECTION_NAME}' с векторами клиента ({embedder.name})")
+    else:
+        print(f"ℹ️  Создаю коллекцию '{COLLECTION_NAME}'")
     client.collections.create(
         name=COLLECTION_NAME,
         description="События для посещения",
@@ -82,6 +73,8 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
                 description="Владелец события",
                 data_type=wvc.config.DataType.TEXT,
                 vectorize_property_name=False,  # Исключено из векторизации
+                tokenization=wvc.config.Tokenization.FIELD,  # Точное совпадение в фильтре
+                index_filterable=True,
             ),
             wvc.config.Property(
                 name="description",
@@ -113,12 +106,40 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
                 data_type=wvc.config.DataType.TEXT,
                 vectorize_property_name=True,  # Используется для векторизации
             ),
+            wvc.config.Property(
+                name="city",
+                description="Нормализованный город события (src.utils.cities)",
+                data_type=wvc.config.DataType.TEXT,
+                vectorize_property_name=False,  # Исключено из векторизации
+                skip_vectorization=True,  # Не влияет на вектор (город уже есть в location)
+                tokenization=wvc.config.Tokenization.FIELD,  # Точное совпадение в фильтре
+                index_filterable=True,
+            ),
             wvc.config.Property(
                 name="date",
                 description="Дата события",
                 data_type=wvc.config.DataType.TEXT,
                 vectorize_property_name=False,  # Исключено из векторизации
             ),
+            wvc.config.Property(
+                name="start_ts",
+                description="Начало события (для фильтра по датам)",
+                data_type=wvc.config.DataType.DATE,
+                index_filterable=True,
+                index_range_filters=True,  # Быстрые фильтры по диапазону (end_ts >= сейчас)
+            ),
+            wvc.config.Property(
+                name="end_ts",
+                description="Окончание события (для фильтра по датам)",
+                data_type=wvc.config.DataType.DATE,
+                index_filterable=True,
+                index_range_filters=True,
+            ),
+            wvc.config.Property(
+                name="coords",
+                description="Координаты места проведения (поиск в радиусе)",
+                data_type=wvc.config.DataType.GEO_COORDINATES,
+            ),
             wvc.config.Property(
                 name="url",
                 description="URL события",
@@ -132,9 +153,18 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
                 vectorize_property_name=False,  # Исключено из векторизации
             ),
         ],
-        vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_contextionary(
-            # Можно указать, какие поля использовать для векторизации
-            # По умолчанию используются все TEXT поля
+        # События без дат остаются в выдаче при фильтре по датам (is_none)
+        inverted_index_config=wvc.config.Configure.inverted_index(index_null_state=True),
+        # EMBEDDER задан — векторы считает клиент (src/vdb/embeddings.py), иначе Weaviate
+        vectorizer_config=(
+            wvc.config.Configure.Vectorizer.none() if embedder is not None
+            else wvc.config.Configure.Vectorizer.text2vec_contextionary(
+                # Можно указать, какие поля использовать для векторизации
+                # По умолчанию используются все TEXT поля
+            )
+        ),
+        vector_index_config=wvc.config.Configure.VectorIndex.hnsw(
+            distance_metric=wvc.config.VectorDistances.COSINE,
         ),
 
         # # # use openai for vectorization
@@ -145,3 +175,18 @@ def create_collection_if_not_exists(force_recreate: bool = False) -> None:
     print(f"✅ Коллекция '{COLLECTION_NAME}' создана")
 
 
+
+
+def event_properties(event: Event, exclude_none: bool = False) -> dict:
+    """
+    Свойства объекта Weaviate для события.
+
+    Отличие от model_dump: координаты передаются как GeoCoordinate (GEO_COORDINATES),
+    а не вложенным объектом.
+    """
+    data = event.model_dump(exclude_none=exclude_none)
+    if event.coords is not None:
+        data["coords"] = wvc.data.GeoCoordinate(
+            latitude=event.coords.latitude, longitude=event.coords.longitude,
+        )
+    return data
@@ -9,6 +9,7 @@
 
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Добавляем корневую директорию проекта в путь
 project_root = Path(__file__).parent.parent.parent.parent
@@ -16,6 +17,10 @@ sys.path.insert(0, str(project_root))
 
 from src.vdb.client import get_weaviate_client
 from src.vdb.config import COLLECTION_NAME
+from src.vdb.rag.memory import invalidate_memory_for_events
+from src.vdb.rag.retriever import bump_retrieval_generation
+from src.vdb.utils.add_events import event_properties
+from src.vdb.embeddings import CachedEmbeddings, as_cached, embed_events, get_embedder
 
 from uuid import uuid5, NAMESPACE_URL
 
@@ -25,7 +30,12 @@ def make_event_uuid(event) -> str:
     event.uuid = str(uuid5(NAMESPACE_URL, f"description:{unique_key}"))
     return event
 
-def load_events_to_weaviate(events: list, batch_size: int = 100, verbose: bool = True):
+def load_events_to_weaviate(
+    events: list,
+    batch_size: int = 100,
+    verbose: bool = True,
+    embedder: Optional[CachedEmbeddings] = None,
+):
     """
     Загружает события в Weaviate.
     
@@ -33,7 +43,10 @@ def load_events_to_weaviate(events: list, batch_size: int = 100, verbose: bool =
         events: Список событий (Event objects)
         batch_size: Размер батча для загрузки
         verbose: Выводить подробную информацию
+        embedder: Эмбеддер для векторов клиента; по умолчанию get_embedder()
+            (None — векторизует Weaviate)
     """
+    embedder = as_cached(embedder) or get_embedder()
     client = get_weaviate_client()
     
     try:
@@ -52,28 +65,41 @@ def load_events_to_weaviate(events: list, batch_size: int = 100, verbose: bool =
         success_count = 0
         error_count = 0
         skipped_count = 0
+        added_events = []
+        new_events = []
+        for event in events:
+            event = make_event_uuid(event)
+            if collection.data.exists(event.uuid):
+                # print(f"   Событие '{event.title}' уже существует")
+                skipped_count += 1
+                continue
+            new_events.append(event)
+
+        # Векторы клиента: неизменённые события берутся из кэша эмбеддингов
+        vectors = embed_events(new_events, embedder) if embedder is not None and new_events else None
+
         with collection.batch.dynamic() as batch:
-            for i, event in enumerate(events, 1):
+            for i, event in enumerate(new_events, 1):
                 try:
-                    event = make_event_uuid(event)
-                    uuid = event.uuid
-                    if collection.data.exists(uuid):
-                        # print(f"   Событие '{event.title}' уже существует")
-                        skipped_count += 1
-                        continue
-
-                    event_dict = event.model_dump(exclude_none=True)
-                    batch.add_object(properties=event_dict, uuid=uuid)
+                    event_dict = event_properties(event, exclude_none=True)
+                    vector = vectors[i - 1].tolist() if vectors is not None else None
+                    batch.add_object(properties=event_dict, uuid=event.uuid, vector=vector)
+                    added_events.append(event)
                     success_count += 1
                     
                     if verbose and i % batch_size == 0:
-                        print(f"  Загружено: {i}/{len(events)}")
+                        print(f"  Загружено: {i}/{len(new_events)}")
                         
                 except Exception as e:
                     error_count += 1
                     if verbose:
                         print(f"  Ошибка при загрузке события '{event.title}': {e}")
         
+        # Сохранённые ответы Self-RAG по городам новых событий больше не актуальны
+        if added_events:
+            invalidate_memory_for_events(added_events)
+            bump_retrieval_generation()
+
         if verbose:
             print("\nЗагрузка завершена!")
             print(f"   Успешно: {success_count}")
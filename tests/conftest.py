@@ -0,0 +1,12 @@
+"""
+Общие настройки тестов: корень проекта в sys.path и фиктивный ключ LLM
+(модули создают клиентов при импорте, но тесты сеть не используют).
+"""
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
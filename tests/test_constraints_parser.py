@@ -0,0 +1,83 @@
+"""Локальный разбор ограничений и условие вызова LLM в extract_constraints_node."""
+from datetime import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.constraints_parser import parse_constraints
+from src.vdb.rag.self_rag_graph import extract_constraints_node
+
+
+class _RecordingLLM:
+    """Отвечает фиксированным JSON и запоминает промпты."""
+
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=self.answer)
+
+
+def test_time_range_and_transport():
+    parsed = parse_constraints("Хочу погулять с 10 до 18 пешком")
+    assert parsed.constraints.start_time == time(10, 0)
+    assert parsed.constraints.end_time == time(18, 0)
+    assert parsed.constraints.preferred_transport == "пешком"
+    assert not parsed.needs_llm
+
+
+def test_end_time_budget_and_duration():
+    parsed = parse_constraints("до 22:00, бюджет 3000 руб, на 2 часа")
+    assert parsed.constraints.end_time == time(22, 0)
+    assert parsed.constraints.budget == 3000
+    assert parsed.constraints.max_total_time_minutes == 120
+
+
+def test_evening_modifier():
+    assert parse_constraints("вернуться до 10 вечера").constraints.end_time == time(22, 0)
+
+
+@pytest.mark.parametrize("query", [
+    "куда сходить с детьми до 10 лет",
+    "спектакль для детей с 5 до 12 лет",
+    "экскурсия до 3 км от центра",
+])
+def test_numbers_with_units_are_not_times(query):
+    parsed = parse_constraints(query)
+    assert parsed.constraints.start_time is None
+    assert parsed.constraints.end_time is None
+    # число не разобрано — поля уходят в LLM, а не теряются
+    assert "end_time" in parsed.missing
+
+
+def test_no_constraints():
+    parsed = parse_constraints("интересные выставки")
+    assert parsed.found == [] and parsed.missing == []
+
+
+def test_other_constraints_cue_needs_llm():
+    assert parse_constraints("ужин без алкоголя").missing == ["other_constraints"]
+    assert not parse_constraints("концерт в субботу вечером").needs_llm
+
+
+def test_node_skips_llm_when_everything_is_parsed():
+    llm = _RecordingLLM("{}")
+    result = extract_constraints_node({"user_query": "джаз с 19 до 23 на такси"}, llm)
+
+    assert llm.prompts == []
+    assert result["constraints"].start_time == time(19, 0)
+    assert result["constraints"].preferred_transport == "такси"
+
+
+def test_node_asks_llm_only_for_missing_fields():
+    llm = _RecordingLLM('{"other_constraints": ["без алкоголя"], "budget": 1}')
+    result = extract_constraints_node({"user_query": "бар без алкоголя с 20 до 23"}, llm)
+
+    assert len(llm.prompts) == 1
+    assert "other_constraints" in llm.prompts[0] and "- budget" not in llm.prompts[0]
+    assert result["constraints"].other_constraints == ["без алкоголя"]
+    assert result["constraints"].start_time == time(20, 0)
+    # поля, о которых LLM не спрашивали, из ответа не берутся
+    assert result["constraints"].budget is None
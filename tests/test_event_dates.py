@@ -0,0 +1,37 @@
+"""Окно дат из запроса, даты событий и локальная проверка окна."""
+from datetime import date, datetime
+
+import pytest
+
+from src.utils.event_dates import EVENTS_TZ, in_window, parse_date_window, parse_event_dates, window_bounds
+
+
+@pytest.mark.parametrize("query, today, expected", [
+    ("в субботу", date(2025, 12, 24), (date(2025, 12, 27), date(2025, 12, 27))),
+    ("на выходных", date(2025, 12, 24), (date(2025, 12, 27), date(2025, 12, 28))),
+    ("27 декабря", date(2025, 12, 1), (date(2025, 12, 27), date(2025, 12, 27))),
+    ("завтра", date(2025, 12, 31), (date(2026, 1, 1), date(2026, 1, 1))),
+    ("интересные выставки", date(2025, 12, 24), None),
+])
+def test_date_window(query, today, expected):
+    assert parse_date_window(query, today=today) == expected
+
+
+def test_event_dates_and_window():
+    start, end = parse_event_dates("2025-12-27 17:00 - 2025-12-27 21:00")
+    assert start == datetime(2025, 12, 27, 17, 0, tzinfo=EVENTS_TZ)
+    assert end == datetime(2025, 12, 27, 21, 0, tzinfo=EVENTS_TZ)
+
+    saturday = window_bounds(date(2025, 12, 27), None, upcoming_only=False)
+    sunday = window_bounds(date(2025, 12, 28), None, upcoming_only=False)
+    assert in_window(start, end, *saturday)
+    assert not in_window(start, end, *sunday)
+    # событие без дат проходит любое окно
+    assert in_window(None, None, *sunday)
+
+
+def test_upcoming_only_cuts_past_events():
+    now = datetime(2025, 12, 27, 22, 0, tzinfo=EVENTS_TZ)
+    start, end = parse_event_dates("2025-12-27 17:00 - 2025-12-27 21:00")
+
+    assert not in_window(start, end, *window_bounds(date(2025, 12, 27), None, now=now))
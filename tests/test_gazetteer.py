@@ -0,0 +1,18 @@
+"""Газеттир городов: точное совпадение, поиск в тексте и извлечение города из запроса."""
+from src.utils.gazetteer import extract_city, find_cities, match_city
+
+
+def test_match_city_needs_whole_text():
+    assert match_city("Москва") == "москва"
+    assert match_city("в Москве") is None
+
+
+def test_find_cities_handles_cases_and_slang():
+    assert find_cities("из Москвы в Санкт-Петербург") == ["москва", "санкт-петербург"]
+    assert find_cities("в питере") == ["санкт-петербург"]
+
+
+def test_extract_city():
+    result = extract_city("концерт в Казани")
+    assert result.is_hit and result.city == "казань"
+    assert not extract_city("концерт где-нибудь").is_hit
@@ -0,0 +1,57 @@
+"""Кэш мест YandexGeocoder: запись пачками и геокодирование без общей блокировки."""
+import json
+import threading
+
+import pytest
+
+from src.utils import maps
+from src.utils.maps import YandexGeocoder, flush_venue_cache, geocode_venue
+
+
+def test_cache_is_written_in_batches(tmp_path, monkeypatch):
+    path = tmp_path / "venues.json"
+    geocoder = YandexGeocoder(cache_path=path, flush_every=2)
+    monkeypatch.setattr(geocoder, "_request_geopoint", lambda address: (37.6, 55.7))
+
+    geocoder.adress_to_geopoint("Тверская, 1")
+    assert not path.exists()
+    geocoder.adress_to_geopoint("Арбат, 2")
+    assert set(json.loads(path.read_text(encoding="utf-8"))) == {"Тверская, 1", "Арбат, 2"}
+
+    geocoder.adress_to_geopoint("Невский, 3")
+    geocoder.flush()
+    assert len(json.loads(path.read_text(encoding="utf-8"))) == 3
+    assert [p.name for p in tmp_path.iterdir()] == ["venues.json"]
+
+    # новый процесс читает кэш с диска и не обращается к геокодеру
+    reloaded = YandexGeocoder(cache_path=path)
+    monkeypatch.setattr(reloaded, "_request_geopoint", pytest.fail)
+    assert reloaded.adress_to_geopoint("Невский, 3") == (37.6, 55.7)
+
+
+def test_geocode_venue_requests_run_in_parallel(tmp_path, monkeypatch):
+    geocoder = YandexGeocoder(cache_path=tmp_path / "venues.json")
+    # оба запроса должны одновременно оказаться внутри HTTP-вызова
+    barrier = threading.Barrier(2, timeout=5)
+
+    def request(address):
+        barrier.wait()
+        return (30.3, 59.9)
+
+    monkeypatch.setattr(geocoder, "_request_geopoint", request)
+    monkeypatch.setattr(maps, "_venue_geocoder", geocoder)
+    monkeypatch.setenv("YANDEX_GEOCODER_API_KEY", "test-key")
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda a=address: results.append(geocode_venue(a, "Санкт-Петербург")))
+        for address in ("Невский, 1", "Литейный, 2")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [(30.3, 59.9), (30.3, 59.9)]
+    flush_venue_cache()
+    assert len(json.loads((tmp_path / "venues.json").read_text(encoding="utf-8"))) == 2
@@ -0,0 +1,25 @@
+"""Модули импортируются первыми в чистом процессе (без циклов импорта)."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+
+
+@pytest.mark.parametrize("module", [
+    "src.utils.constraints_parser",
+    "src.planner_agent.scheduler",
+    "src.planner_agent",
+    "src.vdb.rag.self_rag_graph",
+    "src.vdb.rag.local_retriever",
+])
+def test_module_imports_first(module):
+    env = {**os.environ, "PYTHONPATH": str(project_root)}
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=project_root, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
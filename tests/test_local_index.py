@@ -0,0 +1,69 @@
+"""LocalVectorIndex: маска фильтров, поиск по блокам и события с distance."""
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.models.event import Event, GeoCoordinates
+from src.vdb.rag import local_retriever
+from src.vdb.rag.local_retriever import LocalVectorIndex
+
+
+def _dt(day):
+    return datetime(2025, 12, day, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def index():
+    events = [
+        Event(title="Москва публичное", description="", owner="all", city="москва", start_ts=_dt(27), end_ts=_dt(27),
+              coords=GeoCoordinates(latitude=55.7558, longitude=37.6173)),
+        Event(title="Казань публичное", description="", owner="all", city="казань", start_ts=_dt(20), end_ts=_dt(20)),
+        Event(title="Личное", description="", owner="alice", city="москва"),
+        Event(title="Москва без дат", description="", owner="all", city="москва",
+              coords=GeoCoordinates(latitude=59.9343, longitude=30.3351)),
+    ]
+    return LocalVectorIndex(np.eye(4, dtype=np.float32), events, embedder_name="test")
+
+
+def test_mask_owner_and_city(index):
+    assert index.mask().all()
+    assert index.mask(city="москва").tolist() == [True, False, True, True]
+    assert index.mask(owner="alice", city="казань").tolist() == [False, True, True, False]
+    assert index.mask(owner="bob").tolist() == [True, True, False, True]
+
+
+def test_mask_dates_keep_undated(index):
+    assert index.mask(bounds=(_dt(26), _dt(28))).tolist() == [True, False, True, True]
+
+
+def test_mask_radius(index):
+    near_kremlin = (55.75, 37.62, 5_000)
+    assert index.mask(near=near_kremlin).tolist() == [True, False, False, False]
+
+
+def test_search_ranks_and_masks(index):
+    query = np.array([[0.9, 0.1, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]], dtype=np.float32)
+    hits = index.search(query, k=2)
+
+    assert hits[0][0].tolist() == [0, 1]
+    assert hits[1][0][0] == 3
+    assert hits[0][1][0] == pytest.approx(1 - 0.9 / np.hypot(0.9, 0.1), abs=1e-6)
+
+    masked = index.search(query[:1], k=2, mask=np.array([False, True, True, True]))
+    assert masked[0][0].tolist()[0] == 1
+
+    events = index.events_for(hits[0])
+    assert events[0].title == "Москва публичное"
+    assert events[0].score == pytest.approx(1 - events[0].distance)
+
+
+def test_search_chunks_like_single_pass(index, monkeypatch):
+    query = np.random.default_rng(0).normal(size=(3, 4)).astype(np.float32)
+    full = index.search(query, k=3)
+    monkeypatch.setattr(local_retriever, "SEARCH_CHUNK_ROWS", 1)
+    chunked = index.search(query, k=3)
+
+    for (rows_a, dist_a), (rows_b, dist_b) in zip(full, chunked):
+        assert rows_a.tolist() == rows_b.tolist()
+        np.testing.assert_allclose(dist_a, dist_b, rtol=1e-6)
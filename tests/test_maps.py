@@ -0,0 +1,18 @@
+"""Векторизованная матрица расстояний для maps_info."""
+import numpy as np
+import pytest
+
+from src.utils.maps import haversine_distance_m, haversine_matrix_m
+
+
+def test_haversine_matrix_matches_pairwise():
+    points = np.array([[37.6173, 55.7558], [30.3351, 59.9343], [np.nan, np.nan]])
+    matrix = haversine_matrix_m(points)
+
+    assert matrix.shape == (3, 3)
+    assert matrix[0, 0] == 0
+    assert matrix[0, 1] == matrix[1, 0]
+    assert matrix[0, 1] == pytest.approx(haversine_distance_m(tuple(points[0]), tuple(points[1])), rel=1e-9)
+    assert matrix[0, 1] == pytest.approx(634_000, rel=0.01)  # Москва — Санкт-Петербург
+    # точка без координат даёт NaN в своей строке и столбце
+    assert np.isnan(matrix[2]).all() and np.isnan(matrix[:, 2]).all()
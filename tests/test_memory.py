@@ -0,0 +1,48 @@
+"""QueryMemory.lookup: ближайшая запись с другими числами не заслоняет подходящую."""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from src.planner_agent.models import Constraints, InputData
+from src.vdb.rag.memory import QueryMemory
+
+
+def _record(query, budget):
+    payload = InputData(events=[], user_prompt=query, constraints=Constraints(budget=budget)).model_dump_json()
+    return SimpleNamespace(uuid=query, properties={
+        "query": query, "payload": payload, "created_at": datetime.now(timezone.utc),
+    })
+
+
+def test_lookup_skips_nearest_record_with_other_key(monkeypatch):
+    memory = QueryMemory()
+    calls = []
+
+    def near_text(**kwargs):
+        calls.append(kwargs)
+        # ближайшая запись — про другой бюджет, вторая совпадает
+        return SimpleNamespace(objects=[
+            _record("концерт за 3000 рублей", 3000),
+            _record("концерт за 5000 рублей", 5000),
+        ])
+
+    collection = SimpleNamespace(query=SimpleNamespace(near_text=near_text))
+    monkeypatch.setattr(memory, "_get_collection", lambda: collection)
+
+    found = memory.lookup("концерт за 5000 рублей")
+
+    assert calls[0]["limit"] == memory.candidates > 1
+    assert found is not None
+    assert memory.hits == 1
+    assert found.user_prompt == "концерт за 5000 рублей"
+    assert found.constraints.budget == 5000
+
+
+def test_lookup_misses_when_no_candidate_matches(monkeypatch):
+    memory = QueryMemory()
+    collection = SimpleNamespace(query=SimpleNamespace(
+        near_text=lambda **kwargs: SimpleNamespace(objects=[_record("концерт за 3000 рублей", 3000)]),
+    ))
+    monkeypatch.setattr(memory, "_get_collection", lambda: collection)
+
+    assert memory.lookup("концерт за 5000 рублей") is None
+    assert memory.misses == 1
@@ -0,0 +1,60 @@
+"""PlanCache: ключ по промпту, событиям и ограничениям, отпечаток содержимого, LRU."""
+from src.models.event import Event
+from src.planner_agent.models import Constraints, InputData, OutputResult, Plan
+from src.planner_agent.plan_cache import PlanCache
+
+
+EMPTY_RESULT = OutputResult(
+    final_plan=Plan(items=[], total_duration_minutes=0, total_travel_time_minutes=0,
+                    summary="пусто", included_events=[], excluded_events=[]),
+    iterations=0,
+    final_text="готово",
+)
+
+
+def test_hit_with_normalized_prompt(tmp_path):
+    cache = PlanCache(db_path=str(tmp_path / "plans.db"))
+    events = [Event(title="A", description="A", uuid="u1"), Event(title="B", description="B", uuid="u2")]
+    input_data = InputData(events=events, user_prompt="План на вечер", constraints=Constraints())
+
+    assert cache.get(input_data) is None
+    cache.put(input_data, EMPTY_RESULT)
+
+    hit = cache.get(input_data.model_copy(update={"user_prompt": "  план на вечер! "}))
+    assert hit is not None and hit.final_text == "готово"
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_constraints_miss(tmp_path):
+    cache = PlanCache(db_path=str(tmp_path / "plans.db"))
+    events = [Event(title="A", description="A", uuid="u1")]
+    cache.put(InputData(events=events, user_prompt="вечер", constraints=Constraints()), EMPTY_RESULT)
+
+    other = InputData(events=events, user_prompt="вечер", constraints=Constraints(budget=1000))
+    assert cache.get(other) is None
+
+
+def test_changed_event_invalidates_entry(tmp_path):
+    cache = PlanCache(db_path=str(tmp_path / "plans.db"))
+    original = [Event(title="A", description="Старое описание", uuid="u1")]
+    cache.put(InputData(events=original, user_prompt="вечер", constraints=Constraints()), EMPTY_RESULT)
+
+    changed = [Event(title="A", description="Новое описание", uuid="u1")]
+    assert cache.get(InputData(events=changed, user_prompt="вечер", constraints=Constraints())) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = PlanCache(db_path=str(tmp_path / "plans.db"), max_entries=2)
+    inputs = [
+        InputData(events=[Event(title=f"E{i}", description="", uuid=f"u{i}")], user_prompt="вечер",
+                  constraints=Constraints())
+        for i in range(3)
+    ]
+    for input_data in inputs:
+        cache.put(input_data, EMPTY_RESULT)
+
+    assert cache.stats()["size"] == 2
+    assert cache.get(inputs[0]) is None
+    assert cache.get(inputs[2]) is not None
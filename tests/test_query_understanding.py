@@ -0,0 +1,35 @@
+"""understand_locally: когда разбор запроса обходится без вызова LLM."""
+from datetime import date, time
+
+import pytest
+
+from src.vdb.rag.query_understanding import understand_locally
+from src.vdb.rag.self_rag_graph import understand_query_node
+
+
+def test_fully_local_query():
+    understanding = understand_locally("джаз в Москве в субботу с 19 до 23", today=date(2025, 12, 24))
+
+    assert understanding is not None
+    assert understanding.city == "москва"
+    assert understanding.date_from == understanding.date_to == date(2025, 12, 27)
+    assert understanding.constraints.start_time == time(19, 0)
+
+
+@pytest.mark.parametrize("query", [
+    "джаз в Москве с 19 до 23",                 # нет дат
+    "джаз в субботу с 19 до 23",                # нет города
+    "джаз в Москве в субботу с детьми",         # other_constraints
+    "джаз в Москве в субботу около Арбата",     # ориентир
+])
+def test_needs_llm(query):
+    assert understand_locally(query, today=date(2025, 12, 24)) is None
+
+
+def test_node_skips_llm():
+    # LLM не передан: вызов модели упал бы
+    result = understand_query_node({"user_query": "выставки в Казани завтра"}, llm=None)
+
+    assert result["city"] == "казань"
+    assert result["date_from"] is not None
+    assert "без вызова LLM" in result["logs"][0]
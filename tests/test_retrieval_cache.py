@@ -0,0 +1,39 @@
+"""RetrievalCache: LRU, TTL и сброс при новом поколении событий."""
+import pytest
+
+from src.models.event import Event
+from src.vdb.rag import retriever as retriever_module
+from src.vdb.rag.retriever import RetrievalCache, bump_retrieval_generation
+
+
+@pytest.fixture(autouse=True)
+def generation_file(tmp_path, monkeypatch):
+    """Поколение событий — во временном файле, а не в data/cache проекта."""
+    monkeypatch.setattr(retriever_module, "_GENERATION_FILE", tmp_path / "retrieval_generation")
+
+
+def test_lru_eviction():
+    cache = RetrievalCache(max_entries=2, ttl_seconds=60)
+    cache.put("q1", [Event(title="A", description="A")])
+    cache.put("q2", [Event(title="B", description="B")])
+    assert cache.get("q1")[0].title == "A"  # q1 становится самым свежим
+    cache.put("q3", [Event(title="C", description="C")])
+
+    assert cache.get("q2") is None
+    assert cache.get("q1") is not None and cache.get("q3") is not None
+
+
+def test_expired_entry_is_not_returned():
+    cache = RetrievalCache(ttl_seconds=-1)
+    cache.put("q", [Event(title="A", description="A")])
+
+    assert cache.get("q") is None
+
+
+def test_reset_on_new_generation():
+    cache = RetrievalCache()
+    cache.put("q", [Event(title="A", description="A")])
+    bump_retrieval_generation()
+
+    assert cache.get("q") is None
+    assert cache.stats()["misses"] == 1
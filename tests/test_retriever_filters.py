@@ -0,0 +1,68 @@
+"""Фильтры EventRetriever: коллекция без свойства city и локальный фильтр по радиусу."""
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.event import Event, GeoCoordinates
+from src.vdb.rag.retriever import EventRetriever
+
+
+def _config(*names):
+    """Ответ collection.config.get(): свойства, индексация null и векторизатор."""
+    return SimpleNamespace(
+        properties=[SimpleNamespace(name=name) for name in names],
+        inverted_index_config=SimpleNamespace(index_null_state=True),
+        vectorizer="text2vec-openai",
+    )
+
+
+@pytest.fixture
+def old_collection_retriever(monkeypatch):
+    """Retriever над коллекцией, созданной до появления свойства city."""
+    retriever = EventRetriever(use_cache=False, upcoming_only=False)
+    retriever.embedder = None
+    config = _config("title", "description", "owner", "location", "start_ts", "end_ts", "coords")
+    monkeypatch.setattr(retriever, "_get_client", lambda: SimpleNamespace(
+        collections=SimpleNamespace(get=lambda name: SimpleNamespace(config=SimpleNamespace(get=lambda: config))),
+    ))
+    return retriever
+
+
+def test_schema_detects_city_property():
+    assert EventRetriever._parse_schema(_config("owner", "city")).has_city
+    assert not EventRetriever._parse_schema(_config("owner")).has_city
+
+
+def test_collection_without_city_filters_city_locally(old_collection_retriever, monkeypatch):
+    events = [
+        Event(title="Москва", description="", owner="all", location="Москва, ул. Тверская, 1"),
+        Event(title="Казань", description="", owner="all", location="Казань, ул. Баумана, 5"),
+        Event(title="Личное", description="", owner="alice", location="Казань"),
+    ]
+    filters_seen = []
+
+    def search(query, limit, filters=None, mode=None, alpha=None):
+        filters_seen.append(filters)
+        return events
+
+    monkeypatch.setattr(old_collection_retriever, "_search", search)
+
+    with pytest.warns(UserWarning, match="city"):
+        found = old_collection_retriever.retrieve("концерт", owner="alice", city="Москва")
+
+    assert [e.title for e in found] == ["Москва", "Личное"]
+    # схема прочитана без окна дат и радиуса, и city в фильтр Weaviate не попал
+    assert old_collection_retriever._schema is not None
+    assert "city" not in str(filters_seen[0])
+
+
+def test_filter_by_distance_drops_far_and_ungeocoded_events():
+    events = [
+        Event(title="Кремль", description="", coords=GeoCoordinates(latitude=55.7520, longitude=37.6175)),
+        Event(title="Эрмитаж", description="", coords=GeoCoordinates(latitude=59.9398, longitude=30.3146)),
+        Event(title="Без адреса", description=""),
+    ]
+    near_red_square = (55.7539, 37.6208, 1_000)
+
+    assert [e.title for e in EventRetriever.filter_by_distance(events, near_red_square)] == ["Кремль"]
+    assert EventRetriever.filter_by_distance(events, None) == events
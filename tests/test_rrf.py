@@ -0,0 +1,26 @@
+"""reciprocal_rank_fusion: порядок, дедупликация и distance объединённого события."""
+from src.models.event import Event
+from src.vdb.rag.retriever import reciprocal_rank_fusion
+
+
+def test_prefers_events_ranked_high_in_several_lists():
+    a, b, c = (Event(title=name, description=name) for name in "ABC")
+    fused = reciprocal_rank_fusion([[a, b, c], [b, a], [b]])
+
+    assert [e.title for e in fused] == ["B", "A", "C"]
+
+
+def test_deduplicates_by_uuid_and_keeps_closest_copy():
+    from_reformulation = Event(title="A", description="A", uuid="u1", distance=0.40, score=0.60)
+    from_original = Event(title="A", description="A", uuid="u1", distance=0.12, score=0.88)
+    fused = reciprocal_rank_fusion([[from_reformulation], [from_original]])
+
+    assert len(fused) == 1
+    assert fused[0].distance == 0.12 and fused[0].score == 0.88
+
+
+def test_hybrid_results_keep_best_score():
+    first = Event(title="A", description="A", uuid="u1", score=0.3)
+    second = Event(title="A", description="A", uuid="u1", score=0.7)
+
+    assert reciprocal_rank_fusion([[first], [second]])[0].score == 0.7
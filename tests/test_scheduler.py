@@ -0,0 +1,88 @@
+"""RouteSolver: точный DP, жадная вставка, день плана и оценочные переходы."""
+from datetime import time
+
+from src.models.event import Event
+from src.planner_agent.models import Constraints
+from src.planner_agent.scheduler import RouteSolver, normalize_transport
+
+
+def _matrix(n, minutes=15, unknown=()):
+    """Матрица пешком: minutes между любыми событиями, None для пар с индексами из unknown."""
+    return {"walking": [
+        [0 if i == j else (None if i in unknown or j in unknown else minutes) for j in range(n)]
+        for i in range(n)
+    ]}
+
+
+def test_exact_orders_fixed_windows():
+    events = [
+        Event(title="Концерт", description="Концерт", date="2025-12-27 19:00 - 2025-12-27 21:00"),
+        Event(title="Лекция", description="Лекция", date="2025-12-27 12:00 - 2025-12-27 13:30"),
+        Event(title="Музей", description="Музей"),
+    ]
+    schedule = RouteSolver().solve(events, Constraints(), _matrix(3))
+
+    assert schedule.is_exact
+    names = [s.event_name for s in schedule.stops]
+    assert sorted(names) == ["Концерт", "Лекция", "Музей"]
+    assert names.index("Лекция") < names.index("Концерт") == 2
+    assert not schedule.excluded_events
+    concert = schedule.stops[-1]
+    assert concert.start_time == time(19, 0) and concert.end_time == time(21, 0)
+    # переходы не пересекаются с посещениями
+    for prev, stop in zip(schedule.stops, schedule.stops[1:]):
+        assert stop.start_time >= prev.end_time
+        assert stop.travel_time_minutes == 15
+
+
+def test_exact_respects_end_time():
+    events = [
+        Event(title="Ранний", description="Ранний", date="2025-12-27 11:00 - 2025-12-27 12:00"),
+        Event(title="Поздний", description="Поздний", date="2025-12-27 21:00 - 2025-12-27 23:00"),
+    ]
+    schedule = RouteSolver().solve(events, Constraints(end_time=time(20, 0)), _matrix(2))
+
+    assert [s.event_name for s in schedule.stops] == ["Ранний"]
+    assert schedule.excluded_events == ["Поздний"]
+
+
+def test_heuristic_matches_exact_on_feasible_instance():
+    events = [Event(title=f"Событие {i}", description="Без даты") for i in range(4)]
+    constraints = Constraints(start_time=time(10, 0), end_time=time(20, 0))
+
+    exact = RouteSolver().solve(events, constraints, _matrix(4))
+    greedy = RouteSolver(exact_max_events=0).solve(events, constraints, _matrix(4))
+
+    assert exact.is_exact and not greedy.is_exact
+    assert len(exact.stops) == len(greedy.stops) == 4
+    assert greedy.total_travel_time_minutes == exact.total_travel_time_minutes == 45
+
+
+def test_plan_is_one_day():
+    events = [
+        Event(title="Суббота 1", description="", date="2025-12-27 12:00 - 2025-12-27 13:00"),
+        Event(title="Воскресенье", description="", date="2025-12-28 12:00 - 2025-12-28 13:00"),
+        Event(title="Суббота 2", description="", date="2025-12-27 15:00 - 2025-12-27 16:00"),
+        Event(title="Выставка", description="", date="2025-12-20 10:00 - 2025-12-30 18:00"),
+    ]
+    schedule = RouteSolver().solve(events, Constraints(), _matrix(4))
+
+    assert schedule.day == "2025-12-27"
+    assert schedule.excluded_events == ["Воскресенье"]
+    assert {s.event_name for s in schedule.stops} == {"Суббота 1", "Суббота 2", "Выставка"}
+
+
+def test_unknown_legs_are_marked_estimated():
+    events = [Event(title=name, description="") for name in "ABC"]
+    schedule = RouteSolver(unknown_travel_minutes=30).solve(events, Constraints(), _matrix(3, unknown={2}))
+
+    legs = [s.travel_time_minutes for s in schedule.stops[1:]]
+    assert 30 in legs
+    assert schedule.estimated_legs == legs.count(30)
+
+
+def test_normalize_transport():
+    assert normalize_transport("Пешком") == "walking"
+    assert normalize_transport("на такси") == "car"
+    assert normalize_transport("общественный транспорт") == "bus"
+    assert normalize_transport("велосипед") is None
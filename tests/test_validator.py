@@ -0,0 +1,74 @@
+"""PlanValidator: механические нарушения находятся без LLM."""
+from datetime import time
+
+from src.models.event import Event
+from src.planner_agent.models import Constraints, Plan, PlanItem
+from src.planner_agent.validator import PlanValidator
+
+
+def _item(name, start, end, travel=None, transport="walking"):
+    duration = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    return PlanItem(
+        event_name=name, event_address=f"Адрес {name}", start_time=start, end_time=end,
+        duration_minutes=duration, transport_mode=transport, travel_time_minutes=travel,
+    )
+
+
+def _plan(items, total=None, travel=None):
+    span = (items[-1].end_time.hour * 60 + items[-1].end_time.minute) - \
+        (items[0].start_time.hour * 60 + items[0].start_time.minute)
+    return Plan(
+        items=items,
+        total_duration_minutes=span if total is None else total,
+        total_travel_time_minutes=sum(i.travel_time_minutes or 0 for i in items) if travel is None else travel,
+        summary="план",
+        included_events=[i.event_name for i in items],
+        excluded_events=[],
+    )
+
+
+def _codes(violations):
+    return {v.code for v in violations}
+
+
+def test_valid_plan_has_no_violations():
+    plan = _plan([
+        _item("A", time(10, 0), time(11, 0)),
+        _item("B", time(11, 20), time(12, 0), travel=15),
+    ])
+    assert PlanValidator().validate(plan, Constraints()) == []
+
+
+def test_overlap_and_travel_gap():
+    plan = _plan([
+        _item("A", time(10, 0), time(11, 0)),
+        _item("B", time(10, 30), time(11, 30)),
+        _item("C", time(11, 40), time(12, 30), travel=40),
+    ])
+    assert {"overlap", "travel_gap"} <= _codes(PlanValidator().validate(plan, Constraints()))
+
+
+def test_totals_mismatch():
+    plan = _plan([_item("A", time(10, 0), time(11, 0))], total=200, travel=30)
+    assert {"total_duration", "total_travel"} <= _codes(PlanValidator().validate(plan, Constraints()))
+
+
+def test_constraints_and_included_events():
+    plan = _plan([_item("A", time(9, 0), time(11, 0)), _item("B", time(20, 0), time(23, 0))])
+    plan = plan.model_copy(update={"included_events": ["A", "Лишнее"]})
+    constraints = Constraints(start_time=time(10, 0), end_time=time(22, 0), max_total_time_minutes=300)
+
+    codes = _codes(PlanValidator().validate(plan, constraints))
+    assert {"start_time", "end_time", "max_total_time", "included_events"} <= codes
+
+
+def test_travel_time_checked_against_matrix():
+    events = [Event(title="A", description="A"), Event(title="B", description="B")]
+    maps_info = {"success": True, "durations_min": {"walking": [[0, 40], [40, 0]]}}
+    plan = _plan([
+        _item("A", time(10, 0), time(11, 0)),
+        _item("B", time(11, 10), time(12, 0), travel=10),
+    ])
+
+    violations = PlanValidator().validate(plan, Constraints(), events=events, maps_info=maps_info)
+    assert "travel_time" in _codes(violations)